@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""bench_decoder.py — Benchmark IncrementalDecoder (templates/python/streaming_transport.py) offline.
+
+bench_templates.py replays every template through ReplayTransport, which
+hands the SDK parsed messages, so the decoder behind StreamingCLITransport
+never runs there. This script feeds it raw CLI stdout bytes instead:
+
+- the lines of a recording (scripts/recordings/default.jsonl), followed by
+- one user message whose tool_result string is --mb megabytes of escaped
+  text (quotes, backslashes, \\uXXXX escapes, multi-byte UTF-8),
+
+in --chunk sized pieces, generated on the fly so the input is never held in
+memory as a whole. It checks that every message comes out, that the spill
+file holds exactly the bytes of the big string, then reports throughput and,
+in a second pass under tracemalloc, peak Python heap.
+
+Usage:
+  python scripts/bench_decoder.py                 # 46 MB tool result, 64 KiB chunks
+  python scripts/bench_decoder.py --mb 200 --chunk 8192
+  python scripts/bench_decoder.py --loads json    # stdlib parser instead of orjson
+"""
+import argparse
+import hashlib
+import importlib.util
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Iterator
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+TEMPLATE = SCRIPT_DIR.parent / "templates" / "python" / "streaming_transport.py"
+DEFAULT_RECORDING = SCRIPT_DIR / "recordings" / "default.jsonl"
+
+# one line of a CSV-ish file, already JSON-escaped: quotes, a backslash, \u escapes, UTF-8
+FILLER = json.dumps('12345,"Zoë",C:\\data\\file.csv,\u2603 ok\t\n', ensure_ascii=False)[1:-1].encode()
+FILLER += json.dumps("\u00e9\u2014\n")[1:-1].encode()
+
+
+def load_template():
+    spec = importlib.util.spec_from_file_location("streaming_transport", TEMPLATE)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)  # main() only runs under __main__
+    return module
+
+
+def stdout_stream(recording: Path, big_bytes: int, chunk: int, digest: "hashlib._Hash") -> Iterator[bytes]:
+    """CLI stdout as chunks: the recording, then one message with a big_bytes string."""
+    lines = [line.encode() for line in recording.read_text(encoding="utf-8").splitlines() if line.strip()]
+    head = json.dumps({"type": "user", "message": {"role": "user", "content": [
+        {"type": "tool_result", "tool_use_id": "toolu_bench", "content": "\0"}]}}).encode()
+    prefix, suffix = head.split(b"\\u0000")
+    pending = bytearray(b"\n".join(lines) + b"\n" + prefix)
+    reps, rest = divmod(big_bytes, len(FILLER))
+    body = FILLER * max(1, chunk // len(FILLER))
+    emitted = 0
+    while emitted < reps * len(FILLER):
+        piece = body[:reps * len(FILLER) - emitted]
+        pending += piece
+        digest.update(piece)
+        emitted += len(piece)
+        while len(pending) >= chunk:
+            yield bytes(pending[:chunk])
+            del pending[:chunk]
+    tail = FILLER[:rest].rstrip(b"\\")  # never end on half an escape
+    digest.update(tail)
+    pending += tail + suffix + b"\n"
+    while pending:
+        yield bytes(pending[:chunk])
+        del pending[:chunk]
+
+
+def run(module, args, spill_dir: Path, trace_memory: bool) -> dict:
+    loads = json.loads if args.loads == "json" else module.fast_loads
+    decoder = module.IncrementalDecoder(spill_dir=spill_dir, loads=loads)
+    digest = hashlib.sha256()
+    expected = sum(1 for line in args.recording.read_text(encoding="utf-8").splitlines() if line.strip()) + 1
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    messages = sum(len(decoder.feed(chunk)) for chunk in
+                   stdout_stream(args.recording, int(args.mb * 1e6), args.chunk, digest))
+    elapsed = time.perf_counter() - started
+    result = {"messages": messages, "bytes": decoder.stats.bytes_in, "elapsed_s": elapsed,
+              "summary": decoder.stats.summary()}
+    if trace_memory:
+        result["peak_kib"] = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+    problems = []
+    if messages != expected:
+        problems.append(f"decoded {messages} messages, expected {expected}")
+    spills = decoder.stats.spills
+    if len(spills) != 1:
+        problems.append(f"{len(spills)} spill files, expected 1")
+    elif hashlib.sha256(spills[0].read_bytes()).digest() != digest.digest():
+        problems.append(f"spill file {spills[0]} does not match the generated string")
+    for path in spills:
+        path.unlink(missing_ok=True)
+    result["problems"] = problems
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--mb", type=float, default=46.0, help="size of the big tool_result string")
+    parser.add_argument("--chunk", type=int, default=64 * 1024, help="bytes per feed() call")
+    parser.add_argument("--recording", type=Path, default=DEFAULT_RECORDING)
+    parser.add_argument("--loads", choices=("fast", "json"), default="fast",
+                        help="fast = orjson when installed, else json")
+    args = parser.parse_args()
+
+    module = load_template()
+    with tempfile.TemporaryDirectory(prefix="bench-decoder-") as tmp:
+        timed = run(module, args, Path(tmp), trace_memory=False)
+        traced = run(module, args, Path(tmp), trace_memory=True)
+    print(timed["summary"])
+    print(f"{timed['bytes'] / 1e6:.1f} MB in {timed['elapsed_s']:.2f}s = "
+          f"{timed['bytes'] / 1e6 / timed['elapsed_s']:.1f} MB/s, peak heap {traced['peak_kib']:.0f} KiB "
+          f"(chunk {args.chunk:,} B, loads={args.loads})")
+    problems = timed["problems"] + traced["problems"]
+    for line in problems:
+        print(f"  FAIL: {line}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
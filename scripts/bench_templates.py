@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""bench_templates.py — Benchmark the Python templates offline. No LLM, no API cost.
+
+Each template runs in its own subprocess with claude_agent_sdk.query and
+ClaudeSDKClient patched to use ReplayTransport (scripts/replay_transport.py),
+also in place of any CLI transport the template builds itself, so the
+template's real message loop, hooks, can_use_tool callback and SDK MCP
+tool handlers run against a recorded CLI stream. A replaced transport's own
+stdout handling never runs, so templates whose point is the transport are
+left out of the default run and have their own benchmark (BENCHED_ELSEWHERE).
+
+Reported per template:
+  msgs        messages replayed to the SDK (including control requests)
+  startup     ms from transport connect to the first prompt (initialize
+              handshake plus template setup)
+  dispatch    µs per message spent in the SDK + template message loop, from
+              the first prompt to transport close, minus replay delays and
+              callback time (summed per transport for concurrent sessions)
+  hook/perm/tool p95
+              latency of hook callbacks, can_use_tool and SDK MCP tool calls,
+              from the request being sent to the SDK's answer
+  peak        peak Python heap (tracemalloc) while the template runs; measured
+              in a separate run so tracing does not skew the timings
+
+Results are compared with a stored baseline; the script exits 1 when a
+metric grows past --tolerance (and an absolute noise floor), or a template
+that used to pass now fails. Timings are machine-dependent, so every run
+also benchmarks a calibration template (--calibration, basic_query by
+default); each baseline entry keeps the calibration numbers it was recorded
+with, and timings are scaled by how much slower or faster the calibration
+runs now. A p95 latency is only gated once both runs have at least
+MIN_SAMPLES samples of it.
+
+Usage:
+  python scripts/bench_templates.py                      # all templates vs baseline
+  python scripts/bench_templates.py hooks_example rule_engine
+  python scripts/bench_templates.py --speed 1.0          # real-time pacing
+  python scripts/bench_templates.py --update-baseline    # store current numbers
+
+A template-specific recording at scripts/recordings/<template>.jsonl is used
+instead of --recording when present.
+"""
+import argparse
+import json
+import os
+import runpy
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+TEMPLATES_DIR = SCRIPT_DIR.parent / "templates" / "python"
+RECORDINGS_DIR = SCRIPT_DIR / "recordings"
+DEFAULT_BASELINE = SCRIPT_DIR / "bench-baseline.json"
+RESULT_MARKER = "BENCH_RESULT "
+
+# metric prefix -> absolute growth ignored as noise
+NOISE_FLOOR = {"dispatch_us": 50.0, "startup_ms": 25.0, "p95_ms": 1.0, "peak_kib": 512.0}
+# metric suffix -> calibration metric its machine speed factor comes from
+CALIBRATED = {"dispatch_us": "dispatch_us", "startup_ms": "startup_ms", "p95_ms": "dispatch_us"}
+MIN_SAMPLES = 20
+# templates replay cannot measure -> the script that benchmarks them
+BENCHED_ELSEWHERE = {"streaming_transport": "scripts/bench_decoder.py"}
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+# ---------------------------------------------------------------------------
+# Child: run one template against the replay transport
+# ---------------------------------------------------------------------------
+
+def run_child(template: Path, recording: Path, speed: float | None, trace_memory: bool) -> dict:
+    sys.path.insert(0, str(SCRIPT_DIR))
+    import claude_agent_sdk
+    from claude_agent_sdk._internal.transport.subprocess_cli import SubprocessCLITransport
+    from replay_transport import ReplayTransport
+
+    transports: list[ReplayTransport] = []
+
+    def make_transport(options) -> ReplayTransport:
+        partial = bool(options and options.include_partial_messages)
+        transports.append(ReplayTransport(recording, speed=speed, partial_messages=partial))
+        return transports[-1]
+
+    def replay(transport, options):
+        # templates that bring their own CLI transport (subclasses included) are replayed too
+        if transport is None or isinstance(transport, SubprocessCLITransport):
+            return make_transport(options)
+        return transport
+
+    real_query = claude_agent_sdk.query
+
+    def replay_query(*, prompt, options=None, transport=None):
+        return real_query(prompt=prompt, options=options, transport=replay(transport, options))
+
+    class ReplayClient(claude_agent_sdk.ClaudeSDKClient):
+        def __init__(self, options=None, transport=None):
+            super().__init__(options=options, transport=replay(transport, options))
+
+    claude_agent_sdk.query = replay_query
+    claude_agent_sdk.ClaudeSDKClient = ReplayClient
+
+    status = "ok"
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        runpy.run_path(str(template), run_name="__main__")
+    except SystemExit as e:
+        status = "ok" if e.code in (None, 0) else f"exit {e.code}"
+    except BaseException as e:  # report, don't crash the harness
+        status = f"{type(e).__name__}: {e}"[:120]
+    runs = [t.stats for t in transports]
+    result: dict = {"status": status, "msgs": sum(r.messages for r in runs)}
+    if trace_memory:
+        result["peak_kib"] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        tracemalloc.stop()
+        return result
+    # Each transport's busy time: first prompt to close, minus replay delays and callbacks
+    timed = [r for r in runs if r.first_prompt_at is not None and r.closed_at is not None]
+    if timed and result["msgs"]:
+        busy = sum(r.closed_at - r.first_prompt_at - r.sleep_s - r.callback_s for r in timed)
+        result["dispatch_us"] = round(max(busy, 0.0) / sum(r.messages for r in timed) * 1e6, 1)
+        result["startup_ms"] = round((timed[0].first_prompt_at - timed[0].connected_at) * 1000, 2)
+    latencies: dict[str, list[float]] = {}
+    for r in runs:
+        for key, values in r.latencies.items():
+            latencies.setdefault(key, []).extend(values)
+    for key, values in sorted(latencies.items()):
+        result[f"{key} p95_ms"] = round(percentile(values, 0.95) * 1000, 3)
+        result[f"{key} n"] = len(values)
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Parent: run every template, print the table, compare with the baseline
+# ---------------------------------------------------------------------------
+
+def bench(template: Path, recording: Path, speed: float | None, timeout: float, verbose: bool,
+          trace_memory: bool = False) -> dict:
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+        env = {
+            **os.environ,
+            "CLAUDE_CONFIG_DIR": str(Path(tmp) / ".claude"),  # keep real sessions out of it
+            "AUDIT_DIR": str(Path(tmp) / "audit"),
+            "DOCS_INDEX_DIR": str(Path(tmp) / "docs-index"),
+        }
+        cmd = [sys.executable, __file__, "--child", str(template), "--recording", str(recording)]
+        if speed:
+            cmd += ["--speed", str(speed)]
+        if trace_memory:
+            cmd.append("--trace-memory")
+        try:
+            proc = subprocess.run(cmd, cwd=tmp, env=env, capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return {"status": f"timeout after {timeout:.0f}s"}
+    if verbose:
+        print(proc.stdout + proc.stderr)
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER):])
+    tail = (proc.stderr.strip().splitlines() or ["no output"])[-1]
+    return {"status": f"crashed: {tail}"[:120]}
+
+
+def summarize(results: list[dict]) -> dict:
+    """Best (lowest) value of every metric across runs, the usual way to filter
+    scheduler noise out of timings; the first failing status wins."""
+    out: dict = {}
+    for r in results:
+        for key, value in r.items():
+            out.setdefault(key, value)
+    for key in out:
+        values = [r[key] for r in results if isinstance(r.get(key), (int, float))]
+        if values:
+            out[key] = round(min(values), 3)
+    out["status"] = next((r["status"] for r in results if r["status"] != "ok"), "ok")
+    return out
+
+
+def grouped_p95(metrics: dict, prefix: str) -> float | None:
+    values = [v for k, v in metrics.items() if k.startswith(prefix) and k.endswith("p95_ms")]
+    return max(values) if values else None
+
+
+def print_table(results: dict[str, dict]) -> None:
+    def cell(v, fmt):
+        return format(v, fmt) if isinstance(v, (int, float)) else "-"
+
+    print(f"{'template':32} {'status':8} {'msgs':>5} {'startup ms':>11} {'dispatch µs':>12} "
+          f"{'hook p95':>9} {'perm p95':>9} {'tool p95':>9} {'peak KiB':>9}")
+    for name, m in results.items():
+        status = "ok" if m["status"] == "ok" else "FAIL"
+        print(f"{name:32} {status:8} {cell(m.get('msgs'), '.0f'):>5} {cell(m.get('startup_ms'), '.1f'):>11} {cell(m.get('dispatch_us'), '.1f'):>12} "
+              f"{cell(grouped_p95(m, 'hook:'), '.2f'):>9} {cell(grouped_p95(m, 'can_use_tool'), '.2f'):>9} "
+              f"{cell(grouped_p95(m, 'tool:'), '.2f'):>9} {cell(m.get('peak_kib'), '.0f'):>9}")
+        if m["status"] != "ok":
+            print(f"{'':32} └ {m['status']}")
+
+
+def speed_factor(base: dict, m: dict, metric: str) -> float:
+    """How much slower (>1) or faster (<1) the calibration template ran now than when
+    base was recorded; 1.0 when either side has no calibration."""
+    old = (base.get("calibration") or {}).get(metric)
+    new = (m.get("calibration") or {}).get(metric)
+    return new / old if isinstance(old, (int, float)) and isinstance(new, (int, float)) and old > 0 else 1.0
+
+
+def regressions(results: dict[str, dict], baseline: dict[str, dict], tolerance: float) -> list[str]:
+    found = []
+    for name, m in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if base.get("status") == "ok" and m["status"] != "ok":
+            found.append(f"{name}: now fails ({m['status']})")
+        for key, old in base.items():
+            new = m.get(key)
+            floor = next((f for suffix, f in NOISE_FLOOR.items() if key.endswith(suffix)), None)
+            if floor is None or not isinstance(old, (int, float)) or not isinstance(new, (int, float)):
+                continue
+            if key.endswith(" p95_ms"):
+                count = key.removesuffix("p95_ms") + "n"
+                if min(base.get(count, 0), m.get(count, 0)) < MIN_SAMPLES:
+                    continue  # a p95 of a handful of samples is mostly noise
+            metric = next((c for suffix, c in CALIBRATED.items() if key.endswith(suffix)), None)
+            if metric:
+                old = round(old * speed_factor(base, m, metric), 3)
+            if new > old * (1 + tolerance) and new - old > floor:
+                found.append(f"{name}: {key} {old} → {new} (+{(new / old - 1) * 100 if old else float('inf'):.0f}%)")
+    return found
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("templates", nargs="*", help="template names (default: all)")
+    parser.add_argument("--recording", type=Path, default=RECORDINGS_DIR / "default.jsonl")
+    parser.add_argument("--speed", type=float, default=None, help="replay speed; omit for no delays")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per template; the best run counts")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds per template run")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative growth")
+    parser.add_argument("--calibration", default="basic_query",
+                        help="template timed alongside the others to normalize for machine speed ('' to skip)")
+    parser.add_argument("--verbose", action="store_true", help="show template output")
+    parser.add_argument("--child", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument("--trace-memory", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(RESULT_MARKER + json.dumps(run_child(args.child, args.recording, args.speed, args.trace_memory)))
+        return 0
+
+    def run(name: str, trace_memory: bool = True) -> dict:
+        template = TEMPLATES_DIR / f"{name.removesuffix('.py')}.py"
+        own = RECORDINGS_DIR / f"{template.stem}.jsonl"
+        recording = own if own.exists() else args.recording
+        runs = [bench(template, recording, args.speed, args.timeout, args.verbose) for _ in range(args.repeat)]
+        if trace_memory:
+            runs.append(bench(template, recording, args.speed, args.timeout, args.verbose, trace_memory=True))
+        return summarize(runs)
+
+    calibration = {}
+    if args.calibration:
+        measured = run(args.calibration, trace_memory=False)
+        calibration = {k: measured[k] for k in CALIBRATED.values() if k in measured}
+        print(f"  calibration ({args.calibration}): {calibration or measured['status']}", file=sys.stderr)
+
+    names = args.templates or sorted(p.stem for p in TEMPLATES_DIR.glob("*.py") if p.stem not in BENCHED_ELSEWHERE)
+    for name in BENCHED_ELSEWHERE.keys() & {n.removesuffix(".py") for n in names}:
+        print(f"  {name}: replay skips its transport; benchmark it with {BENCHED_ELSEWHERE[name]}", file=sys.stderr)
+    results: dict[str, dict] = {}
+    for name in names:
+        results[name.removesuffix(".py")] = result = run(name)
+        if calibration:
+            result["calibration"] = calibration
+        print(f"  {name.removesuffix('.py')}: {result['status']}", file=sys.stderr)
+
+    print_table(results)
+
+    # Timings depend on pacing, so each replay speed keeps its own baseline
+    mode = f"speed={args.speed:g}" if args.speed else "unpaced"
+    stored = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    if args.update_baseline:
+        stored.setdefault(mode, {}).update(results)
+        args.baseline.write_text(json.dumps(stored, indent=2, sort_keys=True) + "\n")
+        print(f"\nBaseline updated: {args.baseline} ({mode})")
+        return 0
+    if not stored.get(mode):
+        print(f"\nNo {mode} baseline in {args.baseline}; run with --update-baseline to create one.")
+        return 0
+
+    found = regressions(results, stored[mode], args.tolerance)
+    print("\n=========================================")
+    if found:
+        print(f"BENCHMARK REGRESSION — {len(found)} issue(s)")
+        for line in found:
+            print(f"  {line}")
+        return 1
+    print("BENCHMARK PASSED")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""Offline stand-in for the Claude Code CLI transport.
+
+ReplayTransport implements claude_agent_sdk.Transport by replaying a
+recorded JSONL stream of CLI stdout instead of spawning the CLI:
+
+- every user message the SDK writes starts the next recorded segment (a run
+  of lines ending with a "result" message), cycling if the recording runs
+  out;
+- recorded hook_callback / can_use_tool / mcp_message control requests are
+  re-issued to the SDK (hook callback IDs are remapped from the SDK's own
+  initialize request) and replay waits for the answer, as the CLI does;
+- SDK-side control requests (initialize, interrupt, set_model, mcp_status,
+  ...) get canned success responses; interrupt skips to the segment result;
+- stream_event lines are only replayed with partial_messages=True, matching
+  include_partial_messages on the CLI;
+- speed scales the recorded "_t" timestamps (1.0 = real time, None = no
+  delays), so the same stream can measure pure SDK overhead or realistic
+  pacing.
+
+ReplayStats records message counts, time spent sleeping and the latency of
+every control request answered by the SDK, keyed as hook:<Event>,
+can_use_tool and tool:<server>/<name>.
+
+RecordingTransport wraps the real subprocess transport and writes each line
+the CLI sends, stamped with "_t", in the format ReplayTransport reads:
+
+    options = ClaudeAgentOptions(...)
+    transport = RecordingTransport("run.jsonl", prompt="...", options=options)
+    async for msg in query(prompt="...", options=options, transport=transport): ...
+"""
+import asyncio
+import contextlib
+import json
+import re
+import time
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+from claude_agent_sdk import Transport
+from claude_agent_sdk._internal.transport.subprocess_cli import SubprocessCLITransport
+
+CANNED_RESPONSES: dict[str, dict[str, Any]] = {
+    "initialize": {"commands": [], "output_style": "default", "account": {}},
+    "mcp_status": {"mcpServers": []},
+    "get_context_usage": {"categories": [], "totalTokens": 0, "maxTokens": 200_000, "percentage": 0},
+}
+_END = object()
+
+
+@dataclass
+class ReplayStats:
+    messages: int = 0
+    bytes: int = 0
+    sleep_s: float = 0.0
+    # perf_counter() timestamps
+    connected_at: float | None = None
+    first_prompt_at: float | None = None
+    closed_at: float | None = None
+    latencies: dict[str, list[float]] = field(default_factory=dict)  # seconds
+    errors: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def callback_s(self) -> float:
+        return sum(sum(v) for v in self.latencies.values())
+
+
+def load_segments(path: str | Path) -> list[list[dict[str, Any]]]:
+    """Split a recording into per-prompt segments, each ending at a result."""
+    segments: list[list[dict[str, Any]]] = [[]]
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            segments[-1].append(entry)
+            if entry.get("type") == "result":
+                segments.append([])
+    if not segments[-1]:
+        segments.pop()
+    if not segments:
+        raise ValueError(f"{path}: recording has no messages")
+    return segments
+
+
+class ReplayTransport(Transport):
+    def __init__(
+        self,
+        recording: str | Path,
+        speed: float | None = None,
+        partial_messages: bool = False,
+        stats: ReplayStats | None = None,
+        response_timeout_s: float = 30.0,
+    ):
+        self.segments = load_segments(recording)
+        self.speed = speed
+        self.partial_messages = partial_messages
+        self.stats = stats or ReplayStats()
+        self.response_timeout_s = response_timeout_s
+        self._inbound: asyncio.Queue = asyncio.Queue()  # user messages from the SDK
+        self._outbound: asyncio.Queue = asyncio.Queue()  # lines for the SDK to read
+        self._pending: dict[str, tuple[asyncio.Future, str, float]] = {}
+        self._hooks: dict[str, list[tuple[str | None, list[str]]]] = {}
+        self._next_segment = 0
+        self._request_counter = 0
+        self._interrupted = False
+        self._task: asyncio.Task | None = None
+
+    async def connect(self) -> None:
+        if self._task is None:
+            self.stats.connected_at = time.perf_counter()
+            self._task = asyncio.create_task(self._run())
+
+    def is_ready(self) -> bool:
+        return self.stats.connected_at is not None and self.stats.closed_at is None
+
+    async def end_input(self) -> None:
+        self._inbound.put_nowait(_END)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+        self._outbound.put_nowait(_END)
+        self.stats.closed_at = time.perf_counter()
+
+    async def write(self, data: str) -> None:
+        for line in data.splitlines():
+            if not line.strip():
+                continue
+            msg = json.loads(line)
+            if msg.get("type") == "control_response":
+                self._resolve(msg["response"])
+            elif msg.get("type") == "control_request":
+                self._send(self._answer(msg))
+            else:
+                if self.stats.first_prompt_at is None:
+                    self.stats.first_prompt_at = time.perf_counter()
+                self._inbound.put_nowait(msg)
+
+    async def read_messages(self) -> AsyncIterator[dict[str, Any]]:
+        while (msg := await self._outbound.get()) is not _END:
+            yield msg
+
+    # -- replay --------------------------------------------------------------
+
+    def _send(self, msg: dict[str, Any]) -> None:
+        self.stats.messages += 1
+        self.stats.bytes += len(json.dumps(msg))
+        self._outbound.put_nowait(msg)
+
+    def _resolve(self, response: dict[str, Any]) -> None:
+        pending = self._pending.pop(response.get("request_id"), None)
+        if pending is None:
+            return
+        fut, key, sent_at = pending
+        mcp_error = "error" in (response.get("response") or {}).get("mcp_response", {})
+        if response.get("subtype") == "success" and not mcp_error:
+            self.stats.latencies.setdefault(key, []).append(time.perf_counter() - sent_at)
+        else:
+            self.stats.errors[key] = self.stats.errors.get(key, 0) + 1
+        if not fut.done():
+            fut.set_result(response)
+
+    def _answer(self, msg: dict[str, Any]) -> dict[str, Any]:
+        request = msg["request"]
+        subtype = request.get("subtype")
+        if subtype == "initialize":
+            for event, matchers in (request.get("hooks") or {}).items():
+                self._hooks[event] = [(m.get("matcher"), m["hookCallbackIds"]) for m in matchers]
+        elif subtype == "interrupt":
+            self._interrupted = True
+        return {
+            "type": "control_response",
+            "response": {
+                "subtype": "success",
+                "request_id": msg["request_id"],
+                "response": CANNED_RESPONSES.get(subtype, {}),
+            },
+        }
+
+    async def _run(self) -> None:
+        while await self._inbound.get() is not _END:
+            segment = self.segments[self._next_segment % len(self.segments)]
+            self._next_segment += 1
+            await self._replay_segment(segment)
+        self._outbound.put_nowait(_END)
+
+    async def _replay_segment(self, segment: list[dict[str, Any]]) -> None:
+        self._interrupted = False
+        last_t = segment[0].get("_t", 0.0)
+        for entry in segment:
+            if self._interrupted and entry.get("type") != "result":
+                continue
+            if entry.get("type") == "stream_event" and not self.partial_messages:
+                continue
+            t = entry.get("_t", last_t)
+            if self.speed and t > last_t:
+                slept_from = time.perf_counter()
+                await asyncio.sleep((t - last_t) / self.speed)
+                self.stats.sleep_s += time.perf_counter() - slept_from
+            last_t = t
+            msg = {k: v for k, v in entry.items() if k != "_t"}
+            if msg.get("type") == "control_request":
+                await self._reissue(msg["request"])
+            else:
+                self._send(msg)
+                await asyncio.sleep(0)  # let the SDK consume, as it would between pipe reads
+
+    async def _reissue(self, request: dict[str, Any]) -> None:
+        """Send a recorded CLI→SDK control request and wait for the SDK's answer."""
+        subtype = request.get("subtype")
+        if subtype == "hook_callback":
+            hook_input = request.get("input") or {}
+            event = hook_input.get("hook_event_name", "")
+            tool_name = hook_input.get("tool_name")
+            requests = [
+                ({**request, "callback_id": cid}, f"hook:{event}")
+                for matcher, ids in self._hooks.get(event, [])
+                if matcher in (None, "", "*") or tool_name is None or re.fullmatch(matcher, tool_name)
+                for cid in ids
+            ]
+        elif subtype == "mcp_message":
+            params = (request.get("message") or {}).get("params") or {}
+            requests = [(request, f"tool:{request.get('server_name')}/{params.get('name', '?')}")]
+        else:
+            requests = [(request, subtype or "unknown")]
+        for req, key in requests:
+            self._request_counter += 1
+            request_id = f"replay_{self._request_counter}"
+            fut = asyncio.get_running_loop().create_future()
+            self._pending[request_id] = (fut, key, time.perf_counter())
+            self._send({"type": "control_request", "request_id": request_id, "request": req})
+            try:
+                await asyncio.wait_for(fut, self.response_timeout_s)
+            except asyncio.TimeoutError:
+                self._pending.pop(request_id, None)
+                self.stats.errors[key] = self.stats.errors.get(key, 0) + 1
+
+
+class RecordingTransport(SubprocessCLITransport):
+    """The real CLI transport, teeing every CLI → SDK line to a JSONL file."""
+
+    def __init__(self, path: str | Path, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.path = Path(path)
+
+    async def _read_messages_impl(self) -> AsyncIterator[dict[str, Any]]:
+        start = time.monotonic()
+        with open(self.path, "w", encoding="utf-8") as out:
+            async for msg in super()._read_messages_impl():
+                if msg.get("type") != "control_response":  # answers to SDK requests are canned on replay
+                    out.write(json.dumps({**msg, "_t": round(time.monotonic() - start, 4)}) + "\n")
+                yield msg
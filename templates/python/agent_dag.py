@@ -0,0 +1,225 @@
+"""DAG scheduler that runs independent subagents in parallel (Python).
+
+In multi_agent_workflow.py one orchestrator query() delegates to deployer,
+security-checker and monitor through the Task tool, and they run one after
+another. DagScheduler takes the same AgentDefinitions plus declared
+dependencies and runs every agent as its own query() session as soon as its
+upstream stages have finished, so independent stages overlap.
+
+Each stage gets the upstream results appended to its prompt, its own
+max_turns / max_budget_usd, and a record of wall time and cost. The report
+compares total wall time with the critical path (longest chain of dependent
+stage durations) and the serial sum.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field, replace
+from typing import Any
+from claude_agent_sdk import (
+    query, ClaudeAgentOptions, AgentDefinition, create_sdk_mcp_server, tool,
+    ResultMessage,
+)
+
+
+@dataclass
+class Stage:
+    name: str
+    agent: AgentDefinition
+    prompt: str
+    depends_on: list[str] = field(default_factory=list)
+    max_turns: int | None = 10
+    max_budget_usd: float | None = None
+
+
+@dataclass
+class StageResult:
+    name: str
+    status: str = "pending"  # success | error_* | failed | skipped
+    result: str | None = None
+    cost_usd: float = 0.0
+    started_at: float | None = None
+    finished_at: float | None = None
+
+    @property
+    def wall_s(self) -> float:
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+
+class DagScheduler:
+    def __init__(self, stages: list[Stage], base_options: ClaudeAgentOptions):
+        self.stages = {s.name: s for s in stages}
+        self.base_options = base_options
+        self.results = {name: StageResult(name) for name in self.stages}
+        self.order = self._topological_order()
+        self.started_at = self.finished_at = 0.0
+
+    def _topological_order(self) -> list[str]:
+        indegree = {name: 0 for name in self.stages}
+        for stage in self.stages.values():
+            for dep in stage.depends_on:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage {stage.name!r} depends on unknown stage {dep!r}")
+                indegree[stage.name] += 1
+        ready = [n for n, d in indegree.items() if d == 0]
+        order = []
+        while ready:
+            name = ready.pop()
+            order.append(name)
+            for other in self.stages.values():
+                if name in other.depends_on:
+                    indegree[other.name] -= 1
+                    if indegree[other.name] == 0:
+                        ready.append(other.name)
+        if len(order) != len(self.stages):
+            raise ValueError("Stage dependencies contain a cycle")
+        return order
+
+    def _options_for(self, stage: Stage) -> ClaudeAgentOptions:
+        agent = stage.agent
+        return replace(
+            self.base_options,
+            system_prompt=agent.prompt,
+            # tools restricts what the stage can use; allowed_tools only auto-approves
+            tools=list(agent.tools) if agent.tools is not None else self.base_options.tools,
+            allowed_tools=list(agent.tools or self.base_options.allowed_tools),
+            model=agent.model if agent.model and agent.model != "inherit" else self.base_options.model,
+            max_turns=stage.max_turns,
+            max_budget_usd=stage.max_budget_usd,
+            agents=None,
+        )
+
+    def _prompt_for(self, stage: Stage) -> str:
+        upstream = [self.results[d] for d in stage.depends_on]
+        if not upstream:
+            return stage.prompt
+        context = "\n\n".join(f"## {r.name}\n{r.result or '(no output)'}" for r in upstream)
+        return f"{stage.prompt}\n\nResults from upstream stages:\n\n{context}"
+
+    async def _run_stage(self, stage: Stage, deps: list[asyncio.Task]) -> StageResult:
+        await asyncio.gather(*deps)
+        res = self.results[stage.name]
+        if any(self.results[d].status != "success" for d in stage.depends_on):
+            res.status = "skipped"
+            return res
+        res.started_at = time.monotonic()
+        try:
+            async for msg in query(prompt=self._prompt_for(stage), options=self._options_for(stage)):
+                if isinstance(msg, ResultMessage):
+                    res.status = msg.subtype
+                    res.result = msg.result
+                    res.cost_usd = msg.total_cost_usd or 0.0
+        except Exception as e:
+            res.status, res.result = "failed", str(e)
+        res.finished_at = time.monotonic()
+        return res
+
+    async def run(self) -> dict[str, StageResult]:
+        self.started_at = time.monotonic()
+        tasks: dict[str, asyncio.Task] = {}
+        for name in self.order:  # dependencies always get their task first
+            stage = self.stages[name]
+            tasks[name] = asyncio.create_task(
+                self._run_stage(stage, [tasks[d] for d in stage.depends_on])
+            )
+        await asyncio.gather(*tasks.values())
+        self.finished_at = time.monotonic()
+        return self.results
+
+    def critical_path(self) -> tuple[list[str], float]:
+        best: dict[str, tuple[float, list[str]]] = {}
+        for name in self.order:
+            stage = self.stages[name]
+            before = max((best[d] for d in stage.depends_on), default=(0.0, []), key=lambda b: b[0])
+            best[name] = (before[0] + self.results[name].wall_s, before[1] + [name])
+        length, path = max(best.values(), default=(0.0, []), key=lambda b: b[0])
+        return path, length
+
+    def report(self) -> str:
+        lines = [
+            f"{r.name:18} {r.status:24} {r.wall_s:7.1f}s  ${r.cost_usd:.4f}"
+            for r in (self.results[n] for n in self.order)
+        ]
+        path, length = self.critical_path()
+        serial = sum(r.wall_s for r in self.results.values())
+        total_cost = sum(r.cost_usd for r in self.results.values())
+        lines.append(
+            f"wall {self.finished_at - self.started_at:.1f}s | critical path {length:.1f}s "
+            f"({' → '.join(path)}) | serial sum {serial:.1f}s | cost ${total_cost:.4f}"
+        )
+        return "\n".join(lines)
+
+
+@tool("send_notification", "Send notification to a team", {"message": str, "priority": str})
+async def send_notification(args: dict[str, Any]) -> dict[str, Any]:
+    priority = args.get("priority", "medium")
+    return {"content": [{"type": "text", "text": f"Sent ({priority}): {args['message']}"}]}
+
+
+@tool("check_health", "Check service health", {"service": str})
+async def check_health(args: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "content": [
+            {"type": "text", "text": f'{{"service": "{args["service"]}", "status": "healthy"}}'}
+        ]
+    }
+
+
+app_tools = create_sdk_mcp_server(
+    name="app-services",
+    version="1.0.0",
+    tools=[send_notification, check_health],
+)
+
+
+async def main():
+    base = ClaudeAgentOptions(
+        mcp_servers={"app-services": app_tools},
+        permission_mode="bypassPermissions",
+    )
+
+    stages = [
+        Stage(
+            "security-checker",
+            AgentDefinition(
+                description="Security audits and vulnerability scanning",
+                prompt="Scan for exposed secrets, outdated deps, and OWASP issues.",
+                tools=["Read", "Grep", "Bash"],
+                model="sonnet",
+            ),
+            prompt="Audit the repository before deploying v2.5.0. End with PASS or FAIL.",
+            max_turns=15, max_budget_usd=0.50,
+        ),
+        Stage(
+            "monitor",
+            AgentDefinition(
+                description="System monitoring and alerting",
+                prompt="Check metrics, error rates, and system health.",
+                tools=["Bash", "Read", "mcp__app-services__check_health"],
+                model="haiku",
+            ),
+            prompt="Record a pre-deploy health baseline for api, web and worker.",
+            max_turns=8, max_budget_usd=0.10,
+        ),
+        Stage(
+            "deployer",
+            AgentDefinition(
+                description="Handles deployments and rollbacks",
+                prompt="You deploy applications. Always verify health after deployment.",
+                tools=["Bash", "Read", "mcp__app-services__check_health",
+                       "mcp__app-services__send_notification"],
+                model="sonnet",
+            ),
+            prompt="Deploy v2.5.0 only if the security audit passed; compare health to the baseline.",
+            depends_on=["security-checker", "monitor"],
+            max_turns=20, max_budget_usd=1.00,
+        ),
+    ]
+
+    scheduler = DagScheduler(stages, base)
+    results = await scheduler.run()
+    print(results["deployer"].result or f"Deployer: {results['deployer'].status}")
+    print(scheduler.report())
+
+asyncio.run(main())
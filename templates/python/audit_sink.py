@@ -0,0 +1,222 @@
+"""Non-blocking batched audit sink for hooks (Python).
+
+audit_logger / result_logger in hooks_example.py print synchronously inside
+the hook, so audit I/O sits on the critical path of every tool call. Here the
+hooks only enqueue a structured record keyed by tool_use_id; a background task
+drains the queue in batches and appends them to rotating JSONL files from a
+worker thread. A batch is written when it reaches batch_size records or when
+flush_interval_s elapses, whichever comes first.
+
+When the queue is full the overflow policy decides what happens:
+"drop_newest" (default, never blocks the agent), "drop_oldest", or "block"
+(hooks wait for space). The Stop hook awaits flush() so every record of a run
+is on disk before the agent reports completion.
+"""
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Literal
+from claude_agent_sdk import ClaudeSDKClient, ClaudeAgentOptions, HookMatcher, HookContext, ResultMessage
+
+OverflowPolicy = Literal["drop_newest", "drop_oldest", "block"]
+_FLUSH = object()  # queue marker: write what is batched now
+
+
+@dataclass
+class SinkCounters:
+    enqueued: int = 0
+    written: int = 0
+    dropped: int = 0
+    batches: int = 0
+    rotations: int = 0
+
+
+class AuditSink:
+    def __init__(
+        self,
+        directory: str | Path,
+        filename: str = "audit.jsonl",
+        batch_size: int = 256,
+        flush_interval_s: float = 1.0,
+        max_queue: int = 10_000,
+        overflow: OverflowPolicy = "drop_newest",
+        rotate_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 5,
+    ):
+        self.path = Path(directory) / filename
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.overflow = overflow
+        self.rotate_bytes = rotate_bytes
+        self.backup_count = backup_count
+        self.counters = SinkCounters()
+        self._queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=max_queue)
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        await self.flush()
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def __aenter__(self) -> "AuditSink":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def emit(self, event: str, tool_use_id: str | None, **fields: Any) -> None:
+        """Enqueue one record. Never does I/O; only waits under the "block" policy."""
+        record = {"ts": time.time(), "event": event, "tool_use_id": tool_use_id, **fields}
+        if self.overflow == "block":
+            await self._queue.put(record)
+        else:
+            try:
+                self._queue.put_nowait(record)
+            except asyncio.QueueFull:
+                self.counters.dropped += 1
+                if self.overflow == "drop_newest" or not self._drop_oldest():
+                    return
+                self._queue.put_nowait(record)
+        self.counters.enqueued += 1
+
+    def _drop_oldest(self) -> bool:
+        """Drop the oldest record, keeping any flush markers in front of it queued."""
+        markers, dropped = [], False
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            self._queue.task_done()
+            if item is not _FLUSH:
+                dropped = True
+                break
+            markers.append(item)
+        for marker in markers:
+            self._queue.put_nowait(marker)
+        return dropped
+
+    async def flush(self) -> None:
+        """Wait until every enqueued record has been written, or the writer has stopped."""
+        if self._task is None or self._task.done():
+            return  # nothing drains the queue, so join() would never return
+        await self._queue.put(_FLUSH)  # cut the current batch short instead of waiting it out
+        joined = asyncio.ensure_future(self._queue.join())
+        await asyncio.wait({joined, self._task}, return_when=asyncio.FIRST_COMPLETED)
+        joined.cancel()
+
+    async def _run(self) -> None:
+        while True:
+            items = [await self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval_s
+            while items[-1] is not _FLUSH and len(items) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            batch = [r for r in items if r is not _FLUSH]
+            try:
+                if batch:
+                    await asyncio.to_thread(self._write_batch, batch)
+            except Exception as e:  # OSError, or a record json.dumps rejects; keep the writer alive
+                self.counters.dropped += len(batch)
+                print(f"[audit] write failed, dropped {len(batch)} records: {type(e).__name__}: {e}")
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+
+    def _write_batch(self, batch: list[dict[str, Any]]) -> None:
+        data = "".join(json.dumps(r, default=str) + "\n" for r in batch).encode()
+        if self.path.exists() and self.path.stat().st_size + len(data) > self.rotate_bytes:
+            self._rotate()
+        with open(self.path, "ab") as f:
+            f.write(data)
+        self.counters.written += len(batch)
+        self.counters.batches += 1
+
+    def _rotate(self) -> None:
+        if self.backup_count <= 0:
+            self.path.unlink()
+            self.counters.rotations += 1
+            return
+        for i in range(self.backup_count - 1, 0, -1):
+            src = self.path.with_name(f"{self.path.name}.{i}")
+            if src.exists():
+                os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+        os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        self.counters.rotations += 1
+
+
+sink = AuditSink(os.environ.get("AUDIT_DIR", "audit-logs"))
+
+
+async def audit_logger(
+    input_data: dict[str, Any], tool_use_id: str | None, context: HookContext
+) -> dict[str, Any]:
+    """Record every tool call."""
+    await sink.emit(
+        "PreToolUse", tool_use_id,
+        session_id=input_data.get("session_id"),
+        tool_name=input_data.get("tool_name"),
+        tool_input=input_data.get("tool_input"),
+    )
+    return {}
+
+
+async def result_logger(
+    input_data: dict[str, Any], tool_use_id: str | None, context: HookContext
+) -> dict[str, Any]:
+    """Record tool results (size only — responses can be large)."""
+    response = input_data.get("tool_response")
+    await sink.emit(
+        input_data["hook_event_name"], tool_use_id,
+        session_id=input_data.get("session_id"),
+        tool_name=input_data.get("tool_name"),
+        response_chars=len(json.dumps(response, default=str)) if response is not None else 0,
+        error=input_data.get("error"),
+    )
+    return {}
+
+
+async def on_stop(
+    input_data: dict[str, Any], tool_use_id: str | None, context: HookContext
+) -> dict[str, Any]:
+    """Make sure the run's audit trail is on disk before finishing."""
+    await sink.emit("Stop", None, session_id=input_data.get("session_id"))
+    await sink.flush()
+    return {}
+
+
+async def main():
+    options = ClaudeAgentOptions(
+        hooks={
+            "PreToolUse": [HookMatcher(hooks=[audit_logger])],
+            "PostToolUse": [HookMatcher(hooks=[result_logger])],
+            "PostToolUseFailure": [HookMatcher(hooks=[result_logger])],
+            "Stop": [HookMatcher(hooks=[on_stop])],
+        },
+    )
+
+    async with sink, ClaudeSDKClient(options=options) as client:
+        await client.query("Refactor the auth module to use bcrypt")
+        async for message in client.receive_response():
+            if isinstance(message, ResultMessage):
+                if message.subtype == "success":
+                    print(f"\nDone: {message.result}")
+                else:
+                    print(f"Error: {message.subtype}")
+
+    c = sink.counters
+    print(f"[audit] {c.written} written in {c.batches} batches, {c.dropped} dropped, "
+          f"{c.rotations} rotations → {sink.path}")
+
+asyncio.run(main())
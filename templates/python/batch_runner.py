@@ -0,0 +1,204 @@
+"""Bounded-concurrency batch runner for query() (Python).
+
+Runs many independent prompts through query() with a concurrency limit that
+adapts to RateLimitEvent messages: it backs off multiplicatively when the CLI
+reports "allowed_warning"/"rejected" and grows back one slot at a time while
+the status stays "allowed". Results stream back in completion order, and a
+BatchStats summary reports throughput, p50/p95 latency and total cost.
+"""
+import asyncio
+import time
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass, field
+from claude_agent_sdk import (
+    query, ClaudeAgentOptions,
+    RateLimitEvent, ResultMessage,
+)
+
+
+@dataclass
+class BatchResult:
+    index: int
+    prompt: str
+    latency_s: float
+    result: ResultMessage | None = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.result is not None and self.result.subtype == "success"
+
+
+@dataclass
+class BatchStats:
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: float | None = None
+    completed: int = 0
+    failed: int = 0
+    total_cost_usd: float = 0.0
+    rate_limit_events: int = 0
+    latencies: list[float] = field(default_factory=list)
+
+    @property
+    def elapsed_s(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        """Finished prompts per second."""
+        done = self.completed + self.failed
+        return done / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+    def percentile(self, p: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        k = min(len(ordered) - 1, max(0, round(p / 100 * (len(ordered) - 1))))
+        return ordered[k]
+
+    def summary(self) -> str:
+        return (
+            f"{self.completed} ok / {self.failed} failed in {self.elapsed_s:.1f}s "
+            f"({self.throughput:.2f}/s) | p50 {self.percentile(50):.2f}s "
+            f"p95 {self.percentile(95):.2f}s | ${self.total_cost_usd:.4f} "
+            f"| {self.rate_limit_events} rate-limit events"
+        )
+
+
+class AdaptiveLimiter:
+    """Semaphore whose limit can shrink and grow while permits are held (AIMD)."""
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: int | None = None):
+        self.minimum = minimum
+        self.maximum = maximum or initial
+        self.limit = max(minimum, min(initial, self.maximum))
+        self.in_flight = 0
+        self._paused_until = 0.0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._cond:
+            while True:
+                delay = self._paused_until - time.monotonic()
+                if delay > 0:
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                if self.in_flight < self.limit:
+                    self.in_flight += 1
+                    return
+                await self._cond.wait()
+
+    async def release(self) -> None:
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    async def on_rate_limit(self, event: RateLimitEvent, max_pause_s: float = 60.0) -> None:
+        info = event.rate_limit_info
+        async with self._cond:
+            if info.status == "rejected":
+                self.limit = max(self.minimum, self.limit // 2)
+                wait = (info.resets_at - time.time()) if info.resets_at else max_pause_s
+                self._paused_until = time.monotonic() + min(max(wait, 1.0), max_pause_s)
+            elif info.status == "allowed_warning":
+                self.limit = max(self.minimum, self.limit - max(1, self.limit // 4))
+            elif info.status == "allowed":
+                self.limit = min(self.maximum, self.limit + 1)
+            self._cond.notify_all()
+
+
+class BatchRunner:
+    """Run prompts through query() with adaptive, bounded concurrency."""
+
+    def __init__(
+        self,
+        options: ClaudeAgentOptions,
+        concurrency: int = 8,
+        min_concurrency: int = 1,
+        max_pause_s: float = 60.0,
+    ):
+        self.options = options
+        self.concurrency = concurrency
+        self.max_pause_s = max_pause_s
+        self.limiter = AdaptiveLimiter(concurrency, minimum=min_concurrency)
+        self.stats = BatchStats()
+
+    async def _run_one(self, index: int, prompt: str) -> BatchResult:
+        start = time.monotonic()
+        result: ResultMessage | None = None
+        try:
+            async for msg in query(prompt=prompt, options=self.options):
+                if isinstance(msg, RateLimitEvent):
+                    self.stats.rate_limit_events += 1
+                    await self.limiter.on_rate_limit(msg, self.max_pause_s)
+                elif isinstance(msg, ResultMessage):
+                    result = msg
+        except Exception as e:
+            return BatchResult(index, prompt, time.monotonic() - start, result, error=str(e))
+        error = None if result else "no ResultMessage received"
+        return BatchResult(index, prompt, time.monotonic() - start, result, error)
+
+    async def run(self, prompts: Iterable[str]) -> AsyncIterator[BatchResult]:
+        """Yield a BatchResult per prompt, in completion order."""
+        self.stats = BatchStats()
+        source = enumerate(prompts)  # consumed lazily, so generators work too
+        done: asyncio.Queue[BatchResult | None] = asyncio.Queue()
+
+        async def worker() -> None:
+            while True:
+                await self.limiter.acquire()
+                item = next(source, None)
+                if item is None:
+                    await self.limiter.release()
+                    break
+                try:
+                    res = await self._run_one(*item)
+                finally:
+                    await self.limiter.release()
+                await done.put(res)
+            await done.put(None)
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        remaining = len(workers)
+        try:
+            while remaining:
+                res = await done.get()
+                if res is None:
+                    remaining -= 1
+                    continue
+                self.stats.latencies.append(res.latency_s)
+                if res.result and res.result.total_cost_usd:
+                    self.stats.total_cost_usd += res.result.total_cost_usd
+                if res.ok:
+                    self.stats.completed += 1
+                else:
+                    self.stats.failed += 1
+                yield res
+        finally:
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self.stats.finished_at = time.monotonic()
+
+
+async def main():
+    options = ClaudeAgentOptions(
+        system_prompt="Answer with a single number.",
+        max_turns=1,
+        permission_mode="bypassPermissions",
+    )
+    prompts = (f"What is {i} + {i}?" for i in range(20))
+
+    runner = BatchRunner(options, concurrency=5)
+    async for res in runner.run(prompts):
+        if res.ok:
+            print(f"[{res.index}] {res.latency_s:.2f}s → {res.result.result}")
+        else:
+            print(f"[{res.index}] failed: {res.error or res.result.subtype}")
+
+    print(runner.stats.summary())
+
+asyncio.run(main())
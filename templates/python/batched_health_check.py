@@ -0,0 +1,203 @@
+"""Batched, pooled, short-TTL health probing for check_health-style tools (Python).
+
+check_health in multi_agent_workflow.py takes one service per call, so an
+agent checking 40 services spends 40 model round trips. check_health_batch
+takes a list and probes every service concurrently:
+
+- one shared httpx.AsyncClient, so probes reuse keep-alive connections;
+- a per-probe timeout, so one hung service cannot stall the batch;
+- results memoized for ttl_s, and identical in-flight probes shared, so the
+  deployer and monitor agents asking seconds apart get the same answer
+  without probing twice.
+
+Without HEALTH_ENDPOINTS set, main() starts a local HTTP stand-in that serves
+/health/<service> with canned statuses and delays, so the whole flow can be
+exercised offline.
+"""
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Any
+import httpx
+from claude_agent_sdk import (
+    query, ClaudeAgentOptions, AgentDefinition, create_sdk_mcp_server, tool,
+    ResultMessage,
+)
+
+
+@dataclass
+class ProbeStats:
+    probes: int = 0
+    cache_hits: int = 0
+    coalesced: int = 0
+    timeouts: int = 0
+
+
+class HealthProber:
+    def __init__(
+        self,
+        endpoints: dict[str, str],
+        ttl_s: float = 10.0,
+        timeout_s: float = 2.0,
+        max_connections: int = 32,
+    ):
+        self.endpoints = endpoints
+        self.ttl_s = ttl_s
+        self.timeout_s = timeout_s
+        self.stats = ProbeStats()
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout_s),
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+        )
+        self._memo: dict[str, tuple[float, dict[str, Any]]] = {}
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def _probe(self, service: str) -> dict[str, Any]:
+        url = self.endpoints.get(service)
+        if url is None:
+            return {"service": service, "status": "unknown", "error": "no endpoint configured"}
+        self.stats.probes += 1
+        start = time.monotonic()
+        try:
+            resp = await asyncio.wait_for(self._client.get(url), self.timeout_s)
+            status = "healthy" if resp.status_code < 400 else "unhealthy"
+            result = {"service": service, "status": status, "http_status": resp.status_code}
+        except (asyncio.TimeoutError, httpx.TimeoutException):
+            self.stats.timeouts += 1
+            result = {"service": service, "status": "timeout"}
+        except httpx.HTTPError as e:
+            result = {"service": service, "status": "unreachable", "error": type(e).__name__}
+        result["latency_ms"] = round((time.monotonic() - start) * 1000, 1)
+        result["checked_at"] = time.time()
+        self._memo[service] = (time.monotonic() + self.ttl_s, result)
+        return result
+
+    async def check(self, service: str) -> dict[str, Any]:
+        memo = self._memo.get(service)
+        if memo and memo[0] > time.monotonic():
+            self.stats.cache_hits += 1
+            return {**memo[1], "cached": True}
+        if (task := self._inflight.get(service)) is not None:
+            self.stats.coalesced += 1
+            return {**await asyncio.shield(task), "cached": True}
+        task = asyncio.create_task(self._probe(service))
+        self._inflight[service] = task
+        try:
+            return {**await task, "cached": False}
+        finally:
+            self._inflight.pop(service, None)
+
+    async def check_many(self, services: list[str]) -> list[dict[str, Any]]:
+        return await asyncio.gather(*(self.check(s) for s in dict.fromkeys(services)))
+
+
+async def serve_local_standin(services: dict[str, tuple[int, float]]) -> tuple[asyncio.Server, int]:
+    """Tiny keep-alive HTTP/1.1 server: GET /health/<name> -> (status, delay_s)."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while request := await reader.readuntil(b"\r\n\r\n"):
+                path = request.split(b" ", 2)[1].decode()
+                status, delay = services.get(path.rsplit("/", 1)[-1], (404, 0.0))
+                await asyncio.sleep(delay)
+                body = json.dumps({"status": status}).encode()
+                writer.write(b"HTTP/1.1 %d X\r\nContent-Type: application/json\r\n"
+                             b"Content-Length: %d\r\n\r\n%s" % (status, len(body), body))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass  # client went away, or the stand-in is shutting down
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+prober: HealthProber | None = None
+
+
+@tool("check_health", "Check one service's health", {"service": str})
+async def check_health(args: dict[str, Any]) -> dict[str, Any]:
+    result = await prober.check(args["service"])
+    return {"content": [{"type": "text", "text": json.dumps(result)}]}
+
+
+@tool("check_health_batch", "Check many services' health in one call", {
+    "type": "object",
+    "properties": {
+        "services": {"type": "array", "items": {"type": "string"}, "description": "Service names"},
+    },
+    "required": ["services"],
+})
+async def check_health_batch(args: dict[str, Any]) -> dict[str, Any]:
+    results = await prober.check_many(args.get("services", []))
+    unhealthy = [r["service"] for r in results if r["status"] != "healthy"]
+    summary = f"{len(results) - len(unhealthy)}/{len(results)} healthy"
+    if unhealthy:
+        summary += f"; attention: {', '.join(unhealthy)}"
+    return {"content": [{"type": "text", "text": summary + "\n" + json.dumps(results)}]}
+
+
+async def main():
+    global prober
+    server = None
+    if os.environ.get("HEALTH_ENDPOINTS"):
+        endpoints = json.loads(os.environ["HEALTH_ENDPOINTS"])  # {"api": "https://.../health"}
+    else:
+        canned = {f"svc-{i:02d}": (200, 0.05) for i in range(38)}
+        canned.update({"payments": (503, 0.05), "search": (200, 5.0)})  # one down, one hung
+        server, port = await serve_local_standin(canned)
+        endpoints = {name: f"http://127.0.0.1:{port}/health/{name}" for name in canned}
+    prober = HealthProber(endpoints, ttl_s=10, timeout_s=1.5)
+
+    app_tools = create_sdk_mcp_server(
+        name="app-services",
+        version="1.0.0",
+        tools=[check_health, check_health_batch],
+    )
+    batch_tool = "mcp__app-services__check_health_batch"
+
+    options = ClaudeAgentOptions(
+        system_prompt="You are a DevOps orchestrator.",
+        mcp_servers={"app-services": app_tools},
+        agents={
+            "deployer": AgentDefinition(
+                description="Handles deployments and rollbacks",
+                prompt="You deploy applications. Check all services in one check_health_batch call.",
+                tools=["Bash", "Read", batch_tool],
+                model="sonnet",
+            ),
+            "monitor": AgentDefinition(
+                description="System monitoring and alerting",
+                prompt="Check service health with a single check_health_batch call.",
+                tools=["Read", batch_tool],
+                model="haiku",
+            ),
+        },
+        allowed_tools=["Task", "Read", batch_tool, "mcp__app-services__check_health"],
+        permission_mode="bypassPermissions",
+    )
+
+    try:
+        services = ", ".join(endpoints)
+        async for msg in query(
+            prompt=f"Have the monitor and the deployer both verify these services: {services}",
+            options=options,
+        ):
+            if isinstance(msg, ResultMessage):
+                print(msg.result if msg.subtype == "success" else f"Error: {msg.subtype}")
+    finally:
+        s = prober.stats
+        print(f"probes={s.probes} cache_hits={s.cache_hits} coalesced={s.coalesced} timeouts={s.timeouts}")
+        await prober.aclose()
+        if server:
+            server.close()
+            await server.wait_closed()
+
+asyncio.run(main())
@@ -0,0 +1,151 @@
+"""Opt-in result caching for @tool handlers in SDK MCP servers (Python).
+
+Wrap any SdkMcpTool with ToolResultCache.wrap() before passing it to
+create_sdk_mcp_server(). Calls are keyed by tool name plus the canonicalized
+args dict (sorted keys, compact JSON), stored in a size-bounded LRU with a
+per-tool TTL. Concurrent identical calls share one in-flight execution
+(single-flight), and error results are never cached.
+"""
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Any
+from claude_agent_sdk import (
+    query, tool, create_sdk_mcp_server, ClaudeAgentOptions,
+    ResultMessage, SdkMcpTool,
+)
+
+
+@dataclass
+class CacheCounters:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0  # calls that waited on an identical in-flight call
+    evictions: int = 0
+    expirations: int = 0
+
+
+class ToolResultCache:
+    """LRU + TTL cache shared by any number of wrapped tools."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str], tuple[float, dict[str, Any]]] = OrderedDict()
+        self._inflight: dict[tuple[str, str], asyncio.Future] = {}
+        self.counters: dict[str, CacheCounters] = {}
+
+    @staticmethod
+    def make_key(tool_name: str, args: dict[str, Any]) -> tuple[str, str]:
+        return tool_name, json.dumps(args, sort_keys=True, separators=(",", ":"), default=str)
+
+    def _get(self, key: tuple[str, str], stats: CacheCounters) -> dict[str, Any] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            stats.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _put(self, key: tuple[str, str], value: dict[str, Any], ttl_s: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl_s, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            (evicted_tool, _), _ = self._entries.popitem(last=False)
+            self.counters.setdefault(evicted_tool, CacheCounters()).evictions += 1
+
+    def invalidate(self, tool_name: str | None = None) -> None:
+        """Drop all entries, or only those belonging to one tool."""
+        for key in [k for k in self._entries if tool_name in (None, k[0])]:
+            del self._entries[key]
+
+    def wrap(self, sdk_tool: SdkMcpTool[Any], ttl_s: float = 300.0) -> SdkMcpTool[Any]:
+        """Return a copy of sdk_tool whose handler goes through this cache."""
+        handler = sdk_tool.handler
+        stats = self.counters.setdefault(sdk_tool.name, CacheCounters())
+
+        async def cached_handler(args: dict[str, Any]) -> dict[str, Any]:
+            key = self.make_key(sdk_tool.name, args)
+            if (hit := self._get(key, stats)) is not None:
+                stats.hits += 1
+                return hit
+            if (pending := self._inflight.get(key)) is not None:
+                stats.coalesced += 1
+                return await asyncio.shield(pending)
+
+            stats.misses += 1
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[key] = future
+            try:
+                result = await handler(args)
+            except BaseException as e:
+                future.set_exception(e)
+                future.exception()  # mark retrieved when nobody else was waiting
+                raise
+            else:
+                if not result.get("is_error"):
+                    self._put(key, result, ttl_s)
+                future.set_result(result)
+                return result
+            finally:
+                self._inflight.pop(key, None)
+
+        return replace(sdk_tool, handler=cached_handler)
+
+    def summary(self) -> str:
+        return "\n".join(
+            f"{name}: hits={c.hits} misses={c.misses} coalesced={c.coalesced} "
+            f"evictions={c.evictions} expirations={c.expirations}"
+            for name, c in self.counters.items()
+        )
+
+
+@tool("search_docs", "Search documentation", {
+    "query": {"type": "string", "description": "Search query"},
+    "limit": {"type": "integer", "description": "Max results", "default": 5}
+})
+async def search_docs(args: dict[str, Any]) -> dict[str, Any]:
+    await asyncio.sleep(1.5)  # stand-in for a slow search backend
+    q = args.get("query", "")
+    limit = args.get("limit", 5)
+    results = [f"Result {i}: {q} match" for i in range(1, min(limit + 1, 4))]
+    return {"content": [{"type": "text", "text": "\n".join(results)}]}
+
+@tool("get_doc", "Get a specific document", {
+    "doc_id": {"type": "string", "description": "Document ID"}
+})
+async def get_doc(args: dict[str, Any]) -> dict[str, Any]:
+    await asyncio.sleep(0.5)
+    doc_id = args.get("doc_id", "")
+    return {"content": [{"type": "text", "text": f"Document {doc_id}: Lorem ipsum..."}]}
+
+
+async def main():
+    cache = ToolResultCache(max_entries=512)
+    server = create_sdk_mcp_server(
+        name="docs",
+        version="1.0.0",
+        tools=[
+            cache.wrap(search_docs, ttl_s=60),    # results change as docs are edited
+            cache.wrap(get_doc, ttl_s=15 * 60),   # documents are stable
+        ],
+    )
+
+    options = ClaudeAgentOptions(
+        mcp_servers={"docs": server},
+        system_prompt="You help users search documentation.",
+        permission_mode="bypassPermissions",
+    )
+
+    async for msg in query(prompt="Search for authentication docs", options=options):
+        if isinstance(msg, ResultMessage) and msg.subtype == "success":
+            print(msg.result)
+
+    print(cache.summary())
+
+asyncio.run(main())
@@ -0,0 +1,272 @@
+"""Warm ClaudeSDKClient pool (Python).
+
+Every ClaudeSDKClient pays for a CLI subprocess spawn, CLI boot and MCP server
+registration before its first token. This pool keeps N clients connected and
+hands out leases per job:
+
+- A client is tagged with the tenant that last used it. A later lease for the
+  same tenant may reuse it (conversation context is kept); a lease for a
+  different tenant never sees it — the client is replaced, since a session's
+  context cannot be cleared in place.
+- Clients are health-checked with a control round trip (get_mcp_status) and
+  recycled after max_age_s or max_uses. Replacements are spawned in the
+  background so the spawn cost stays off the request path where possible.
+  A failed spawn is retried with backoff (respawn_attempts); only then is
+  the slot given up.
+- lease() waits at most lease_timeout_s for a free client, and raises at once
+  when every slot has been given up instead of waiting forever.
+- Lease wait time and spawn time are recorded in PoolMetrics.
+"""
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from claude_agent_sdk import (
+    ClaudeSDKClient, ClaudeAgentOptions,
+    ResultMessage,
+)
+
+
+@dataclass
+class PoolMetrics:
+    spawns: int = 0
+    spawn_failures: int = 0
+    recycled: int = 0
+    health_failures: int = 0
+    lost_slots: int = 0  # respawn attempts exhausted
+    leases: int = 0
+    spawn_times: list[float] = field(default_factory=list)
+    wait_times: list[float] = field(default_factory=list)
+
+    @staticmethod
+    def _avg(values: list[float]) -> float:
+        return sum(values) / len(values) if values else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"leases={self.leases} spawns={self.spawns} (failed {self.spawn_failures}) "
+            f"recycled={self.recycled} unhealthy={self.health_failures} lost={self.lost_slots} | "
+            f"avg spawn {self._avg(self.spawn_times):.2f}s "
+            f"avg wait {self._avg(self.wait_times) * 1000:.1f}ms "
+            f"max wait {max(self.wait_times, default=0.0) * 1000:.1f}ms"
+        )
+
+
+@dataclass
+class PooledClient:
+    client: ClaudeSDKClient
+    created_at: float = field(default_factory=time.monotonic)
+    uses: int = 0
+    tenant: str | None = None
+    broken: bool = False
+
+
+class ClientPool:
+    """Keep `size` connected ClaudeSDKClients warm and lease them per job."""
+
+    def __init__(
+        self,
+        options: ClaudeAgentOptions,
+        size: int = 4,
+        max_age_s: float = 15 * 60,
+        max_uses: int = 50,
+        health_timeout_s: float = 5.0,
+        lease_timeout_s: float | None = 60.0,
+        respawn_attempts: int = 3,
+        respawn_backoff_s: float = 1.0,
+    ):
+        self.options = options
+        self.size = size
+        self.max_age_s = max_age_s
+        self.max_uses = max_uses
+        self.health_timeout_s = health_timeout_s
+        self.lease_timeout_s = lease_timeout_s
+        self.respawn_attempts = respawn_attempts
+        self.respawn_backoff_s = respawn_backoff_s
+        self.metrics = PoolMetrics()
+        self._live = 0  # slots with a client, idle or leased, or a respawn in progress
+        self._idle: list[PooledClient] = []
+        self._cond = asyncio.Condition()
+        self._background: set[asyncio.Task] = set()
+        self._closed = False
+
+    async def start(self) -> None:
+        """Connect all clients concurrently."""
+        spawned = await asyncio.gather(
+            *(self._spawn() for _ in range(self.size)), return_exceptions=True
+        )
+        async with self._cond:
+            self._idle.extend(p for p in spawned if isinstance(p, PooledClient))
+            self._cond.notify_all()
+        if not self._idle:
+            raise RuntimeError("ClientPool could not connect any client")
+        self._live = self.size
+        for _ in range(self.size - len(self._idle)):
+            self._replace_in_background(None)  # retry the slots that failed to connect
+
+    async def close(self) -> None:
+        self._closed = True
+        for task in list(self._background):
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+        async with self._cond:
+            idle, self._idle = self._idle, []
+        await asyncio.gather(*(self._discard(p) for p in idle), return_exceptions=True)
+
+    async def __aenter__(self) -> "ClientPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def _spawn(self) -> PooledClient:
+        start = time.monotonic()
+        client = ClaudeSDKClient(options=self.options)
+        try:
+            await client.connect()
+        except Exception:
+            self.metrics.spawn_failures += 1
+            raise
+        self.metrics.spawns += 1
+        self.metrics.spawn_times.append(time.monotonic() - start)
+        return PooledClient(client)
+
+    async def _discard(self, pooled: PooledClient) -> None:
+        try:
+            await pooled.client.disconnect()
+        except Exception:
+            pass
+
+    def _expired(self, pooled: PooledClient) -> bool:
+        return (
+            pooled.broken
+            or pooled.uses >= self.max_uses
+            or time.monotonic() - pooled.created_at >= self.max_age_s
+        )
+
+    async def _healthy(self, pooled: PooledClient) -> bool:
+        try:
+            await asyncio.wait_for(pooled.client.get_mcp_status(), self.health_timeout_s)
+            return True
+        except Exception:
+            self.metrics.health_failures += 1
+            return False
+
+    def _replace_in_background(self, pooled: PooledClient | None) -> None:
+        """Discard pooled (if any) and fill its slot with a fresh client, retrying failed spawns."""
+        async def replace() -> None:
+            if pooled is not None:
+                await self._discard(pooled)
+                if self._closed:
+                    return
+                self.metrics.recycled += 1
+            for attempt in range(self.respawn_attempts):
+                if self._closed:
+                    return
+                try:
+                    fresh = await self._spawn()
+                    break
+                except Exception:
+                    await asyncio.sleep(self.respawn_backoff_s * 2 ** attempt)
+            else:
+                async with self._cond:
+                    self._live -= 1  # slot given up; waiting leases re-check whether any are left
+                    self.metrics.lost_slots += 1
+                    self._cond.notify_all()
+                return
+            async with self._cond:
+                if self._closed:
+                    await self._discard(fresh)
+                    return
+                self._idle.append(fresh)
+                self._cond.notify_all()
+
+        task = asyncio.create_task(replace())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def _pick(self, tenant: str | None) -> PooledClient | None:
+        # Prefer a client this tenant already warmed, then a fresh one,
+        # then any other tenant's client (replaced before use).
+        for wanted in (lambda p: p.tenant == tenant, lambda p: p.tenant is None, lambda p: True):
+            for i, pooled in enumerate(self._idle):
+                if wanted(pooled):
+                    return self._idle.pop(i)
+        return None
+
+    @asynccontextmanager
+    async def lease(self, tenant: str | None = None,
+                    timeout_s: float | None = None) -> AsyncIterator[ClaudeSDKClient]:
+        """Lease a connected client for one job; waits at most timeout_s (default lease_timeout_s)."""
+        start = time.monotonic()
+        timeout_s = timeout_s if timeout_s is not None else self.lease_timeout_s
+        async with self._cond:
+            while (pooled := self._pick(tenant)) is None:
+                if self._closed:
+                    raise RuntimeError("ClientPool is closed")
+                if self._live <= 0:
+                    raise RuntimeError("ClientPool has no clients left: every respawn failed")
+                remaining = None if timeout_s is None else timeout_s - (time.monotonic() - start)
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"No pooled client became free within {timeout_s:g}s")
+                try:
+                    await asyncio.wait_for(self._cond.wait(), remaining)
+                except asyncio.TimeoutError:
+                    raise TimeoutError(f"No pooled client became free within {timeout_s:g}s") from None
+
+        if pooled.tenant not in (None, tenant) or self._expired(pooled) \
+                or not await self._healthy(pooled):
+            self.metrics.recycled += 1
+            await self._discard(pooled)
+            try:
+                pooled = await self._spawn()
+            except Exception:
+                self._replace_in_background(None)  # keep retrying the slot off the request path
+                raise
+
+        self.metrics.wait_times.append(time.monotonic() - start)
+        self.metrics.leases += 1
+        pooled.tenant = tenant
+        pooled.uses += 1
+        try:
+            yield pooled.client
+        except BaseException:
+            pooled.broken = True  # stream state unknown after a failed job
+            raise
+        finally:
+            if self._closed or self._expired(pooled):
+                self._replace_in_background(pooled)
+            else:
+                async with self._cond:
+                    self._idle.append(pooled)
+                    self._cond.notify_all()
+
+
+async def handle_job(pool: ClientPool, tenant: str, prompt: str) -> str:
+    answer = ""
+    async with pool.lease(tenant) as client:
+        await client.query(prompt)
+        async for msg in client.receive_response():
+            if isinstance(msg, ResultMessage):
+                answer = (msg.result or "") if msg.subtype == "success" else f"Error: {msg.subtype}"
+    return answer
+
+
+async def main():
+    options = ClaudeAgentOptions(
+        permission_mode="bypassPermissions",
+        max_turns=3,
+    )
+
+    async with ClientPool(options, size=3, max_uses=20) as pool:
+        jobs = [
+            handle_job(pool, tenant=f"tenant-{i % 2}", prompt=f"Give me fun fact #{i}")
+            for i in range(6)
+        ]
+        for answer in await asyncio.gather(*jobs):
+            print(answer[:120])
+        print(pool.metrics.summary())
+
+asyncio.run(main())
@@ -0,0 +1,195 @@
+"""Context-growth monitor with automatic summarize-and-branch (Python).
+
+session_management.py resumes and forks by hand, and nothing tells it when a
+session has grown too large. Each turn re-sends the whole conversation, so a
+long session gets slower and more expensive per turn as it grows.
+ContextMonitor tracks the size of every main-thread API call from usage:
+
+    context = input_tokens + cache_read_input_tokens + cache_creation_input_tokens
+
+Once the latest turn passes threshold_tokens, the monitor does two things:
+
+1. It asks a fork of the session for a summary (resume + fork_session=True),
+   so the summarizing turn never lands in the session being retired.
+2. It starts a fresh session whose first prompt carries that summary.
+
+Every session in the chain is tagged with tag_session() as
+"<prefix>:<generation>:<parent id>". The lineage stays visible in
+list_sessions() and the CLI, and `lineage` holds the same chain in memory.
+"""
+import asyncio
+import dataclasses
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from claude_agent_sdk import (
+    query, tag_session, ClaudeAgentOptions,
+    AssistantMessage, ResultMessage,
+)
+
+SUMMARY_PROMPT = (
+    "Summarize this session so it can be continued in a fresh one: the goal, decisions made and why, "
+    "files touched, the current state, and open next steps. Be specific and skip pleasantries."
+)
+CARRY_OVER = "Context carried over from an earlier session:\n\n{summary}\n\n---\n\n{prompt}"
+
+
+@dataclass
+class TurnUsage:
+    input_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_creation_tokens: int = 0
+    output_tokens: int = 0
+
+    @property
+    def context_tokens(self) -> int:
+        return self.input_tokens + self.cache_read_tokens + self.cache_creation_tokens
+
+    @classmethod
+    def from_usage(cls, usage: dict | None) -> "TurnUsage":
+        u = usage or {}
+        return cls(
+            u.get("input_tokens", 0),
+            u.get("cache_read_input_tokens", 0),
+            u.get("cache_creation_input_tokens", 0),
+            u.get("output_tokens", 0),
+        )
+
+
+@dataclass
+class Branch:
+    session_id: str
+    generation: int
+    parent_id: str | None = None
+    reason: str = "start"
+    summary: str | None = None
+    turns: list[TurnUsage] = field(default_factory=list)
+
+    @property
+    def context_tokens(self) -> int:
+        return self.turns[-1].context_tokens if self.turns else 0
+
+
+def log_branch(old: Branch, summary: str) -> None:
+    print(f"[context] generation {old.generation} ({old.session_id}) at {old.context_tokens:,} tokens "
+          f"after {len(old.turns)} turns → fresh session with a {len(summary):,}-char summary")
+
+
+class ContextMonitor:
+    def __init__(
+        self,
+        options: ClaudeAgentOptions,
+        threshold_tokens: int = 120_000,
+        tag_prefix: str = "ctx",
+        summary_prompt: str = SUMMARY_PROMPT,
+        on_branch: Callable[[Branch, str], None] = log_branch,
+    ):
+        self.options = options
+        self.threshold_tokens = threshold_tokens
+        self.tag_prefix = tag_prefix
+        self.summary_prompt = summary_prompt
+        self.on_branch = on_branch
+        self.lineage: list[Branch] = []
+        self._carry: tuple[Branch, str] | None = None  # (retired branch, summary) awaiting a new session
+
+    @property
+    def current(self) -> Branch | None:
+        return self.lineage[-1] if self.lineage and self._carry is None else None
+
+    @property
+    def growth_per_turn(self) -> float:
+        """Average context added per turn in the current session."""
+        turns = self.current.turns if self.current else []
+        if len(turns) < 2:
+            return 0.0
+        return (turns[-1].context_tokens - turns[0].context_tokens) / (len(turns) - 1)
+
+    def _tag(self, session_id: str, tag: str) -> None:
+        try:
+            tag_session(session_id, tag, directory=str(self.options.cwd) if self.options.cwd else None)
+        except (ValueError, FileNotFoundError) as e:
+            print(f"[context] could not tag {session_id}: {e}")  # lineage is metadata; keep going
+
+    async def ask(self, prompt: str) -> ResultMessage | None:
+        """Send one prompt; past the threshold, the next prompt goes to a fresh, summarized session."""
+        branch = self.current
+        if self._carry is not None:
+            prompt = CARRY_OVER.format(summary=self._carry[1], prompt=prompt)
+        options = dataclasses.replace(self.options, resume=branch.session_id if branch else None)
+
+        turns: list[TurnUsage] = []
+        seen: set[str] = set()
+        result = None
+        async for msg in query(prompt=prompt, options=options):
+            if isinstance(msg, AssistantMessage) and msg.parent_tool_use_id is None:
+                # one API call can stream as several messages sharing an id; subagents have their own context
+                if msg.message_id and msg.message_id in seen:
+                    continue
+                if msg.message_id:
+                    seen.add(msg.message_id)
+                turns.append(TurnUsage.from_usage(msg.usage))
+            elif isinstance(msg, ResultMessage):
+                result = msg
+        if result is None:
+            return None
+
+        if branch is None:
+            parent, summary = self._carry if self._carry else (None, None)
+            branch = Branch(
+                session_id=result.session_id,
+                generation=parent.generation + 1 if parent else 0,
+                parent_id=parent.session_id if parent else None,
+                reason=f"context over {self.threshold_tokens:,} tokens" if parent else "start",
+                summary=summary,
+            )
+            self.lineage.append(branch)
+            self._carry = None
+            self._tag(branch.session_id, f"{self.tag_prefix}:{branch.generation}:{branch.parent_id or 'root'}")
+        branch.turns.extend(turns)
+
+        if branch.context_tokens > self.threshold_tokens:
+            summary = await self.summarize(branch)
+            if summary:
+                self._carry = (branch, summary)
+                self.on_branch(branch, summary)
+        return result
+
+    async def summarize(self, branch: Branch) -> str | None:
+        """Summarize a session from a throwaway fork, leaving the original untouched."""
+        options = dataclasses.replace(
+            self.options, resume=branch.session_id, fork_session=True, max_turns=1, tools=[],
+        )
+        summary = None
+        async for msg in query(prompt=self.summary_prompt, options=options):
+            if isinstance(msg, ResultMessage) and msg.subtype == "success" and msg.result:
+                summary = msg.result
+                self._tag(msg.session_id, f"{self.tag_prefix}:summary:{branch.session_id}")
+        return summary
+
+
+async def main():
+    options = ClaudeAgentOptions(
+        allowed_tools=["Read", "Glob", "Grep"],
+        permission_mode="bypassPermissions",
+        max_turns=10,
+    )
+    monitor = ContextMonitor(options, threshold_tokens=60_000)
+
+    for prompt in [
+        "Read the README and the main entry point, then describe the architecture",
+        "List every module and what it depends on",
+        "Which modules have no tests? Read them and explain what they do",
+        "Propose a test plan for the three riskiest modules",
+    ]:
+        result = await monitor.ask(prompt)
+        if result and result.subtype == "success":
+            print(f"{(result.result or '')[:150]}")
+        if monitor.current:
+            print(f"  context {monitor.current.context_tokens:,} tokens, "
+                  f"+{monitor.growth_per_turn:,.0f}/turn")
+
+    print("Lineage:")
+    for b in monitor.lineage:
+        print(f"  gen {b.generation}: {b.session_id} (parent {b.parent_id or '-'}, {b.reason}), "
+              f"{len(b.turns)} turns, peak {max((t.context_tokens for t in b.turns), default=0):,} tokens")
+
+asyncio.run(main())
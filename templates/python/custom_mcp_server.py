@@ -1,7 +1,7 @@
 """In-process MCP server with Claude Agent SDK."""
 import asyncio
 from typing import Any
-from claude_agent_sdk import query, tool, create_sdk_mcp_server, ClaudeAgentOptions
+from claude_agent_sdk import query, tool, create_sdk_mcp_server, ClaudeAgentOptions, ResultMessage
 
 @tool("search_docs", "Search documentation", {
     "query": {"type": "string", "description": "Search query"},
@@ -34,7 +34,6 @@ async def main():
     )
 
     async for msg in query(prompt="Search for authentication docs", options=options):
-        from claude_agent_sdk import ResultMessage
         if isinstance(msg, ResultMessage) and msg.subtype == "success":
             print(msg.result)
 
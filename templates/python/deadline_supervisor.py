@@ -0,0 +1,215 @@
+"""Deadline-driven interrupts with checkpoint rewind for ClaudeSDKClient (Python).
+
+with_interrupt() in client_conversation.py interrupts after a fixed number of
+AssistantMessages, which says nothing about how long the run has taken.
+DeadlineSupervisor enforces real limits on each attempt:
+
+- wall clock for the whole attempt;
+- output tokens, summed from per-message usage;
+- per-tool-call duration, from the ToolUseBlock to its ToolResultBlock, with
+  per-tool overrides (e.g. Bash 30s, everything else 60s).
+
+A watchdog task sleeps until the earliest pending deadline instead of
+polling. When one passes, the supervisor calls interrupt(). If the client
+has enable_file_checkpointing on, it rewind_files() to the last good
+UserMessage: the latest one seen before the violation with no failed tool
+results, so completed steps survive and half-finished edits don't. It then
+retries with a narrowed prompt that names what went wrong.
+
+UserMessage uuids are only streamed with extra_args={"replay-user-messages": None}.
+"""
+import asyncio
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from claude_agent_sdk import (
+    ClaudeSDKClient, ClaudeAgentOptions,
+    AssistantMessage, UserMessage, ResultMessage, ToolUseBlock, ToolResultBlock,
+)
+
+
+@dataclass
+class Deadlines:
+    wall_s: float | None = None
+    max_output_tokens: int | None = None
+    tool_s: dict[str, float] = field(default_factory=dict)  # per tool name
+    default_tool_s: float | None = None
+
+    def for_tool(self, name: str) -> float | None:
+        return self.tool_s.get(name, self.default_tool_s)
+
+
+@dataclass
+class Violation:
+    kind: str  # wall | tokens | tool
+    detail: str
+    at_s: float
+    tool_name: str | None = None
+
+
+@dataclass
+class Attempt:
+    prompt: str
+    duration_s: float = 0.0
+    output_tokens: int = 0
+    violation: Violation | None = None
+    rewound_to: str | None = None
+    result: ResultMessage | None = None
+
+
+def narrow_prompt(original: str, violation: Violation, attempt: int, rewound_to: str | None = None) -> str:
+    """Default retry prompt: same task, smaller steps, and what to avoid. Only claims a
+    restore when rewound_to says rewind_files() actually ran."""
+    hint = {
+        "wall": "Work in smaller steps and stop after the first meaningful, complete change.",
+        "tokens": "Be brief: skip explanations and only make the changes that are needed.",
+        "tool": f"Avoid long-running {violation.tool_name} calls; scope each command to a single file or test.",
+    }[violation.kind]
+    if rewound_to:
+        files = "Files were restored to the last completed step, so continue from the current state."
+    else:
+        files = ("Files were not restored: edits it made before it was stopped may still be in place, "
+                 "so check the current state before continuing.")
+    return f"{original}\n\nA previous attempt was stopped ({violation.detail}). {files} {hint}"
+
+
+class DeadlineSupervisor:
+    def __init__(
+        self,
+        client: ClaudeSDKClient,
+        deadlines: Deadlines,
+        max_retries: int = 2,
+        narrow: Callable[[str, Violation, int, str | None], str] = narrow_prompt,
+    ):
+        self.client = client
+        self.deadlines = deadlines
+        self.max_retries = max_retries
+        self.narrow = narrow
+        self.attempts: list[Attempt] = []
+
+    @property
+    def can_rewind(self) -> bool:
+        return bool(self.client.options and self.client.options.enable_file_checkpointing)
+
+    async def run(self, prompt: str) -> ResultMessage | None:
+        original = prompt
+        for n in range(self.max_retries + 1):
+            attempt = await self._attempt(prompt)
+            self.attempts.append(attempt)
+            if attempt.violation is None:
+                return attempt.result
+            v = attempt.violation
+            rewound = f", rewound to {attempt.rewound_to}" if attempt.rewound_to else ""
+            print(f"[supervisor] attempt {n + 1} stopped at {v.at_s:.1f}s: {v.detail}{rewound}")
+            prompt = self.narrow(original, v, n + 1, attempt.rewound_to)
+        return None
+
+    async def _attempt(self, prompt: str) -> Attempt:
+        attempt = Attempt(prompt)
+        start = time.monotonic()
+        open_tools: dict[str, tuple[str, float]] = {}  # tool_use_id -> (name, started)
+        seen_messages: set[str] = set()
+        last_good: str | None = None
+        changed = asyncio.Event()
+        finished = False
+
+        async def stop(violation: Violation) -> None:
+            if attempt.violation is None:
+                attempt.violation = violation
+                await self.client.interrupt()
+
+        def next_deadline() -> tuple[float, Violation] | None:
+            candidates = []
+            if self.deadlines.wall_s is not None:
+                candidates.append((start + self.deadlines.wall_s,
+                                   Violation("wall", f"wall clock over {self.deadlines.wall_s:g}s", 0.0)))
+            for name, started in open_tools.values():
+                limit = self.deadlines.for_tool(name)
+                if limit is not None:
+                    candidates.append((started + limit,
+                                       Violation("tool", f"{name} call over {limit:g}s", 0.0, name)))
+            return min(candidates, key=lambda c: c[0], default=None)
+
+        async def watchdog() -> None:
+            while attempt.violation is None and not finished:
+                changed.clear()  # before reading state, so no update slips in between
+                pending = next_deadline()
+                timeout = None if pending is None else max(pending[0] - time.monotonic(), 0.0)
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pending = next_deadline()  # re-check: the tool may have finished meanwhile
+                    if pending and pending[0] <= time.monotonic():
+                        pending[1].at_s = time.monotonic() - start
+                        await stop(pending[1])
+
+        await self.client.query(prompt)
+        dog = asyncio.create_task(watchdog())
+        try:
+            async for msg in self.client.receive_response():
+                if isinstance(msg, AssistantMessage):
+                    if msg.message_id is None or msg.message_id not in seen_messages:
+                        # one API response may arrive as several messages sharing an id
+                        if msg.message_id:
+                            seen_messages.add(msg.message_id)
+                        attempt.output_tokens += (msg.usage or {}).get("output_tokens", 0)
+                    for block in msg.content:
+                        if isinstance(block, ToolUseBlock):
+                            open_tools[block.id] = (block.name, time.monotonic())
+                            changed.set()
+                    limit = self.deadlines.max_output_tokens
+                    if limit is not None and attempt.output_tokens > limit:
+                        await stop(Violation("tokens", f"{attempt.output_tokens} output tokens > {limit}",
+                                             time.monotonic() - start))
+                elif isinstance(msg, UserMessage):
+                    results = [b for b in msg.content if isinstance(b, ToolResultBlock)] \
+                        if isinstance(msg.content, list) else []
+                    for block in results:
+                        open_tools.pop(block.tool_use_id, None)
+                        changed.set()
+                    if msg.uuid and attempt.violation is None and not any(b.is_error for b in results):
+                        last_good = msg.uuid
+                elif isinstance(msg, ResultMessage):
+                    attempt.result = msg
+        finally:
+            # End the loop explicitly as well: on 3.11 wait_for() can swallow a cancel
+            finished = True
+            changed.set()
+            dog.cancel()
+            await asyncio.gather(dog, return_exceptions=True)
+        attempt.duration_s = time.monotonic() - start
+
+        if attempt.violation and self.can_rewind and last_good:
+            await self.client.rewind_files(last_good)
+            attempt.rewound_to = last_good
+        return attempt
+
+
+async def main():
+    options = ClaudeAgentOptions(
+        allowed_tools=["Read", "Edit", "Glob", "Grep", "Bash"],
+        permission_mode="acceptEdits",
+        enable_file_checkpointing=True,
+        extra_args={"replay-user-messages": None},  # UserMessage.uuid for rewind_files()
+    )
+    deadlines = Deadlines(
+        wall_s=180,
+        max_output_tokens=30_000,
+        tool_s={"Bash": 30},
+        default_tool_s=60,
+    )
+
+    async with ClaudeSDKClient(options=options) as client:
+        supervisor = DeadlineSupervisor(client, deadlines, max_retries=2)
+        result = await supervisor.run("Add type hints to every function in src/ and make the tests pass")
+
+        if result and result.subtype == "success":
+            print(f"Done: {(result.result or '')[:300]}")
+        else:
+            print("Gave up after retries")
+        for i, a in enumerate(supervisor.attempts, 1):
+            status = a.violation.kind if a.violation else (a.result.subtype if a.result else "no result")
+            print(f"  attempt {i}: {status} in {a.duration_s:.1f}s, {a.output_tokens} output tokens"
+                  + (f", rewound to {a.rewound_to}" if a.rewound_to else ""))
+
+asyncio.run(main())
@@ -0,0 +1,309 @@
+"""Indexed full-text backend for the search_docs / get_doc tools (Python).
+
+Replaces the fabricated results in custom_mcp_server.py with a BM25-ranked
+inverted index over a directory of documents, stored on disk and opened with
+mmap so startup only reads a small manifest:
+
+    index_dir/
+      manifest.json   doc metadata: id, mtime, size, token count, store offset
+      lexicon.bin     sorted fixed-width records (term_off, term_len, post_off, df)
+      terms.bin       term bytes referenced by lexicon.bin
+      postings.bin    (doc_num, tf) pairs, grouped by term
+      store.bin       concatenated UTF-8 document bodies
+
+refresh() is incremental: only files whose mtime/size changed are re-read and
+re-tokenized. Postings and bodies of unchanged documents are carried over from
+the previous index without touching the source files. get_doc() slices the
+body out of store.bin, so serving a document never re-reads the source file.
+"""
+import asyncio
+import bisect
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import struct
+from collections import Counter
+from pathlib import Path
+from typing import Any
+from claude_agent_sdk import query, tool, create_sdk_mcp_server, ClaudeAgentOptions, ResultMessage
+
+_TOKEN = re.compile(r"[^\W_]+")
+_LEX = struct.Struct("<QIQI")   # term_off, term_len, post_off, df
+_POST = struct.Struct("<II")    # doc_num, term frequency
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def _map(path: Path) -> mmap.mmap | None:
+    if not path.exists() or path.stat().st_size == 0:
+        return None
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class DocIndex:
+    """BM25 index over docs_dir, persisted in index_dir."""
+
+    def __init__(
+        self,
+        docs_dir: str | Path,
+        index_dir: str | Path,
+        patterns: tuple[str, ...] = ("*.md", "*.txt", "*.rst"),
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        self.docs_dir = Path(docs_dir)
+        self.index_dir = Path(index_dir)
+        self.patterns = patterns
+        self.k1, self.b = k1, b
+        self.docs: list[dict[str, Any]] = []
+        self._by_id: dict[str, int] = {}
+        self._avgdl = 0.0
+        self._lexicon = self._terms = self._postings = self._store = None
+
+    # -- opening -----------------------------------------------------------
+
+    def open(self) -> None:
+        """Map an existing index; cheap enough to call at every startup."""
+        self.close()
+        manifest = self.index_dir / "manifest.json"
+        if not manifest.exists():
+            self.docs, self._by_id, self._avgdl = [], {}, 0.0
+            return
+        self.docs = json.loads(manifest.read_text())["docs"]
+        self._by_id = {d["id"]: i for i, d in enumerate(self.docs)}
+        total = sum(d["ntokens"] for d in self.docs)
+        self._avgdl = total / len(self.docs) if self.docs else 0.0
+        self._lexicon = _map(self.index_dir / "lexicon.bin")
+        self._terms = _map(self.index_dir / "terms.bin")
+        self._postings = _map(self.index_dir / "postings.bin")
+        self._store = _map(self.index_dir / "store.bin")
+
+    def close(self) -> None:
+        for m in (self._lexicon, self._terms, self._postings, self._store):
+            if m is not None:
+                m.close()
+        self._lexicon = self._terms = self._postings = self._store = None
+
+    # -- lexicon access ----------------------------------------------------
+
+    def _num_terms(self) -> int:
+        return len(self._lexicon) // _LEX.size if self._lexicon else 0
+
+    def _entry(self, i: int) -> tuple[bytes, int, int]:
+        term_off, term_len, post_off, df = _LEX.unpack_from(self._lexicon, i * _LEX.size)
+        return self._terms[term_off:term_off + term_len], post_off, df
+
+    def _lookup(self, term: str) -> tuple[int, int] | None:
+        """Binary-search the mapped lexicon; returns (post_off, df)."""
+        key = term.encode()
+        lo, hi = 0, self._num_terms()
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_term, post_off, df = self._entry(mid)
+            if mid_term == key:
+                return post_off, df
+            if mid_term < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def _iter_postings(self, post_off: int, df: int):
+        for i in range(df):
+            yield _POST.unpack_from(self._postings, post_off + i * _POST.size)
+
+    # -- incremental build -------------------------------------------------
+
+    def _scan(self) -> dict[str, os.stat_result]:
+        found = {}
+        for pattern in self.patterns:
+            for path in self.docs_dir.rglob(pattern):
+                if path.is_file():
+                    found[path.relative_to(self.docs_dir).as_posix()] = path.stat()
+        return found
+
+    def refresh(self) -> dict[str, int]:
+        """Bring the index up to date with docs_dir, re-reading changed files only."""
+        self.open()
+        on_disk = self._scan()
+        kept: dict[int, int] = {}  # old doc_num -> new doc_num
+        new_docs: list[dict[str, Any]] = []
+        bodies: list[bytes | tuple[int, int]] = []  # new text, or a slice of the old store
+        fresh_tf: dict[int, Counter] = {}
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+
+        for doc_id in sorted(on_disk):
+            st = on_disk[doc_id]
+            old_num = self._by_id.get(doc_id)
+            old = self.docs[old_num] if old_num is not None else None
+            if old and old["mtime_ns"] == st.st_mtime_ns and old["size"] == st.st_size:
+                kept[old_num] = len(new_docs)
+                bodies.append((old["off"], old["len"]))
+                new_docs.append(dict(old))
+                stats["unchanged"] += 1
+                continue
+            text = (self.docs_dir / doc_id).read_text(encoding="utf-8", errors="replace")
+            tokens = tokenize(text)
+            fresh_tf[len(new_docs)] = Counter(tokens)
+            body = text.encode()
+            bodies.append(body)
+            title = next((ln.strip("# ").strip() for ln in text.splitlines() if ln.strip()), doc_id)
+            new_docs.append({
+                "id": doc_id, "mtime_ns": st.st_mtime_ns, "size": st.st_size,
+                "ntokens": len(tokens), "len": len(body), "title": title[:200],
+            })
+            stats["updated" if old else "added"] += 1
+        stats["removed"] = len(self.docs) - stats["unchanged"] - stats["updated"]
+
+        if not fresh_tf and not stats["removed"] and (self.index_dir / "manifest.json").exists():
+            return stats
+
+        # Carry over postings for unchanged docs, then add re-tokenized ones.
+        postings: dict[str, list[tuple[int, int]]] = {}
+        for i in range(self._num_terms()):
+            term, post_off, df = self._entry(i)
+            carried = [(kept[d], tf) for d, tf in self._iter_postings(post_off, df) if d in kept]
+            if carried:
+                postings[term.decode()] = carried
+        for doc_num, tf in fresh_tf.items():
+            for term, count in tf.items():
+                postings.setdefault(term, []).append((doc_num, count))
+
+        self._write(new_docs, bodies, postings)
+        self.open()
+        return stats
+
+    def _write(self, docs: list[dict[str, Any]], bodies: list[bytes | tuple[int, int]],
+               postings: dict[str, list[tuple[int, int]]]) -> None:
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        tmp = {name: self.index_dir / f"{name}.tmp"
+               for name in ("store.bin", "postings.bin", "terms.bin", "lexicon.bin", "manifest.json")}
+
+        with open(tmp["store.bin"], "wb") as store:
+            for doc, body in zip(docs, bodies):
+                doc["off"] = store.tell()
+                if isinstance(body, tuple):
+                    off, length = body
+                    if not length:
+                        body = b""  # empty docs leave store.bin empty, and it is never mapped
+                    elif self._store is not None and off + length <= len(self._store):
+                        body = self._store[off:off + length]
+                    else:  # store.bin missing or truncated: fall back to the source file
+                        text = (self.docs_dir / doc["id"]).read_text(encoding="utf-8", errors="replace")
+                        body = text.encode()
+                        doc["len"] = len(body)
+                store.write(body)
+        with open(tmp["postings.bin"], "wb") as post, open(tmp["terms.bin"], "wb") as terms, \
+                open(tmp["lexicon.bin"], "wb") as lex:
+            for term in sorted(postings, key=str.encode):
+                entries = sorted(postings[term])
+                raw = term.encode()
+                lex.write(_LEX.pack(terms.tell(), len(raw), post.tell(), len(entries)))
+                terms.write(raw)
+                post.write(b"".join(_POST.pack(d, tf) for d, tf in entries))
+        tmp["manifest.json"].write_text(json.dumps({"version": 1, "docs": docs}))
+
+        self.close()
+        for name, path in tmp.items():
+            os.replace(path, self.index_dir / name)
+
+    # -- queries -----------------------------------------------------------
+
+    def search(self, text: str, limit: int = 5) -> list[tuple[str, float, str]]:
+        """Return (doc_id, score, title) for the top `limit` BM25 matches."""
+        n = len(self.docs)
+        if not n or not self._lexicon:
+            return []
+        scores: dict[int, float] = {}
+        for term in set(tokenize(text)):
+            found = self._lookup(term)
+            if found is None:
+                continue
+            post_off, df = found
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for doc_num, tf in self._iter_postings(post_off, df):
+                dl = self.docs[doc_num]["ntokens"]
+                norm = tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * dl / self._avgdl))
+                scores[doc_num] = scores.get(doc_num, 0.0) + idf * norm
+        top = heapq.nlargest(limit, scores.items(), key=lambda kv: kv[1])
+        return [(self.docs[d]["id"], score, self.docs[d]["title"]) for d, score in top]
+
+    def get_doc(self, doc_id: str, start: int = 0, max_bytes: int | None = None) -> str | None:
+        """Read a document body (or a byte range of it) from the mapped store."""
+        doc_num = self._by_id.get(doc_id)
+        if doc_num is None:
+            return None
+        doc = self.docs[doc_num]
+        begin = doc["off"] + min(start, doc["len"])
+        end = doc["off"] + doc["len"]
+        if max_bytes is not None:
+            end = min(end, begin + max_bytes)
+        if begin >= end or self._store is None:  # empty bodies leave store.bin empty, and unmapped
+            return ""
+        return self._store[begin:end].decode("utf-8", errors="ignore")
+
+    def suggest_ids(self, prefix: str, limit: int = 5) -> list[str]:
+        ids = sorted(self._by_id)
+        i = bisect.bisect_left(ids, prefix)
+        return [d for d in ids[i:i + limit] if d.startswith(prefix)]
+
+
+index = DocIndex(
+    docs_dir=os.environ.get("DOCS_DIR", "docs"),
+    index_dir=os.environ.get("DOCS_INDEX_DIR", ".docs-index"),
+)
+
+
+@tool("search_docs", "Search documentation (BM25 ranked). Returns doc IDs for get_doc.", {
+    "query": {"type": "string", "description": "Search query"},
+    "limit": {"type": "integer", "description": "Max results", "default": 5}
+})
+async def search_docs(args: dict[str, Any]) -> dict[str, Any]:
+    hits = index.search(args.get("query", ""), limit=args.get("limit", 5))
+    if not hits:
+        return {"content": [{"type": "text", "text": "No matching documents."}]}
+    lines = [f"{doc_id} (score {score:.2f}): {title}" for doc_id, score, title in hits]
+    return {"content": [{"type": "text", "text": "\n".join(lines)}]}
+
+@tool("get_doc", "Get a specific document by ID", {
+    "doc_id": {"type": "string", "description": "Document ID from search_docs"}
+})
+async def get_doc(args: dict[str, Any]) -> dict[str, Any]:
+    doc_id = args.get("doc_id", "")
+    body = index.get_doc(doc_id, max_bytes=64_000)
+    if body is None:
+        near = ", ".join(index.suggest_ids(doc_id)) or "none"
+        return {
+            "content": [{"type": "text", "text": f"Unknown doc_id {doc_id!r}. Similar IDs: {near}"}],
+            "is_error": True,
+        }
+    return {"content": [{"type": "text", "text": body}]}
+
+
+async def main():
+    stats = await asyncio.to_thread(index.refresh)
+    print(f"Index: {len(index.docs)} docs ({stats})")
+
+    server = create_sdk_mcp_server(
+        name="docs",
+        version="1.0.0",
+        tools=[search_docs, get_doc],
+    )
+
+    options = ClaudeAgentOptions(
+        mcp_servers={"docs": server},
+        system_prompt="You help users search documentation. Use search_docs, then get_doc.",
+        permission_mode="bypassPermissions",
+    )
+
+    async for msg in query(prompt="Search for authentication docs", options=options):
+        if isinstance(msg, ResultMessage) and msg.subtype == "success":
+            print(msg.result)
+
+asyncio.run(main())
@@ -5,7 +5,7 @@ This example uses ClaudeSDKClient for its multi-turn conversation support.
 """
 import asyncio
 from typing import Any
-from claude_agent_sdk import ClaudeSDKClient, ClaudeAgentOptions, HookMatcher, HookContext
+from claude_agent_sdk import ClaudeSDKClient, ClaudeAgentOptions, HookMatcher, HookContext, ResultMessage
 
 
 async def audit_logger(
@@ -83,7 +83,6 @@ async def main():
     async with ClaudeSDKClient(options=options) as client:
         await client.query("Refactor the auth module to use bcrypt")
         async for message in client.receive_response():
-            from claude_agent_sdk import ResultMessage
             if isinstance(message, ResultMessage):
                 if message.subtype == "success":
                     print(f"\nDone: {message.result}")
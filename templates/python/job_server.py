@@ -0,0 +1,302 @@
+"""Long-running job server on a Unix socket (Python).
+
+Each template ends in asyncio.run(main()). A job run that way pays for
+interpreter startup, importing claude_agent_sdk and pydantic, building
+create_sdk_mcp_server() instances and compiling JSON schemas before it sends
+a single prompt. For thousands of short jobs that costs more than the model
+call. JobServer does all of that once:
+
+- PROFILES: named ClaudeAgentOptions presets;
+- tool sets: SDK MCP servers, built once by preload() and shared by every job;
+- schemas: pydantic models whose JSON schemas and validators are compiled by
+  preload().
+
+Clients connect to a Unix socket (mode 0600) and send newline-delimited JSON:
+
+    {"op": "run", "job": {"id": "j1", "prompt": "...", "profile": "review",
+                          "tools": ["docs"], "schema": "code_review"}}
+    {"op": "stats"}
+
+Jobs run concurrently on one event loop, up to max_jobs, and their events
+stream back tagged with the job id: message, result, then done (or error).
+The done event carries per-job overhead: queued_ms waiting for a slot,
+setup_ms to build options, first_message_ms until the CLI answers, and
+total_ms. stats reports the one-off cost (imports, MCP servers, schemas, and
+startup until the socket listens) next to the per-job averages.
+
+    python job_server.py --serve     # serve until interrupted
+    python job_server.py             # demo: serve, submit three jobs, stop
+"""
+import time
+
+_import_started = time.perf_counter()  # everything below is paid once per server, not per job
+import asyncio
+import dataclasses
+import itertools
+import json
+import os
+import sys
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from claude_agent_sdk import (
+    query, tool, create_sdk_mcp_server, ClaudeAgentOptions,
+    AssistantMessage, ResultMessage, TextBlock, ToolUseBlock,
+)
+IMPORT_S = time.perf_counter() - _import_started
+
+
+class Issue(BaseModel):
+    severity: str = Field(pattern="^(critical|warning|info)$")
+    file: str
+    line: int | None = None
+    description: str
+
+
+class CodeReview(BaseModel):
+    summary: str
+    issues: list[Issue]
+    score: int = Field(ge=0, le=100)
+    recommendation: str = Field(pattern="^(approve|request_changes|needs_discussion)$")
+
+
+@tool("search_docs", "Search documentation", {
+    "query": {"type": "string", "description": "Search query"},
+    "limit": {"type": "integer", "description": "Max results", "default": 5}
+})
+async def search_docs(args: dict[str, Any]) -> dict[str, Any]:
+    q = args.get("query", "")
+    results = [f"Result {i}: {q} match" for i in range(1, min(args.get("limit", 5) + 1, 4))]
+    return {"content": [{"type": "text", "text": "\n".join(results)}]}
+
+
+PROFILES = {
+    "default": ClaudeAgentOptions(permission_mode="bypassPermissions", max_turns=5),
+    "review": ClaudeAgentOptions(allowed_tools=["Read", "Grep", "Glob"], permission_mode="bypassPermissions",
+                                 max_turns=10),
+}
+
+
+@dataclass
+class Preloaded:
+    toolsets: dict[str, Any]
+    schemas: dict[str, tuple[dict[str, Any], TypeAdapter]]
+    timings_ms: dict[str, float]
+
+
+def preload() -> Preloaded:
+    timings = {"imports": IMPORT_S * 1000}
+    started = time.perf_counter()
+    toolsets = {"docs": create_sdk_mcp_server(name="docs", version="1.0.0", tools=[search_docs])}
+    timings["mcp_servers"] = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    schemas = {"code_review": (CodeReview.model_json_schema(), TypeAdapter(CodeReview))}
+    timings["schemas"] = (time.perf_counter() - started) * 1000
+    return Preloaded(toolsets, schemas, timings)
+
+
+def _mean(values: list[float]) -> float | None:
+    return round(sum(values) / len(values), 2) if values else None
+
+
+@dataclass
+class ServerStats:
+    started_at: float = field(default_factory=time.monotonic)
+    jobs: int = 0
+    failed: int = 0
+    active: int = 0
+    setup_ms: list[float] = field(default_factory=list)
+    first_message_ms: list[float] = field(default_factory=list)
+
+    def as_dict(self, preloaded: Preloaded) -> dict[str, Any]:
+        return {
+            "uptime_s": round(time.monotonic() - self.started_at, 1),
+            "preload_ms": {k: round(v, 1) for k, v in preloaded.timings_ms.items()},
+            "jobs": self.jobs, "failed": self.failed, "active": self.active,
+            "avg_setup_ms": _mean(self.setup_ms), "avg_first_message_ms": _mean(self.first_message_ms),
+        }
+
+
+def _event(msg: Any) -> dict[str, Any] | None:
+    if isinstance(msg, AssistantMessage):
+        text = "".join(b.text for b in msg.content if isinstance(b, TextBlock))
+        tools = [b.name for b in msg.content if isinstance(b, ToolUseBlock)]
+        return {"event": "message", "text": text, "tools": tools} if text or tools else None
+    if isinstance(msg, ResultMessage):
+        return {"event": "result", "subtype": msg.subtype, "result": msg.result,
+                "cost_usd": msg.total_cost_usd, "duration_ms": msg.duration_ms, "session_id": msg.session_id}
+    return None
+
+
+class JobServer:
+    def __init__(self, socket_path: str | Path, max_jobs: int = 8):
+        self.socket_path = Path(socket_path)
+        self.preloaded = preload()
+        self.stats = ServerStats()
+        self._slots = asyncio.Semaphore(max_jobs)
+        self._server: asyncio.Server | None = None
+        self._ids = itertools.count(1)
+        self._connections: set[asyncio.Task] = set()
+
+    def options_for(self, job: dict[str, Any]) -> tuple[ClaudeAgentOptions, TypeAdapter | None]:
+        base = PROFILES[job.get("profile", "default")]
+        servers = {name: self.preloaded.toolsets[name] for name in job.get("tools", [])}
+        overrides: dict[str, Any] = {}
+        if servers:
+            overrides["mcp_servers"] = servers
+            overrides["allowed_tools"] = base.allowed_tools + [f"mcp__{name}" for name in servers]
+        adapter = None
+        if job.get("schema"):
+            schema, adapter = self.preloaded.schemas[job["schema"]]
+            overrides["output_format"] = {"type": "json_schema", "schema": schema}
+        if "max_turns" in job:
+            overrides["max_turns"] = int(job["max_turns"])
+        return dataclasses.replace(base, **overrides), adapter
+
+    async def run_job(self, job: dict[str, Any]) -> AsyncIterator[dict[str, Any]]:
+        accepted = time.perf_counter()
+        async with self._slots:
+            self.stats.jobs += 1
+            self.stats.active += 1
+            started = time.perf_counter()
+            first = None
+            try:
+                options, adapter = self.options_for(job)
+                setup_ms = (time.perf_counter() - started) * 1000
+                self.stats.setup_ms.append(setup_ms)
+                async for msg in query(prompt=job["prompt"], options=options):
+                    if first is None:
+                        first = (time.perf_counter() - started) * 1000
+                        self.stats.first_message_ms.append(first)
+                    event = _event(msg)
+                    if isinstance(msg, ResultMessage) and adapter and msg.structured_output is not None:
+                        try:
+                            event["structured"] = adapter.validate_python(msg.structured_output).model_dump()
+                        except ValidationError as e:
+                            event["validation_error"] = str(e)
+                    if event:
+                        yield event
+            except Exception as e:  # unknown profile, tool set or schema, or a failed run
+                self.stats.failed += 1
+                yield {"event": "error", "error": f"{type(e).__name__}: {e}"}
+                return
+            finally:
+                self.stats.active -= 1
+            yield {"event": "done", "queued_ms": round((started - accepted) * 1000, 2),
+                   "setup_ms": round(setup_ms, 3), "first_message_ms": round(first or 0.0, 1),
+                   "total_ms": round((time.perf_counter() - accepted) * 1000, 1)}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        connection = asyncio.current_task()
+        self._connections.add(connection)
+        lock = asyncio.Lock()  # jobs on one connection share the writer
+        tasks: set[asyncio.Task] = set()
+
+        async def send(payload: dict[str, Any]) -> None:
+            async with lock:
+                writer.write(json.dumps(payload, default=str).encode() + b"\n")
+                await writer.drain()
+
+        async def stream(job: dict[str, Any]) -> None:
+            job_id = job.get("id") or f"job-{next(self._ids)}"
+            async for event in self.run_job(job):
+                await send({"job": job_id, **event})
+
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    await send({"event": "error", "error": "invalid JSON"})
+                    continue
+                if request.get("op") == "run":
+                    task = asyncio.create_task(stream(request.get("job", {})))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                elif request.get("op") == "stats":
+                    await send({"event": "stats", **self.stats.as_dict(self.preloaded)})
+                else:
+                    await send({"event": "error", "error": f"unknown op {request.get('op')!r}"})
+            await asyncio.gather(*tasks)  # client finished sending; let its jobs complete
+        except (ConnectionError, asyncio.CancelledError):
+            pass  # client went away or the server is closing; remaining jobs are cancelled below
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+            self._connections.discard(connection)
+
+    async def start(self) -> None:
+        self.socket_path.unlink(missing_ok=True)  # stale socket from a previous run
+        self._server = await asyncio.start_unix_server(self._handle, path=str(self.socket_path))
+        os.chmod(self.socket_path, 0o600)
+        self.preloaded.timings_ms["startup"] = (time.perf_counter() - _import_started) * 1000
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for connection in list(self._connections):
+            connection.cancel()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        self.socket_path.unlink(missing_ok=True)
+
+
+async def submit(socket_path: str | Path, jobs: Iterable[dict[str, Any]], stats: bool = True) -> AsyncIterator[dict]:
+    """Client side: send jobs (each with an "id") over one connection and yield events until all are done."""
+    reader, writer = await asyncio.open_unix_connection(str(socket_path))
+    pending = set()
+    for job in jobs:
+        pending.add(job["id"])
+        writer.write(json.dumps({"op": "run", "job": job}).encode() + b"\n")
+    await writer.drain()
+    try:
+        while pending and (line := await reader.readline()):
+            event = json.loads(line)
+            if event.get("event") in ("done", "error"):
+                pending.discard(event.get("job"))
+            yield event
+        if stats:
+            writer.write(b'{"op": "stats"}\n')
+            await writer.drain()
+            yield json.loads(await reader.readline())
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def main():
+    server = JobServer(os.environ.get("JOB_SERVER_SOCKET", ".claude-jobs.sock"), max_jobs=4)
+    await server.start()
+    print(f"Listening on {server.socket_path}; preload {server.stats.as_dict(server.preloaded)['preload_ms']}")
+    if "--serve" in sys.argv:
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.close()
+        return
+
+    jobs = [
+        {"id": "math", "prompt": "What is 2 + 2?"},
+        {"id": "docs", "prompt": "Search the docs for authentication", "tools": ["docs"]},
+        {"id": "review", "prompt": "Review src/ for security issues", "profile": "review",
+         "schema": "code_review"},
+    ]
+    try:
+        async for event in submit(server.socket_path, jobs):
+            match event.get("event"):
+                case "result":
+                    print(f"[{event['job']}] {event['subtype']}: {(event.get('result') or '')[:100]}")
+                case "done":
+                    print(f"[{event['job']}] setup {event['setup_ms']}ms, first message "
+                          f"{event['first_message_ms']}ms, total {event['total_ms']}ms")
+                case "error":
+                    print(f"[{event.get('job')}] error: {event['error']}")
+                case "stats":
+                    print(f"stats: {event}")
+    finally:
+        await server.close()
+
+asyncio.run(main())
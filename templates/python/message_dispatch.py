@@ -0,0 +1,278 @@
+"""Table-driven message dispatch and a compact transcript store (Python).
+
+Each template walks every message down an isinstance chain over
+AssistantMessage / SystemMessage / ResultMessage / StreamEvent.
+MessageDispatcher maps (message type, subtype) to handlers instead:
+
+- the subtype is SystemMessage.subtype, ResultMessage.subtype or the raw
+  StreamEvent event type, so "init", "error_max_turns" or
+  "content_block_delta" get their own handlers;
+- lookups fall back from (type, subtype) to (type, None), then along the
+  class hierarchy, so a SystemMessage handler also sees TaskStartedMessage;
+- the resolved handler list is cached per (class, subtype), so each message
+  costs one dict lookup.
+
+Services that keep transcripts in memory usually retain every message with
+its full payload. CompactTranscript keeps what a transcript view needs and
+no more:
+
+- __slots__ entries;
+- interned model names, tool names and session ids;
+- only the block kinds you select, with tool inputs and results cut to a size;
+- a cap on entries per transcript, and on transcripts per store (LRU).
+"""
+import asyncio
+import inspect
+import sys
+from collections import OrderedDict, deque
+from collections.abc import Awaitable, Callable, Iterator
+from typing import Any
+from claude_agent_sdk import (
+    query, ClaudeAgentOptions, Message,
+    AssistantMessage, UserMessage, SystemMessage, ResultMessage, StreamEvent,
+    TextBlock, ThinkingBlock, ToolUseBlock, ToolResultBlock,
+)
+
+Handler = Callable[[Any], Awaitable[None] | None]
+
+
+def _subtype(msg: Any) -> str | None:
+    if isinstance(msg, (SystemMessage, ResultMessage)):
+        return msg.subtype
+    if isinstance(msg, StreamEvent):
+        return msg.event.get("type")
+    return None
+
+
+class MessageDispatcher:
+    def __init__(self):
+        self._table: dict[tuple[type, str | None], list[Handler]] = {}
+        self._resolved: dict[tuple[type, str | None], tuple[Handler, ...]] = {}
+        self.unhandled = 0
+
+    def on(self, msg_type: type, subtype: str | None = None) -> Callable[[Handler], Handler]:
+        """Decorator: call the handler for msg_type (and subclasses), optionally one subtype only."""
+        def register(handler: Handler) -> Handler:
+            self._table.setdefault((msg_type, subtype), []).append(handler)
+            self._resolved.clear()
+            return handler
+        return register
+
+    def handlers_for(self, cls: type, subtype: str | None) -> tuple[Handler, ...]:
+        key = (cls, subtype)
+        found = self._resolved.get(key)
+        if found is None:
+            found = ()
+            for base in cls.__mro__:  # most specific class first; within it, subtype before catch-all
+                if subtype is not None:
+                    found += tuple(self._table.get((base, subtype), ()))
+                found += tuple(self._table.get((base, None), ()))
+            self._resolved[key] = found
+        return found
+
+    async def dispatch(self, msg: Message) -> None:
+        handlers = self.handlers_for(type(msg), _subtype(msg))
+        if not handlers:
+            self.unhandled += 1
+        for handler in handlers:
+            result = handler(msg)
+            if inspect.isawaitable(result):
+                await result
+
+
+# ---------------------------------------------------------------------------
+# Compact retention
+# ---------------------------------------------------------------------------
+
+class Block:
+    __slots__ = ("kind", "text", "tool_name", "tool_use_id", "is_error")
+
+    def __init__(self, kind: str, text: str = "", tool_name: str | None = None,
+                 tool_use_id: str | None = None, is_error: bool = False):
+        self.kind = kind
+        self.text = text
+        self.tool_name = tool_name
+        self.tool_use_id = tool_use_id
+        self.is_error = is_error
+
+    def __repr__(self) -> str:
+        label = self.tool_name or self.tool_use_id or ""
+        return f"Block({self.kind}{' ' + label if label else ''}, {self.text[:40]!r})"
+
+
+class Entry:
+    __slots__ = ("role", "uuid", "model", "parent_tool_use_id", "blocks")
+
+    def __init__(self, role: str, uuid: str | None, model: str | None,
+                 parent_tool_use_id: str | None, blocks: tuple[Block, ...]):
+        self.role = role
+        self.uuid = uuid
+        self.model = model
+        self.parent_tool_use_id = parent_tool_use_id
+        self.blocks = blocks
+
+    def __repr__(self) -> str:
+        return f"Entry({self.role}, {len(self.blocks)} blocks)"
+
+
+def _intern(value: str | None) -> str | None:
+    return sys.intern(value) if value is not None else None
+
+
+def _clip(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit] + f"… [{len(text) - limit} chars dropped]"
+
+
+def _result_text(content: Any) -> str:
+    if isinstance(content, list):
+        return "\n".join(str(c.get("text", "")) for c in content if isinstance(c, dict))
+    return str(content or "")
+
+
+class CompactTranscript:
+    __slots__ = ("session_id", "entries", "keep", "max_text_chars", "max_tool_chars", "dropped")
+
+    def __init__(
+        self,
+        session_id: str | None = None,
+        keep: frozenset[str] = frozenset({"text", "tool_use", "tool_result"}),
+        max_entries: int | None = 500,
+        max_text_chars: int = 4000,
+        max_tool_chars: int = 200,
+    ):
+        self.session_id = _intern(session_id)
+        self.entries: deque[Entry] = deque(maxlen=max_entries)
+        self.keep = keep
+        self.max_text_chars = max_text_chars
+        self.max_tool_chars = max_tool_chars
+        self.dropped = 0  # blocks not retained
+
+    def _block(self, block: Any) -> Block | None:
+        if isinstance(block, TextBlock) and "text" in self.keep:
+            return Block("text", _clip(block.text, self.max_text_chars))
+        if isinstance(block, ThinkingBlock) and "thinking" in self.keep:
+            return Block("thinking", _clip(block.thinking, self.max_text_chars))
+        if isinstance(block, ToolUseBlock) and "tool_use" in self.keep:
+            return Block("tool_use", _clip(repr(block.input), self.max_tool_chars),
+                         tool_name=_intern(block.name), tool_use_id=block.id)
+        if isinstance(block, ToolResultBlock) and "tool_result" in self.keep:
+            return Block("tool_result", _clip(_result_text(block.content), self.max_tool_chars),
+                         tool_use_id=block.tool_use_id, is_error=bool(block.is_error))
+        self.dropped += 1
+        return None
+
+    def add(self, msg: AssistantMessage | UserMessage) -> Entry | None:
+        """Retain the kept blocks of one message; the message itself is not referenced."""
+        content = [TextBlock(msg.content)] if isinstance(msg.content, str) else msg.content
+        blocks = tuple(b for b in map(self._block, content) if b is not None)
+        if not blocks:
+            return None
+        assistant = isinstance(msg, AssistantMessage)
+        entry = Entry(
+            "assistant" if assistant else "user",
+            msg.uuid,
+            _intern(msg.model) if assistant else None,
+            msg.parent_tool_use_id,
+            blocks,
+        )
+        self.entries.append(entry)
+        return entry
+
+    def __iter__(self) -> Iterator[Entry]:
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def nbytes(self) -> int:
+        """Approximate retained size: entries, blocks and their (non-interned) strings."""
+        total = sys.getsizeof(self.entries)
+        for e in self.entries:
+            total += sys.getsizeof(e) + sys.getsizeof(e.blocks)
+            for b in e.blocks:
+                total += sys.getsizeof(b) + sys.getsizeof(b.text)
+        return total
+
+
+class TranscriptStore:
+    """Transcripts by session id; the least recently used are dropped past max_sessions."""
+
+    def __init__(self, max_sessions: int = 1000, **transcript_options: Any):
+        self.max_sessions = max_sessions
+        self.transcript_options = transcript_options
+        self._sessions: OrderedDict[str, CompactTranscript] = OrderedDict()
+        self.evicted = 0
+
+    def get(self, session_id: str) -> CompactTranscript:
+        transcript = self._sessions.get(session_id)
+        if transcript is None:
+            transcript = self._sessions[session_id] = CompactTranscript(session_id, **self.transcript_options)
+            if len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evicted += 1
+        else:
+            self._sessions.move_to_end(session_id)
+        return transcript
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __iter__(self) -> Iterator[CompactTranscript]:
+        return iter(list(self._sessions.values()))
+
+    def nbytes(self) -> int:
+        return sum(t.nbytes() for t in self._sessions.values())
+
+
+async def main():
+    store = TranscriptStore(max_sessions=100, max_entries=200)
+    dispatcher = MessageDispatcher()
+    session: dict[str, str] = {}
+    pending: list[UserMessage | AssistantMessage] = []  # until init names the session
+
+    def retain(msg: AssistantMessage | UserMessage) -> None:
+        if "id" in session:
+            store.get(session["id"]).add(msg)
+        else:
+            pending.append(msg)
+
+    dispatcher.on(AssistantMessage)(retain)
+    dispatcher.on(UserMessage)(retain)
+
+    @dispatcher.on(SystemMessage, "init")
+    def on_init(msg: SystemMessage) -> None:
+        session["id"] = msg.data.get("session_id", "unknown")
+        print(f"[init] session {session['id']}, model {msg.data.get('model')}")
+
+    @dispatcher.on(SystemMessage)
+    def on_system(msg: SystemMessage) -> None:
+        if msg.subtype != "init":
+            print(f"[system] {msg.subtype}")
+
+    @dispatcher.on(ResultMessage, "success")
+    def on_success(msg: ResultMessage) -> None:
+        print(f"Done: {(msg.result or '')[:200]}")
+
+    @dispatcher.on(ResultMessage)
+    def on_result(msg: ResultMessage) -> None:
+        for m in pending:
+            store.get(msg.session_id).add(m)
+        pending.clear()
+        if msg.subtype != "success":
+            print(f"Error: {msg.subtype}")
+
+    options = ClaudeAgentOptions(
+        allowed_tools=["Read", "Glob", "Grep"],
+        permission_mode="bypassPermissions",
+        max_turns=10,
+    )
+    async for message in query(prompt="Summarize the layout of this repository", options=options):
+        await dispatcher.dispatch(message)
+
+    for transcript in store:
+        tools = [b.tool_name for e in transcript for b in e.blocks if b.kind == "tool_use"]
+        print(f"{transcript.session_id}: {len(transcript)} entries, {transcript.dropped} blocks dropped, "
+              f"~{transcript.nbytes() / 1024:.1f} KiB, tools {tools}")
+    print(f"{dispatcher.unhandled} messages without a handler")
+
+asyncio.run(main())
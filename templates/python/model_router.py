@@ -0,0 +1,217 @@
+"""Burn-rate-aware model routing with ClaudeSDKClient.set_model() (Python).
+
+error_handling.py only learns it ran out of money when the run ends with
+error_max_budget_usd. ModelRouter watches the per-turn usage on every
+AssistantMessage while the response is still streaming, prices it, and
+projects where the run will land:
+
+    projected = spent + avg cost per turn (recent turns weighted) × turns left
+
+Before each next turn it asks a list of routing rules which model tier to
+use. The default rule steps down the ladder (opus → sonnet → haiku) once the
+projection passes a share of max_budget_usd; rules are plain callables, so
+escalation (e.g. step back up after repeated tool errors) is pluggable too.
+Every switch is logged with the numbers that triggered it.
+
+Token prices are list prices per million tokens and only drive the
+projection; spend is re-synced to ResultMessage.total_cost_usd after every
+response.
+"""
+import asyncio
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from claude_agent_sdk import (
+    ClaudeSDKClient, ClaudeAgentOptions,
+    AssistantMessage, ResultMessage, UserMessage, ToolResultBlock,
+)
+
+# USD per million tokens: input, output, cache write (5m), cache read
+PRICES = {
+    "opus": (5.00, 25.00, 6.25, 0.50),
+    "sonnet": (3.00, 15.00, 3.75, 0.30),
+    "haiku": (1.00, 5.00, 1.25, 0.10),
+}
+LADDER = ["opus", "sonnet", "haiku"]  # most to least capable
+
+
+def tier_of(model: str | None) -> str | None:
+    return next((t for t in LADDER if model and t in model), None)
+
+
+def turn_cost(model: str | None, usage: dict | None) -> float:
+    prices = PRICES.get(tier_of(model) or "", PRICES["sonnet"])
+    u = usage or {}
+    tokens = (
+        u.get("input_tokens", 0),
+        u.get("output_tokens", 0),
+        u.get("cache_creation_input_tokens", 0),
+        u.get("cache_read_input_tokens", 0),
+    )
+    return sum(n * p for n, p in zip(tokens, prices)) / 1_000_000
+
+
+@dataclass
+class BurnState:
+    tier: str
+    max_budget_usd: float | None
+    max_turns: int | None
+    spent_usd: float = 0.0       # session total, estimated between results
+    turns: int = 0               # main-thread turns in the current response
+    avg_turn_usd: float = 0.0    # exponentially weighted
+    tool_errors: int = 0         # consecutive failed tool results
+
+    @property
+    def turns_left(self) -> int | None:
+        return None if self.max_turns is None else max(self.max_turns - self.turns, 0)
+
+    @property
+    def projected_usd(self) -> float:
+        left = self.turns_left if self.turns_left is not None else 1
+        return self.spent_usd + self.avg_turn_usd * left
+
+
+# A rule looks at the burn state and returns (tier, reason), or None to abstain.
+RoutingRule = Callable[[BurnState], tuple[str, str] | None]
+
+
+def downshift_on_burn(share: float = 0.8) -> RoutingRule:
+    """Step one tier down while the projection exceeds share × budget."""
+    def rule(s: BurnState) -> tuple[str, str] | None:
+        i = LADDER.index(s.tier)
+        if i + 1 < len(LADDER) and s.max_budget_usd and s.projected_usd > share * s.max_budget_usd:
+            return LADDER[i + 1], f"projected ${s.projected_usd:.2f} > {share:.0%} of ${s.max_budget_usd:.2f}"
+        return None
+    return rule
+
+
+def escalate_on_tool_errors(threshold: int = 3, max_spent_share: float = 0.5) -> RoutingRule:
+    """Step one tier up after repeated tool failures, if the budget still allows it."""
+    def rule(s: BurnState) -> tuple[str, str] | None:
+        i = LADDER.index(s.tier)
+        cheap_enough = not s.max_budget_usd or s.spent_usd < max_spent_share * s.max_budget_usd
+        if i > 0 and s.tool_errors >= threshold and cheap_enough:
+            return LADDER[i - 1], f"{s.tool_errors} tool errors in a row"
+        return None
+    return rule
+
+
+@dataclass
+class Switch:
+    at: float
+    turn: int
+    from_tier: str
+    to_tier: str
+    reason: str
+    spent_usd: float
+    projected_usd: float
+
+
+def log_switch(s: Switch) -> None:
+    print(f"[router] turn {s.turn}: {s.from_tier} → {s.to_tier} ({s.reason}; "
+          f"spent ${s.spent_usd:.4f}, projected ${s.projected_usd:.4f})")
+
+
+@dataclass
+class ModelRouter:
+    options: ClaudeAgentOptions
+    rules: list[RoutingRule] = field(default_factory=lambda: [downshift_on_burn()])
+    models: dict[str, str] = field(default_factory=lambda: {t: t for t in LADDER})
+    ewma_alpha: float = 0.5
+    on_switch: Callable[[Switch], None] = log_switch
+    switches: list[Switch] = field(default_factory=list)
+
+    def __post_init__(self):
+        self.state = BurnState(
+            tier=tier_of(self.options.model) or "sonnet",
+            max_budget_usd=self.options.max_budget_usd,
+            max_turns=self.options.max_turns,
+        )
+        self._seen_messages: set[str] = set()
+
+    def _observe(self, msg: AssistantMessage) -> bool:
+        """Account one streamed message; True when it starts a new main-thread turn."""
+        # One API response can arrive as several AssistantMessages sharing a message_id
+        if msg.message_id and msg.message_id in self._seen_messages:
+            return False
+        if msg.message_id:
+            self._seen_messages.add(msg.message_id)
+        s = self.state
+        cost = turn_cost(msg.model, msg.usage)
+        s.spent_usd += cost
+        if msg.parent_tool_use_id is not None:
+            return False  # subagent spend counts toward the budget, not toward max_turns
+        s.turns += 1
+        a = self.ewma_alpha if s.turns > 1 else 1.0
+        s.avg_turn_usd = a * cost + (1 - a) * s.avg_turn_usd
+        return True
+
+    async def _route(self, client: ClaudeSDKClient) -> None:
+        s = self.state
+        for rule in self.rules:
+            decision = rule(s)
+            if decision is None:
+                continue
+            tier, reason = decision
+            if tier != s.tier:
+                switch = Switch(time.time(), s.turns, s.tier, tier, reason, s.spent_usd, s.projected_usd)
+                await client.set_model(self.models[tier])
+                s.tier = tier
+                s.tool_errors = 0
+                self.switches.append(switch)
+                self.on_switch(switch)
+            return  # first rule with an opinion wins
+
+    async def run(self, client: ClaudeSDKClient, prompt: str) -> ResultMessage | None:
+        """Send one prompt and route between turns until its ResultMessage."""
+        self.state.turns = 0
+        await client.query(prompt)
+        result = None
+        async for msg in client.receive_response():
+            if isinstance(msg, AssistantMessage):
+                if self._observe(msg):
+                    await self._route(client)  # takes effect from the next API call
+            elif isinstance(msg, UserMessage) and isinstance(msg.content, list):
+                for block in msg.content:
+                    if isinstance(block, ToolResultBlock):
+                        self.state.tool_errors = self.state.tool_errors + 1 if block.is_error else 0
+            elif isinstance(msg, ResultMessage):
+                result = msg
+                if msg.total_cost_usd is not None:
+                    self.state.spent_usd = msg.total_cost_usd  # replace the estimate with the real figure
+        return result
+
+
+async def main():
+    options = ClaudeAgentOptions(
+        model="opus",
+        max_turns=30,
+        max_budget_usd=2.00,
+        permission_mode="bypassPermissions",
+    )
+    router = ModelRouter(
+        options,
+        rules=[downshift_on_burn(share=0.8), escalate_on_tool_errors(threshold=3)],
+    )
+
+    async with ClaudeSDKClient(options=options) as client:
+        for prompt in [
+            "Analyze this codebase and list the riskiest modules",
+            "Write unit tests for the riskiest module you found",
+        ]:
+            result = await router.run(client, prompt)
+            if result is None:
+                continue
+            match result.subtype:
+                case "success":
+                    print(f"Done: {(result.result or '')[:200]}")
+                case "error_max_budget_usd":
+                    print("Hit budget limit despite routing")
+                case other:
+                    print(f"Ended: {other}")
+            print(f"tier={router.state.tier} spent=${router.state.spent_usd:.4f} "
+                  f"turns={result.num_turns}")
+
+    print(f"{len(router.switches)} model switch(es)")
+
+asyncio.run(main())
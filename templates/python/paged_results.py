@@ -0,0 +1,278 @@
+"""Handle-based pagination for large SDK MCP tool results (Python).
+
+get_doc in custom_mcp_server.py returns the whole document as one text block.
+A 200 KB result then sits in the context of every later turn. PagedResults
+wraps a @tool so that any text result over inline_chars is replaced by:
+
+- a short summary (head of the text plus size and line count, or your own
+  summarize function);
+- an opaque handle, which the companion read_result tool accepts together
+  with a byte range (offset/length) or a line range (start_line/num_lines).
+
+The full text is written once to a spill file and mmap'ed; reads decode
+straight from the mapping, snapped to UTF-8 boundaries, and line ranges use a
+line-offset index built lazily on first use. Handles belong to one session:
+each session gets its own PagedResults, capped at max_bytes (least recently
+read handles go first), and ResultStore.evict() drops the whole session when
+it ends.
+"""
+import asyncio
+import mmap
+import os
+import secrets
+import shutil
+import tempfile
+import time
+from array import array
+from collections.abc import Callable
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any
+from claude_agent_sdk import (
+    query, tool, create_sdk_mcp_server, ClaudeAgentOptions,
+    ResultMessage, SdkMcpTool,
+)
+
+
+def _utf8_start(buf: mmap.mmap, pos: int) -> int:
+    """Move pos forward past UTF-8 continuation bytes (0b10xxxxxx)."""
+    while pos < len(buf) and buf[pos] & 0xC0 == 0x80:
+        pos += 1
+    return pos
+
+
+def head_summary(text: str, lines: int = 20) -> str:
+    return "\n".join(text.splitlines()[:lines])
+
+
+@dataclass
+class PagedResult:
+    handle: str
+    tool_name: str
+    path: Path
+    size: int
+    buf: mmap.mmap
+    last_read: float = field(default_factory=time.monotonic)
+    _lines: array | None = None  # byte offset of every line start
+
+    @property
+    def line_starts(self) -> array:
+        if self._lines is None:
+            starts = array("Q", [0])
+            pos = self.buf.find(b"\n")
+            while pos != -1:
+                if pos + 1 < self.size:
+                    starts.append(pos + 1)
+                pos = self.buf.find(b"\n", pos + 1)
+            self._lines = starts
+        return self._lines
+
+    def read_bytes(self, offset: int, length: int) -> tuple[str, int, int]:
+        """Decoded text of [offset, offset + length), snapped to character boundaries."""
+        begin = _utf8_start(self.buf, min(max(offset, 0), self.size))
+        end = _utf8_start(self.buf, min(begin + max(length, 0), self.size))
+        with memoryview(self.buf) as view:
+            text = str(view[begin:end], "utf-8", "replace")
+        return text, begin, end
+
+    def close(self) -> None:
+        self.buf.close()
+        self.path.unlink(missing_ok=True)
+
+
+class PagedResults:
+    """Large results of one session, behind handles."""
+
+    def __init__(
+        self,
+        directory: Path,
+        inline_chars: int = 8_000,
+        page_bytes: int = 16_000,
+        max_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.inline_chars = inline_chars
+        self.page_bytes = page_bytes
+        self.max_bytes = max_bytes
+        self.results: dict[str, PagedResult] = {}
+        self.bytes = 0
+        self.evictions = 0
+
+    def _spill(self, handle: str, text: str) -> tuple[Path, int, mmap.mmap]:
+        """File I/O only, safe in a worker thread: write text out and map it."""
+        path = self.directory / f"{handle}.txt"
+        data = text.encode("utf-8")
+        path.write_bytes(data)
+        with open(path, "rb") as f:
+            return path, len(data), mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _register(self, handle: str, tool_name: str, spilled: tuple[Path, int, mmap.mmap]) -> PagedResult:
+        # on the event loop only: read_result may hold views of the mappings eviction closes
+        result = self.results[handle] = PagedResult(handle, tool_name, *spilled)
+        self.bytes += result.size
+        self._evict(keep=handle)
+        return result
+
+    def store(self, tool_name: str, text: str) -> PagedResult:
+        handle = f"res_{secrets.token_hex(6)}"
+        return self._register(handle, tool_name, self._spill(handle, text))
+
+    async def store_async(self, tool_name: str, text: str) -> PagedResult:
+        """store() with the write and mmap in a thread; bookkeeping stays on the loop."""
+        handle = f"res_{secrets.token_hex(6)}"
+        return self._register(handle, tool_name, await asyncio.to_thread(self._spill, handle, text))
+
+    def _evict(self, keep: str) -> None:
+        for r in sorted(self.results.values(), key=lambda r: r.last_read):
+            if self.bytes <= self.max_bytes:
+                break
+            if r.handle != keep:
+                self.drop(r.handle)
+                self.evictions += 1
+
+    def drop(self, handle: str) -> None:
+        result = self.results.pop(handle, None)
+        if result is not None:
+            self.bytes -= result.size
+            result.close()
+
+    def close(self) -> None:
+        for handle in list(self.results):
+            self.drop(handle)
+
+    def paginate(self, sdk_tool: SdkMcpTool[Any],
+                 summarize: Callable[[str], str] = head_summary) -> SdkMcpTool[Any]:
+        """Return a copy of sdk_tool whose oversized text blocks are replaced by a summary and handle."""
+        handler = sdk_tool.handler
+
+        async def paged_handler(args: dict[str, Any]) -> dict[str, Any]:
+            result = await handler(args)
+            if result.get("is_error"):
+                return result
+            content = []
+            for block in result.get("content", []):
+                text = block.get("text") if block.get("type") == "text" else None
+                if text is None or len(text) <= self.inline_chars:
+                    content.append(block)
+                    continue
+                r = await self.store_async(sdk_tool.name, text)
+                content.append({"type": "text", "text": (
+                    f"{summarize(text)}\n\n[Result truncated: {r.size:,} bytes, {text.count(chr(10)) + 1:,} lines. "
+                    f"Read more with read_result(handle=\"{r.handle}\", offset=..., length=...) "
+                    f"or read_result(handle=\"{r.handle}\", start_line=..., num_lines=...).]"
+                )})
+            return {**result, "content": content}
+
+        return replace(sdk_tool, handler=paged_handler)
+
+    def read_tool(self) -> SdkMcpTool[Any]:
+        """The companion tool that reads byte or line ranges behind a handle."""
+        @tool("read_result", "Read part of a large tool result by handle, as a byte range or a line range", {
+            "type": "object",
+            "properties": {
+                "handle": {"type": "string", "description": "Handle from a truncated result"},
+                "offset": {"type": "integer", "description": "Byte offset to start at"},
+                "length": {"type": "integer", "description": f"Bytes to read (max {self.page_bytes})"},
+                "start_line": {"type": "integer", "description": "1-based first line (instead of offset)"},
+                "num_lines": {"type": "integer", "description": "Lines to read", "default": 200},
+            },
+            "required": ["handle"],
+        })
+        async def read_result(args: dict[str, Any]) -> dict[str, Any]:
+            r = self.results.get(args.get("handle", ""))
+            if r is None:
+                return {"content": [{"type": "text", "text": "Unknown or expired handle; call the tool again."}],
+                        "is_error": True}
+            r.last_read = time.monotonic()
+            if "start_line" in args:
+                starts = r.line_starts
+                first = min(max(int(args["start_line"]), 1), len(starts))
+                last = min(first + max(int(args.get("num_lines", 200)), 1), len(starts) + 1)
+                offset = starts[first - 1]
+                end = starts[last - 1] if last <= len(starts) else r.size
+                length = min(end - offset, self.page_bytes)
+                where = f"lines {first}-{last - 1} of {len(starts)}"
+            else:
+                offset = int(args.get("offset", 0))
+                length = min(int(args.get("length", self.page_bytes)), self.page_bytes)
+                where = None
+            text, begin, end = r.read_bytes(offset, length)
+            where = where or f"bytes {begin}-{end} of {r.size}"
+            more = f"; continue at offset {end}" if end < r.size else "; end of result"
+            return {"content": [{"type": "text", "text": f"[{where}{more}]\n{text}"}]}
+
+        return read_result
+
+
+class ResultStore:
+    """Spill directory shared by all sessions; one PagedResults per session key."""
+
+    def __init__(self, directory: str | Path | None = None, **session_options: Any):
+        self._owned = directory is None  # a temp dir we created, removed on close()
+        self.directory = Path(directory or tempfile.mkdtemp(prefix="paged-results-"))
+        self.session_options = session_options
+        self.sessions: dict[str, PagedResults] = {}
+
+    def session(self, key: str) -> PagedResults:
+        if key not in self.sessions:
+            self.sessions[key] = PagedResults(self.directory / key, **self.session_options)
+        return self.sessions[key]
+
+    def evict(self, key: str) -> None:
+        results = self.sessions.pop(key, None)
+        if results is not None:
+            results.close()
+            shutil.rmtree(results.directory, ignore_errors=True)
+
+    def close(self) -> None:
+        for key in list(self.sessions):
+            self.evict(key)
+        if self._owned:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+
+@tool("search_docs", "Search documentation", {
+    "query": {"type": "string", "description": "Search query"},
+    "limit": {"type": "integer", "description": "Max results", "default": 5}
+})
+async def search_docs(args: dict[str, Any]) -> dict[str, Any]:
+    q = args.get("query", "")
+    results = [f"Result {i}: {q} match (doc_id=auth-{i})" for i in range(1, min(args.get("limit", 5) + 1, 4))]
+    return {"content": [{"type": "text", "text": "\n".join(results)}]}
+
+@tool("get_doc", "Get a specific document", {
+    "doc_id": {"type": "string", "description": "Document ID"}
+})
+async def get_doc(args: dict[str, Any]) -> dict[str, Any]:
+    doc_id = args.get("doc_id", "")
+    sections = [f"## Section {i}\n\nDocument {doc_id}, section {i}: Lorem ipsum dolor sit amet. " * 3
+                for i in range(1, 400)]
+    return {"content": [{"type": "text", "text": f"# {doc_id}\n\n" + "\n\n".join(sections)}]}
+
+
+async def main():
+    store = ResultStore(os.environ.get("PAGED_RESULTS_DIR"), inline_chars=4_000)
+    results = store.session(f"session-{secrets.token_hex(4)}")  # one per client/session
+    server = create_sdk_mcp_server(
+        name="docs",
+        version="1.0.0",
+        tools=[search_docs, results.paginate(get_doc), results.read_tool()],
+    )
+
+    options = ClaudeAgentOptions(
+        mcp_servers={"docs": server},
+        system_prompt="You help users search documentation. Large results come back as a summary "
+                      "plus a handle; read only the parts you need with read_result.",
+        permission_mode="bypassPermissions",
+    )
+
+    try:
+        async for msg in query(prompt="Find the auth docs and explain section 120", options=options):
+            if isinstance(msg, ResultMessage) and msg.subtype == "success":
+                print(msg.result)
+        print(f"{len(results.results)} handles, {results.bytes:,} bytes spilled, {results.evictions} evicted")
+    finally:
+        store.close()
+
+asyncio.run(main())
@@ -1,6 +1,6 @@
 """Custom permission control with Claude Agent SDK."""
 import asyncio
-from claude_agent_sdk import query, ClaudeAgentOptions
+from claude_agent_sdk import query, ClaudeAgentOptions, ResultMessage
 from claude_agent_sdk.types import (
     ToolPermissionContext, PermissionResultAllow, PermissionResultDeny,
 )
@@ -19,8 +19,6 @@ async def can_use_tool(
     return PermissionResultAllow(updated_input=tool_input)
 
 async def main():
-    from claude_agent_sdk import ResultMessage
-
     options = ClaudeAgentOptions(
         can_use_tool=can_use_tool,
         permission_mode="default",
@@ -0,0 +1,224 @@
+"""Prompt-cache hit-rate metering and a cache-stable prefix builder (Python).
+
+The prompt cache only helps when the prefix of a request (tools, system
+prompt, agent list) is byte-for-byte the same as last time.
+subagents_orchestration.py and multi_agent_workflow.py build those pieces
+inline, so a reordered tool list, a reworded agent or a date interpolated
+into a prompt quietly turns cache reads into cache writes.
+
+StablePrefixBuilder assembles system_prompt, agents and allowed_tools
+deterministically:
+
+- agents sorted by name, their tool lists sorted and de-duplicated;
+- allowed_tools sorted and de-duplicated;
+- whitespace in prompts normalized.
+
+It also fingerprints every component and compares the fingerprints with the
+previous run (kept in a small JSON file), so prefix churn is reported by
+name. Dates, UUIDs, timestamps and temp paths in static text are flagged;
+put per-run values in the user prompt instead.
+
+CacheMeter aggregates usage per turn (input_tokens, cache_read_input_tokens,
+cache_creation_input_tokens) per agent and per system-prompt fingerprint.
+Subagent turns are attributed through the Task tool call that started them.
+"""
+import asyncio
+import dataclasses
+import hashlib
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+from claude_agent_sdk import (
+    query, ClaudeAgentOptions, AgentDefinition,
+    AssistantMessage, ResultMessage, ToolUseBlock,
+)
+
+VOLATILE = [
+    (re.compile(r"\b\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2})?)?"), "date/time"),
+    (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.I), "UUID"),
+    (re.compile(r"\b1[5-9]\d{8}(?:\d{3})?\b"), "Unix timestamp"),
+    (re.compile(r"(?:/tmp/|/var/folders/|\\Temp\\)\S+"), "temp path"),
+]
+TASK_TOOLS = {"Task", "Agent"}
+MAIN = "main"
+
+
+def _normalize(text: str) -> str:
+    lines = [line.rstrip() for line in text.strip().splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
+
+
+def _digest(value: Any) -> str:
+    payload = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+@dataclass
+class PrefixReport:
+    fingerprint: str
+    components: dict[str, str]  # component -> digest
+    changed: list[str] = field(default_factory=list)  # vs the previous run
+    volatile: list[str] = field(default_factory=list)
+
+    def print(self) -> None:
+        print(f"[prefix] {self.fingerprint} ({len(self.components)} components)")
+        for name in self.changed:
+            print(f"[prefix] churn: {name} changed since the last run")
+        for warning in self.volatile:
+            print(f"[prefix] volatile: {warning}")
+
+
+class StablePrefixBuilder:
+    def __init__(self, name: str, state_path: str | Path = ".prompt-prefix.json"):
+        self.name = name
+        self.state_path = Path(state_path)
+        self._sections: list[str] = []
+        self._agents: dict[str, AgentDefinition] = {}
+        self._tools: set[str] = set()
+
+    def system(self, *sections: str) -> "StablePrefixBuilder":
+        """Static system prompt sections, kept in the order given."""
+        self._sections.extend(_normalize(s) for s in sections if s.strip())
+        return self
+
+    def agent(self, name: str, definition: AgentDefinition | dict[str, Any]) -> "StablePrefixBuilder":
+        if isinstance(definition, dict):
+            definition = AgentDefinition(**definition)
+        self._agents[name] = dataclasses.replace(
+            definition,
+            description=_normalize(definition.description),
+            prompt=_normalize(definition.prompt),
+            tools=sorted(set(definition.tools)) if definition.tools is not None else None,
+            disallowedTools=sorted(set(definition.disallowedTools)) if definition.disallowedTools else None,
+        )
+        return self
+
+    def tools(self, *names: str) -> "StablePrefixBuilder":
+        self._tools.update(names)
+        return self
+
+    def _scan(self, component: str, text: str) -> list[str]:
+        return [f"{component} contains a {label} ({m.group(0)!r})"
+                for pattern, label in VOLATILE for m in pattern.finditer(text)]
+
+    def build(self, **options: Any) -> tuple[ClaudeAgentOptions, PrefixReport]:
+        """ClaudeAgentOptions with the stable prefix, plus any other options passed through."""
+        system_prompt = "\n\n".join(self._sections) or None
+        agents = {name: self._agents[name] for name in sorted(self._agents)}
+        allowed_tools = sorted(self._tools)
+
+        components = {"system": _digest(system_prompt), "allowed_tools": _digest(allowed_tools)}
+        volatile = self._scan("system", system_prompt or "")
+        for name, agent in agents.items():
+            components[f"agent:{name}"] = _digest(dataclasses.asdict(agent))
+            volatile += self._scan(f"agent:{name}", agent.prompt + "\n" + agent.description)
+        servers = options.get("mcp_servers")
+        if isinstance(servers, dict):
+            components["mcp_servers"] = _digest(sorted(servers))
+        report = PrefixReport(_digest(components), components, volatile=volatile)
+
+        state = json.loads(self.state_path.read_text()) if self.state_path.exists() else {}
+        previous = state.get(self.name, {})
+        report.changed = sorted(k for k in components.keys() | previous.keys()
+                                if previous and components.get(k) != previous.get(k))
+        state[self.name] = components
+        self.state_path.write_text(json.dumps(state, indent=2, sort_keys=True) + "\n")
+
+        built = ClaudeAgentOptions(
+            system_prompt=system_prompt,
+            agents=agents or None,
+            allowed_tools=allowed_tools,
+            **options,
+        )
+        return built, report
+
+
+@dataclass
+class CacheUsage:
+    turns: int = 0
+    input_tokens: int = 0
+    cache_read: int = 0
+    cache_creation: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.input_tokens + self.cache_read + self.cache_creation
+        return self.cache_read / total if total else 0.0
+
+    def add(self, usage: dict[str, Any]) -> None:
+        self.turns += 1
+        self.input_tokens += usage.get("input_tokens", 0)
+        self.cache_read += usage.get("cache_read_input_tokens", 0)
+        self.cache_creation += usage.get("cache_creation_input_tokens", 0)
+
+
+class CacheMeter:
+    """Cache usage per agent and per prompt fingerprint; reuse one meter across runs."""
+
+    def __init__(self, report: PrefixReport | None = None):
+        # lane -> digest of the prompt it runs under
+        self.prompt_of = {MAIN: report.components.get("system", "-")} if report else {}
+        if report:
+            self.prompt_of.update({k.removeprefix("agent:"): v for k, v in report.components.items()
+                                   if k.startswith("agent:")})
+        self.by_agent: dict[str, CacheUsage] = {}
+        self.by_prompt: dict[str, CacheUsage] = {}
+        self._agent_of: dict[str, str] = {}  # Task tool_use_id -> subagent type
+        self._seen: set[str] = set()
+
+    def observe(self, msg: Any) -> None:
+        if not isinstance(msg, AssistantMessage):
+            return
+        for block in msg.content:
+            if isinstance(block, ToolUseBlock) and block.name in TASK_TOOLS:
+                self._agent_of[block.id] = block.input.get("subagent_type", "general-purpose")
+        # one API call can stream as several messages sharing an id
+        if msg.usage is None or (msg.message_id and msg.message_id in self._seen):
+            return
+        if msg.message_id:
+            self._seen.add(msg.message_id)
+        lane = self._agent_of.get(msg.parent_tool_use_id, "subagent") if msg.parent_tool_use_id else MAIN
+        self.by_agent.setdefault(lane, CacheUsage()).add(msg.usage)
+        self.by_prompt.setdefault(self.prompt_of.get(lane, "-"), CacheUsage()).add(msg.usage)
+
+    def print_report(self) -> None:
+        for title, table in (("agent", self.by_agent), ("prompt", self.by_prompt)):
+            print(f"{title:18} {'turns':>5} {'input':>8} {'cache read':>11} {'cache write':>12} {'hit rate':>9}")
+            for key, u in sorted(table.items()):
+                print(f"{key:18} {u.turns:5} {u.input_tokens:8} {u.cache_read:11} {u.cache_creation:12} "
+                      f"{u.hit_rate:9.0%}")
+
+
+async def main():
+    builder = (
+        StablePrefixBuilder("devops")
+        .system("You are a DevOps orchestrator. Coordinate agents to complete tasks safely.")
+        .agent("monitor", {
+            "description": "System monitoring and alerting",
+            "prompt": "Check metrics, error rates, and system health.",
+            "tools": ["Read", "Bash"],
+            "model": "haiku",
+        })
+        .agent("deployer", {
+            "description": "Handles deployments and rollbacks",
+            "prompt": "You deploy applications. Always verify health after deployment.",
+            "tools": ["Read", "Bash"],
+            "model": "sonnet",
+        })
+        .tools("Task", "Read", "Bash", "Grep")
+    )
+    options, report = builder.build(permission_mode="bypassPermissions", max_turns=10)
+    report.print()
+
+    meter = CacheMeter(report)
+    # per-run values (versions, dates) go in the prompt, after the cached prefix
+    for prompt in ["Deploy v2.5.0 and check health", "Roll back to v2.4.3 if error rates rose"]:
+        async for msg in query(prompt=prompt, options=options):
+            meter.observe(msg)
+            if isinstance(msg, ResultMessage):
+                print(msg.result if msg.subtype == "success" else f"Error: {msg.subtype}")
+    meter.print_report()
+
+asyncio.run(main())
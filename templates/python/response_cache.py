@@ -0,0 +1,274 @@
+"""Opt-in, disk-backed response cache in front of query() (Python).
+
+basic_query.py pays full latency and cost every time it asks "What is 2 + 2?",
+and so does a code review of a tree that has not changed since the last one.
+cached_query() keys each call on a hash of:
+
+- the prompt;
+- the ClaudeAgentOptions fields that change what the model sees or may do
+  (KEY_FIELDS; callbacks such as hooks and can_use_tool are not part of it);
+- an optional content fingerprint, e.g. git_fingerprint() of the repository.
+
+Calls that resume or continue a session are never cached: the same prompt
+means something different once the conversation behind it has moved on.
+
+On a hit the stored message stream, ResultMessage included, is replayed
+without starting the CLI. Only complete, successful runs are stored. Entries
+live in one JSONL file each, and the least recently used ones are evicted
+once the directory grows past max_bytes. Pass bypass=True to skip the cache
+for one call, or use invalidate()/clear().
+
+Replayed messages carry the original session_id; don't resume from them
+expecting a new session.
+"""
+import asyncio
+import dataclasses
+import hashlib
+import json
+import os
+import subprocess
+import time
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+from claude_agent_sdk import (
+    query, ClaudeAgentOptions, Message,
+    UserMessage, AssistantMessage, SystemMessage, ResultMessage, StreamEvent, RateLimitEvent, RateLimitInfo,
+    TaskStartedMessage, TaskProgressMessage, TaskNotificationMessage,
+    TextBlock, ThinkingBlock, ToolUseBlock, ToolResultBlock,
+)
+
+KEY_FIELDS = (
+    "model", "fallback_model", "system_prompt", "tools", "allowed_tools", "disallowed_tools",
+    "permission_mode", "max_turns", "max_budget_usd", "mcp_servers", "agents", "output_format",
+    "cwd", "add_dirs", "setting_sources", "max_thinking_tokens", "thinking", "effort", "betas",
+    "resume", "continue_conversation", "session_id", "fork_session", "settings", "plugins", "sandbox",
+    "env", "extra_args", "include_partial_messages", "task_budget",
+)
+_TYPES = {cls.__name__: cls for cls in (
+    UserMessage, AssistantMessage, SystemMessage, ResultMessage, StreamEvent, RateLimitEvent, RateLimitInfo,
+    TaskStartedMessage, TaskProgressMessage, TaskNotificationMessage,
+    TextBlock, ThinkingBlock, ToolUseBlock, ToolResultBlock,
+)}
+
+
+def _encode(value: Any) -> Any:
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        fields = {f.name: _encode(getattr(value, f.name)) for f in dataclasses.fields(value)}
+        return {"__type__": type(value).__name__, **fields}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _encode(v) for k, v in value.items()}
+    return value
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    if isinstance(value, dict):
+        fields = {k: _decode(v) for k, v in value.items() if k != "__type__"}
+        return _TYPES[value["__type__"]](**fields) if "__type__" in value else fields
+    return value
+
+
+def _sdk_tools(server: Any) -> Any:
+    """Version and (name, description, input schema) of every tool an SDK MCP server lists."""
+    handlers = {cls.__name__: (cls, handler) for cls, handler in server.request_handlers.items()}
+    if "ListToolsRequest" not in handlers:
+        return {"version": server.version, "tools": []}
+    cls, handler = handlers["ListToolsRequest"]
+    call = handler(cls(method="tools/list"))
+    try:
+        call.send(None)  # the SDK's handler returns a precomputed list without suspending
+    except StopIteration as done:
+        tools = [(t.name, t.description, t.inputSchema) for t in done.value.root.tools]
+        return {"version": server.version, "tools": tools}
+    call.close()
+    raise ValueError(f"cannot list the tools of SDK MCP server {server.name!r} synchronously")
+
+
+def _key_value(name: str, value: Any) -> Any:
+    if name == "mcp_servers" and isinstance(value, dict):
+        # SDK servers hold a live instance; key them on the tools it registers instead
+        return {k: {**{ck: cv for ck, cv in cfg.items() if ck != "instance"},
+                    **({"tools": _sdk_tools(cfg["instance"])} if cfg.get("type") == "sdk" else {})}
+                if isinstance(cfg, dict) else str(cfg)
+                for k, cfg in value.items()}
+    return _encode(value)
+
+
+def cache_key(prompt: str, options: ClaudeAgentOptions, fingerprint: str | None = None) -> str:
+    fields = {name: _key_value(name, getattr(options, name, None)) for name in KEY_FIELDS}
+    payload = json.dumps({"prompt": prompt, "options": fields, "fingerprint": fingerprint},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def git_fingerprint(path: str | Path = ".") -> str:
+    """HEAD, uncommitted changes and untracked file contents; falls back to file sizes
+    and mtimes outside git."""
+    try:
+        head = subprocess.run(["git", "rev-parse", "HEAD"], cwd=path, capture_output=True,
+                              text=True, check=True).stdout
+        dirty = subprocess.run(["git", "status", "--porcelain", "-z"], cwd=path, capture_output=True,
+                               check=True).stdout
+        diff = subprocess.run(["git", "diff", "HEAD"], cwd=path, capture_output=True, check=True).stdout
+        untracked = subprocess.run(["git", "ls-files", "--others", "--exclude-standard", "-z"], cwd=path,
+                                   capture_output=True, check=True).stdout
+        h = hashlib.sha256(head.encode() + dirty + diff)
+        for name in sorted(filter(None, untracked.split(b"\0"))):  # git diff leaves these out
+            h.update(name + b"\0")
+            try:
+                with open(Path(path) / os.fsdecode(name), "rb") as f:
+                    while chunk := f.read(1 << 20):
+                        h.update(chunk)
+            except OSError:
+                h.update(b"<unreadable>")
+        return h.hexdigest()
+    except (OSError, subprocess.CalledProcessError):
+        h = hashlib.sha256()
+        for p in sorted(Path(path).rglob("*")):
+            if p.is_file():
+                st = p.stat()
+                h.update(f"{p}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+        return h.hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    saved_cost_usd: float = 0.0
+    saved_s: float = 0.0
+
+
+class ResponseCache:
+    def __init__(self, directory: str | Path, max_bytes: int = 100 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._size = sum(p.stat().st_size for p in self.directory.glob("*.jsonl"))
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.jsonl"
+
+    def get(self, key: str) -> list[Message] | None:
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                messages = [_decode(json.loads(line)) for line in f]
+        except FileNotFoundError:
+            return None
+        except (ValueError, KeyError, TypeError):
+            self._remove(path)  # unreadable or written by an incompatible SDK version
+            return None
+        os.utime(path)  # mtime doubles as the LRU clock
+        return messages
+
+    def put(self, key: str, messages: list[Message]) -> None:
+        path = self._path(key)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for msg in messages:
+                f.write(json.dumps(_encode(msg), default=str) + "\n")
+        old = path.stat().st_size if path.exists() else 0
+        os.replace(tmp, path)  # readers never see a partial entry
+        self._size += path.stat().st_size - old
+        self.stats.stores += 1
+        self._evict()
+
+    def _remove(self, path: Path) -> None:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+            self._size -= size
+        except FileNotFoundError:
+            pass
+
+    def _evict(self) -> None:
+        if self._size <= self.max_bytes:
+            return
+        entries = sorted(self.directory.glob("*.jsonl"), key=lambda p: p.stat().st_mtime)
+        for path in entries:
+            if self._size <= self.max_bytes:
+                break
+            self._remove(path)
+            self.stats.evictions += 1
+
+    def invalidate(self, prompt: str, options: ClaudeAgentOptions, fingerprint: str | None = None) -> bool:
+        path = self._path(cache_key(prompt, options, fingerprint))
+        existed = path.exists()
+        self._remove(path)
+        return existed
+
+    def clear(self) -> None:
+        for path in self.directory.glob("*.jsonl"):
+            self._remove(path)
+
+
+async def cached_query(
+    prompt: str,
+    options: ClaudeAgentOptions,
+    cache: ResponseCache,
+    fingerprint: str | None = None,
+    bypass: bool = False,
+) -> AsyncIterator[Message]:
+    """query() with the cache in front; bypass=True, resume and continue_conversation
+    neither read nor write it."""
+    if bypass or options.resume or options.continue_conversation:
+        async for msg in query(prompt=prompt, options=options):
+            yield msg
+        return
+
+    key = cache_key(prompt, options, fingerprint)
+    stored = cache.get(key)
+    if stored is not None:
+        cache.stats.hits += 1
+        for msg in stored:
+            if isinstance(msg, ResultMessage):
+                cache.stats.saved_cost_usd += msg.total_cost_usd or 0.0
+                cache.stats.saved_s += msg.duration_ms / 1000
+            yield msg
+        return
+
+    cache.stats.misses += 1
+    recorded: list[Message] = []
+    async for msg in query(prompt=prompt, options=options):
+        recorded.append(msg)
+        yield msg
+    result = recorded[-1] if recorded else None
+    if isinstance(result, ResultMessage) and result.subtype == "success" and not result.is_error:
+        cache.put(key, recorded)
+
+
+async def main():
+    cache = ResponseCache(os.environ.get("RESPONSE_CACHE_DIR", ".claude-response-cache"), max_bytes=50 * 1024 * 1024)
+    options = ClaudeAgentOptions(
+        system_prompt="You are a helpful assistant.",
+        max_turns=5,
+        permission_mode="bypassPermissions",
+    )
+
+    for attempt in range(2):
+        start = time.monotonic()
+        async for message in cached_query("What is 2 + 2?", options, cache):
+            if isinstance(message, ResultMessage):
+                print(f"Run {attempt + 1}: {message.result} ({time.monotonic() - start:.2f}s)")
+
+    # Repository-dependent prompts: the fingerprint changes whenever the tree does
+    review_options = ClaudeAgentOptions(allowed_tools=["Read", "Grep", "Glob"], permission_mode="bypassPermissions")
+    async for message in cached_query("Review the codebase for obvious bugs", review_options, cache,
+                                      fingerprint=git_fingerprint()):
+        if isinstance(message, ResultMessage) and message.subtype == "success":
+            print(f"Review: {(message.result or '')[:200]}")
+
+    s = cache.stats
+    print(f"hits={s.hits} misses={s.misses} stores={s.stores} evictions={s.evictions} "
+          f"saved ${s.saved_cost_usd:.4f} / {s.saved_s:.1f}s")
+
+asyncio.run(main())
@@ -0,0 +1,364 @@
+"""Compiled path/command rule engine for PreToolUse hooks and can_use_tool (Python).
+
+The hooks_example.py / permission_control.py pattern scans a list of
+substrings on every tool call. RuleEngine compiles the rules once instead:
+
+- Path globs (fnmatch syntax) become one alternation regex per action, with a
+  named group per rule, so a single match() both decides and tells you which
+  rule fired.
+- Command rules are indexed by program name (exact names in a dict; only the
+  few globbed names like "mkfs*" are fnmatch-ed). Commands are shlex-tokenized and split into
+  simple commands on ; && || | and $(...) / backticks, including those inside
+  quoted arguments; wrappers like sudo, env, timeout and nohup (also by
+  absolute path) are skipped, find -exec/-execdir/-ok commands are checked,
+  `sh -c "..."` (or -lc, -ec, ...) and eval are parsed recursively, and
+  combined short flags are expanded, so `sudo /bin/rm -r -f /` and `rm -fr /`
+  both match the rule "rm -rf".
+
+Deny rules win over allow rules. Every Decision carries the rule that matched.
+Commands the parser cannot resolve (unbalanced quotes or substitutions, a
+program name that is itself an expansion, `sh -c` without a script) are
+denied unless deny_unparseable=False.
+"""
+import asyncio
+import os
+import re
+import shlex
+from dataclasses import dataclass
+from fnmatch import fnmatch, translate
+from typing import Any, Literal
+from claude_agent_sdk import (
+    ClaudeSDKClient, ClaudeAgentOptions, HookMatcher, HookContext,
+    ResultMessage,
+)
+from claude_agent_sdk.types import (
+    ToolPermissionContext, PermissionResultAllow, PermissionResultDeny,
+)
+
+Action = Literal["allow", "deny"]
+
+PATH_TOOLS = {"Read": "file_path", "Write": "file_path", "Edit": "file_path",
+              "MultiEdit": "file_path", "NotebookEdit": "notebook_path"}
+WRAPPERS = {"sudo", "doas", "env", "nohup", "nice", "time", "command", "exec", "xargs", "builtin",
+            "timeout", "setsid", "stdbuf", "ionice", "unbuffer"}
+WRAPPER_VALUE_OPTS = {"sudo": {"-u", "-g", "-h", "-p", "-C"}, "env": {"-u"},
+                      "nice": {"-n"}, "xargs": {"-I", "-n", "-P", "-d", "-L"},
+                      "timeout": {"-s", "-k", "--signal", "--kill-after"}, "stdbuf": {"-i", "-o", "-e"},
+                      "ionice": {"-c", "-n", "-p"}}
+WRAPPER_POSITIONALS = {"timeout": 1}  # the duration before the wrapped command
+EVALUATORS = {"eval", "watch"}  # run their arguments as a shell command line
+FIND_EXEC = {"-exec", "-execdir", "-ok", "-okdir"}
+SHELLS = {"sh", "bash", "zsh", "dash", "ksh"}
+SEPARATORS = {";", "&&", "||", "|", "&", "(", ")", "$(", "`", "\n"}
+_PUNCTUATION = ";&|()<>`"
+FLAG_ALIASES = {
+    "rm": {"--recursive": "-r", "-R": "-r", "--force": "-f"},
+    "chmod": {"--recursive": "-R"},
+    "git": {"--force": "-f"},
+}
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    pattern: str
+    kind: Literal["path", "command"]
+    action: Action = "deny"
+    reason: str = ""
+
+
+@dataclass(frozen=True)
+class Decision:
+    action: Action
+    subject: str
+    rule: Rule | None = None
+
+    @property
+    def allowed(self) -> bool:
+        return self.action == "allow"
+
+    @property
+    def message(self) -> str:
+        if self.rule is None:
+            return f"{self.action}: {self.subject}"
+        return self.rule.reason or f"{self.subject} matched {self.rule.action} rule {self.rule.name!r}"
+
+
+@dataclass
+class _CommandRule:
+    rule: Rule
+    flags: frozenset[str]
+    args: tuple[str, ...]
+
+
+def _expand_flags(program: str, tokens: list[str]) -> tuple[set[str], list[str]]:
+    aliases = FLAG_ALIASES.get(program, {})
+    flags, args = set(), []
+    for tok in tokens:
+        tok = aliases.get(tok, tok)
+        if tok.startswith("--"):
+            flags.add(tok.split("=", 1)[0])
+        elif re.fullmatch(r"-[A-Za-z][A-Za-z-]*", tok):  # -rf, and the sloppy -r-f
+            flags.update(aliases.get(f"-{c}", f"-{c}") for c in tok[1:] if c != "-")
+        else:
+            args.append(tok)
+    return flags, args
+
+
+def _substitutions(token: str) -> list[str]:
+    """Bodies of the $(...) and `...` substitutions left inside a (quoted) token."""
+    bodies, i = [], 0
+    while i < len(token):
+        if token.startswith("$(", i):
+            depth, j = 1, i + 2
+            while j < len(token) and depth:
+                depth += {"(": 1, ")": -1}.get(token[j], 0)
+                j += 1
+            if depth:
+                raise ValueError(f"unterminated $( in {token!r}")
+            bodies.append(token[i + 2:j - 1])
+            i = j
+        elif token[i] == "`":
+            j = token.find("`", i + 1)
+            if j == -1:
+                raise ValueError(f"unterminated ` in {token!r}")
+            bodies.append(token[i + 1:j])
+            i = j + 1
+        else:
+            i += 1
+    return bodies
+
+
+def _shell_script(argv: list[str]) -> str | None:
+    """The script of `sh -c script`, also when -c is part of a cluster like -lc or -ec."""
+    for i, tok in enumerate(argv[1:], 1):
+        if tok.startswith("-") and not tok.startswith("--") and "c" in tok[1:]:
+            rest = [t for t in argv[i + 1:] if not t.startswith("-")]
+            if not rest:
+                raise ValueError(f"{argv[0]} -c without a command")
+            return rest[0]
+        if not tok.startswith("-"):
+            return None  # a script file; its contents are out of reach
+    return None
+
+
+def _find_exec(argv: list[str]) -> list[list[str]]:
+    """The commands of find's -exec/-execdir/-ok/-okdir actions, up to ; or +."""
+    commands, i = [], 1
+    while i < len(argv):
+        if argv[i] in FIND_EXEC:
+            end = next((j for j in range(i + 1, len(argv)) if argv[j] in (";", "+")), len(argv))
+            if end == i + 1:
+                raise ValueError(f"find {argv[i]} without a command")
+            commands.append(argv[i + 1:end])
+            i = end
+        i += 1
+    return commands
+
+
+def split_commands(command: str) -> list[list[str]]:
+    """Tokenize a shell command line into simple commands (argv lists).
+
+    Raises ValueError for anything that cannot be resolved statically.
+    """
+    lexer = shlex.shlex(command, posix=True, punctuation_chars=_PUNCTUATION)
+    lexer.whitespace_split = True
+    lexer.commenters = ""
+    simple, current, nested = [], [], []
+    for tok in lexer:
+        if tok in SEPARATORS or set(tok) <= set(_PUNCTUATION):
+            if current:
+                simple.append(current)
+            current = []
+        elif tok == "$":
+            if current:
+                simple.append(current)
+            current = []
+        else:
+            nested.extend(_substitutions(tok))  # "$(...)" survives quoting as one token
+            current.append(tok)
+    if current:
+        simple.append(current)
+
+    expanded = []
+    for body in nested:
+        expanded.extend(split_commands(body))
+    for argv in simple:
+        i, wrapped_by, positionals = 0, None, 0
+        while i < len(argv):  # skip wrappers, their options and VAR=value prefixes
+            tok = argv[i]
+            if os.path.basename(tok) in WRAPPERS:  # /usr/bin/env is env
+                wrapped_by = os.path.basename(tok)
+                positionals = WRAPPER_POSITIONALS.get(wrapped_by, 0)
+            elif wrapped_by and tok in WRAPPER_VALUE_OPTS.get(wrapped_by, ()):
+                i += 1
+            elif wrapped_by and positionals and not tok.startswith("-"):
+                positionals -= 1
+            elif not re.match(r"^\w+=", tok) and not (wrapped_by and tok.startswith("-")):
+                break
+            i += 1
+        argv = argv[i:]
+        if not argv:
+            continue
+        if "$" in argv[0] or "`" in argv[0]:
+            raise ValueError(f"program name is an expansion: {argv[0]!r}")
+        argv = [os.path.basename(argv[0])] + argv[1:]
+        if argv[0] in EVALUATORS:
+            expanded.extend(split_commands(" ".join(argv[1:])))
+        elif argv[0] in SHELLS and (script := _shell_script(argv)) is not None:
+            expanded.extend(split_commands(script))
+        else:
+            expanded.append(argv)
+            if argv[0] == "find":
+                for nested_argv in _find_exec(argv):
+                    expanded.extend(split_commands(shlex.join(nested_argv)))
+    return expanded
+
+
+class RuleEngine:
+    def __init__(self, rules: list[Rule], default: Action = "allow", deny_unparseable: bool = True):
+        self.rules = list(rules)
+        self.default = default
+        self.deny_unparseable = deny_unparseable
+        self._path_res: dict[Action, tuple[re.Pattern | None, dict[str, Rule]]] = {}
+        self._cmd_exact: dict[Action, dict[str, list[_CommandRule]]] = {}
+        self._cmd_glob: dict[Action, list[tuple[str, _CommandRule]]] = {}
+        self._compile()
+
+    def _compile(self) -> None:
+        for action in ("deny", "allow"):
+            groups, names = [], {}
+            exact: dict[str, list[_CommandRule]] = {}
+            globbed: list[tuple[str, _CommandRule]] = []
+            for i, rule in enumerate(r for r in self.rules if r.action == action):
+                if rule.kind == "path":
+                    group = f"r{i}"
+                    names[group] = rule
+                    groups.append(f"(?P<{group}>{translate(rule.pattern)})")
+                    continue
+                program, *rest = shlex.split(rule.pattern)
+                flags, args = _expand_flags(program, rest)
+                compiled = _CommandRule(rule, frozenset(flags), tuple(args))
+                if any(c in program for c in "*?["):
+                    globbed.append((program, compiled))
+                else:
+                    exact.setdefault(program, []).append(compiled)
+            self._path_res[action] = (re.compile("|".join(groups)) if groups else None, names)
+            self._cmd_exact[action] = exact
+            self._cmd_glob[action] = globbed
+
+    # -- matching ----------------------------------------------------------
+
+    def _match_path(self, action: Action, path: str) -> Rule | None:
+        regex, names = self._path_res[action]
+        if regex is None:
+            return None
+        candidates = dict.fromkeys((path, os.path.normpath(path), os.path.basename(path)))
+        for candidate in candidates:
+            if m := regex.match(candidate):
+                return names[m.lastgroup]
+        return None
+
+    def _match_argv(self, action: Action, argv: list[str]) -> Rule | None:
+        program = argv[0]
+        candidates = list(self._cmd_exact[action].get(program, ()))
+        candidates += [c for glob, c in self._cmd_glob[action] if fnmatch(program, glob)]
+        if not candidates:
+            return None
+        flags, args = _expand_flags(program, argv[1:])
+        for c in candidates:
+            if c.flags <= flags and all(any(fnmatch(a, pat) for a in args) for pat in c.args):
+                return c.rule
+        return None
+
+    def check_path(self, path: str) -> Decision:
+        for action in ("deny", "allow"):
+            if rule := self._match_path(action, path):
+                return Decision(action, path, rule)
+        return Decision(self.default, path)
+
+    def check_command(self, command: str) -> Decision:
+        try:
+            commands = split_commands(command)
+        except ValueError:
+            if self.deny_unparseable:
+                return Decision("deny", command, Rule("unparseable", "", "command", "deny",
+                                                      "Command could not be parsed safely"))
+            return Decision(self.default, command)
+        for action in ("deny", "allow"):
+            for argv in commands:
+                if rule := self._match_argv(action, argv):
+                    return Decision(action, command, rule)
+        return Decision(self.default, command)
+
+    def check_tool(self, tool_name: str, tool_input: dict[str, Any]) -> Decision:
+        if tool_name == "Bash":
+            return self.check_command(tool_input.get("command", ""))
+        if key := PATH_TOOLS.get(tool_name):
+            return self.check_path(tool_input.get(key, ""))
+        return Decision(self.default, tool_name)
+
+    # -- SDK adapters ------------------------------------------------------
+
+    async def pre_tool_use_hook(
+        self, input_data: dict[str, Any], tool_use_id: str | None, context: HookContext
+    ) -> dict[str, Any]:
+        decision = self.check_tool(input_data.get("tool_name", ""), input_data.get("tool_input", {}))
+        if decision.allowed:
+            return {}
+        return {
+            "hookSpecificOutput": {
+                "hookEventName": input_data["hook_event_name"],
+                "permissionDecision": "deny",
+                "permissionDecisionReason": decision.message,
+            }
+        }
+
+    async def can_use_tool(
+        self, tool_name: str, tool_input: dict, context: ToolPermissionContext
+    ) -> PermissionResultAllow | PermissionResultDeny:
+        decision = self.check_tool(tool_name, tool_input)
+        if decision.allowed:
+            return PermissionResultAllow(updated_input=tool_input)
+        return PermissionResultDeny(message=decision.message)
+
+
+RULES = [
+    Rule("env-files", "*.env", "path", reason="Environment files are protected"),
+    Rule("dotenv", "*/.env*", "path", reason="Environment files are protected"),
+    Rule("ssh-keys", "*/id_rsa*", "path", reason="SSH keys are protected"),
+    Rule("secrets-dir", "*/secrets/*", "path"),
+    Rule("secrets-dir-relative", "secrets/*", "path"),
+    Rule("credentials", "*credentials*", "path"),
+    Rule("rm-rf", "rm -rf", "command", reason="Recursive force delete blocked"),
+    Rule("dd", "dd if=*", "command"),
+    Rule("mkfs", "mkfs*", "command"),
+    Rule("shutdown", "shutdown", "command"),
+    Rule("force-push", "git push -f", "command"),
+]
+
+engine = RuleEngine(RULES)
+
+
+async def main():
+    for cmd in ["ls -la", "sudo /bin/rm -r -f /tmp/x", "echo ok && r''m -fr ~", 'bash -c "dd if=/dev/zero of=/dev/sda"',
+                "/usr/bin/env rm -rf /", "find . -name '*.tmp' -exec rm -rf {} +"]:
+        d = engine.check_command(cmd)
+        print(f"{d.action:5} {cmd!r} ({d.rule.name if d.rule else 'default'})")
+
+    options = ClaudeAgentOptions(
+        hooks={
+            "PreToolUse": [
+                HookMatcher(matcher="Bash|Read|Write|Edit|MultiEdit|NotebookEdit",
+                            hooks=[engine.pre_tool_use_hook]),
+            ],
+        },
+    )
+
+    async with ClaudeSDKClient(options=options) as client:
+        await client.query("Clean up the build directory")
+        async for message in client.receive_response():
+            if isinstance(message, ResultMessage):
+                print(message.result if message.subtype == "success" else f"Error: {message.subtype}")
+
+asyncio.run(main())
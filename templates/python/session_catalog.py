@@ -0,0 +1,321 @@
+"""SQLite-backed session catalog over ~/.claude/projects (Python).
+
+list_sessions() / get_session_info() stat and re-read session files on every
+call. SessionCatalog keeps their metadata in SQLite instead and updates it
+incrementally: for each <project>/<session-id>.jsonl it remembers the byte
+offset already parsed and only reads bytes appended since. A file that
+shrank or was replaced (new inode) is re-indexed from the start; a deleted
+file drops its row.
+
+Indexed per session: title (custom title > AI title > summary > first
+prompt), tag, cwd, git branch, created/updated timestamps, user turns,
+assistant messages, token usage and cost (summed from costUSD entries when
+the CLI records them). Queries are filtered and keyset-paginated by
+(updated_at, session_id), so listing cost does not grow with history size.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+from claude_agent_sdk import query, ClaudeAgentOptions, ResultMessage, SDKSessionInfo
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    parsed_offset INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    project TEXT NOT NULL,
+    path TEXT NOT NULL,
+    custom_title TEXT, ai_title TEXT, summary TEXT, first_prompt TEXT,
+    tag TEXT, cwd TEXT, git_branch TEXT,
+    created_at INTEGER, updated_at INTEGER NOT NULL,
+    user_turns INTEGER NOT NULL DEFAULT 0,
+    assistant_messages INTEGER NOT NULL DEFAULT 0,
+    input_tokens INTEGER NOT NULL DEFAULT 0,
+    output_tokens INTEGER NOT NULL DEFAULT 0,
+    cost_usd REAL NOT NULL DEFAULT 0,
+    is_sidechain INTEGER NOT NULL DEFAULT 0,
+    last_message_id TEXT
+);
+CREATE INDEX IF NOT EXISTS sessions_updated ON sessions(updated_at DESC, session_id DESC);
+CREATE INDEX IF NOT EXISTS sessions_tag ON sessions(tag, updated_at DESC);
+CREATE INDEX IF NOT EXISTS sessions_cwd ON sessions(cwd, updated_at DESC);
+"""
+SCHEMA_VERSION = 2  # bump when a column or how it is counted changes; the catalog is then rebuilt
+
+READ_CHUNK = 1024 * 1024
+
+
+def _config_dir() -> Path:
+    return Path(os.environ.get("CLAUDE_CONFIG_DIR", Path.home() / ".claude"))
+
+
+def _projects_dir() -> Path:
+    return _config_dir() / "projects"
+
+
+def _iso_to_ms(ts: Any) -> int | None:
+    if not isinstance(ts, str):
+        return None
+    try:
+        return int(datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp() * 1000)
+    except ValueError:
+        return None
+
+
+def _prompt_text(message: Any) -> str | None:
+    """First text of a real user prompt (not a tool_result), or None."""
+    if not isinstance(message, dict):
+        return None
+    content = message.get("content")
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        if any(isinstance(b, dict) and b.get("type") == "tool_result" for b in content):
+            return None
+        for b in content:
+            if isinstance(b, dict) and b.get("type") == "text":
+                return b.get("text")
+    return None
+
+
+@dataclass
+class SessionRow:
+    session_id: str
+    project: str
+    title: str
+    custom_title: str | None
+    first_prompt: str | None
+    tag: str | None
+    cwd: str | None
+    git_branch: str | None
+    created_at: int | None
+    updated_at: int
+    user_turns: int
+    assistant_messages: int
+    input_tokens: int
+    output_tokens: int
+    cost_usd: float
+    file_size: int
+
+    def to_sdk_info(self) -> SDKSessionInfo:
+        return SDKSessionInfo(
+            session_id=self.session_id, summary=self.title, last_modified=self.updated_at,
+            file_size=self.file_size, custom_title=self.custom_title, first_prompt=self.first_prompt,
+            git_branch=self.git_branch, cwd=self.cwd, tag=self.tag, created_at=self.created_at,
+        )
+
+
+class SessionCatalog:
+    def __init__(self, db_path: str | Path = "sessions.db", projects_dir: Path | None = None):
+        self.projects_dir = projects_dir or _projects_dir()
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self._db.executescript("DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS sessions;")
+            self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self._db.close()
+
+    # -- indexing ----------------------------------------------------------
+
+    def sync(self) -> dict[str, int]:
+        """Index new/changed session files; unchanged files are only stat()ed."""
+        stats = {"scanned": 0, "appended": 0, "reindexed": 0, "removed": 0}
+        with self._lock, self._db:
+            known = {r["path"]: r for r in self._db.execute("SELECT * FROM files")}
+            seen = set()
+            for project in (os.scandir(self.projects_dir) if self.projects_dir.is_dir() else ()):
+                if not project.is_dir():
+                    continue
+                for entry in os.scandir(project.path):
+                    if not entry.name.endswith(".jsonl") or not entry.is_file():
+                        continue
+                    stats["scanned"] += 1
+                    seen.add(entry.path)
+                    st = entry.stat()
+                    prev = known.get(entry.path)
+                    if prev and prev["size"] == st.st_size and prev["mtime_ns"] == st.st_mtime_ns:
+                        continue
+                    reset = not prev or prev["inode"] != st.st_ino or st.st_size < prev["parsed_offset"]
+                    stats["reindexed" if reset else "appended"] += 1
+                    self._ingest(project.name, entry.path, entry.name[:-6], st, reset,
+                                 0 if reset else prev["parsed_offset"])
+            for path in known.keys() - seen:
+                self._db.execute("DELETE FROM sessions WHERE path = ?", (path,))
+                self._db.execute("DELETE FROM files WHERE path = ?", (path,))
+                stats["removed"] += 1
+        return stats
+
+    def _ingest(self, project: str, path: str, session_id: str, st: os.stat_result,
+                reset: bool, offset: int) -> None:
+        if reset:
+            self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        row = self._db.execute("SELECT * FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        s: dict[str, Any] = dict(row) if row else {
+            "session_id": session_id, "project": project, "path": path,
+            "custom_title": None, "ai_title": None, "summary": None, "first_prompt": None,
+            "tag": None, "cwd": None, "git_branch": None, "created_at": None,
+            "updated_at": st.st_mtime_ns // 1_000_000, "user_turns": 0, "assistant_messages": 0,
+            "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0, "is_sidechain": 0,
+            "last_message_id": None,
+        }
+
+        parsed, carry = offset, b""
+        with open(path, "rb") as f:
+            f.seek(offset)
+            while chunk := f.read(READ_CHUNK):
+                data = carry + chunk
+                end = data.rfind(b"\n") + 1  # a partial last line waits for the next chunk (or sync)
+                for line in data[:end - 1].split(b"\n") if end else ():
+                    try:
+                        e = json.loads(line)
+                    except ValueError:
+                        e = None
+                    if isinstance(e, dict):
+                        self._apply(s, e, first=parsed == 0)
+                    parsed += len(line) + 1
+                carry = data[end:]
+
+        s["updated_at"] = max(s["updated_at"] or 0, st.st_mtime_ns // 1_000_000)
+        columns = ", ".join(s)
+        self._db.execute(
+            f"INSERT OR REPLACE INTO sessions ({columns}) VALUES ({', '.join('?' * len(s))})",
+            tuple(s.values()),
+        )
+        self._db.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+            (path, session_id, st.st_ino, st.st_size, st.st_mtime_ns, parsed),
+        )
+
+    @staticmethod
+    def _apply(s: dict[str, Any], e: dict[str, Any], first: bool) -> None:
+        kind = e.get("type")
+        if first and e.get("isSidechain"):
+            s["is_sidechain"] = 1
+        if (ts := _iso_to_ms(e.get("timestamp"))) is not None:
+            s["created_at"] = s["created_at"] or ts
+            s["updated_at"] = max(s["updated_at"] or 0, ts)
+        s["cwd"] = e.get("cwd") or s["cwd"]
+        s["git_branch"] = e.get("gitBranch") or s["git_branch"]
+        if kind == "custom-title":
+            s["custom_title"] = e.get("customTitle") or s["custom_title"]
+        elif e.get("aiTitle"):
+            s["ai_title"] = e["aiTitle"]
+        elif kind == "summary":
+            s["summary"] = e.get("summary") or s["summary"]
+        elif kind == "tag":
+            s["tag"] = e.get("tag") or None  # empty tag clears it
+        elif kind == "user" and not e.get("isMeta") and not e.get("isSidechain"):
+            text = _prompt_text(e.get("message"))
+            if text:
+                s["user_turns"] += 1
+                s["first_prompt"] = s["first_prompt"] or text.replace("\n", " ").strip()[:200]
+        elif kind == "assistant" and not e.get("isSidechain"):
+            message = e.get("message") or {}
+            # The CLI writes one line per content block, each repeating the
+            # message id and its usage: count a message once per id.
+            if message.get("id") and message["id"] == s["last_message_id"]:
+                return
+            s["last_message_id"] = message.get("id")
+            s["assistant_messages"] += 1
+            usage = message.get("usage") or {}
+            s["input_tokens"] += (usage.get("input_tokens", 0)
+                                  + usage.get("cache_read_input_tokens", 0)
+                                  + usage.get("cache_creation_input_tokens", 0))
+            s["output_tokens"] += usage.get("output_tokens", 0)
+            s["cost_usd"] += e.get("costUSD") or 0.0
+
+    # -- queries -----------------------------------------------------------
+
+    def list(
+        self,
+        *,
+        tag: str | None = None,
+        cwd: str | None = None,
+        project: str | None = None,
+        text: str | None = None,
+        since_ms: int | None = None,
+        limit: int = 50,
+        after: tuple[int, str] | None = None,
+    ) -> list[SessionRow]:
+        """Newest first. Pass the last row's (updated_at, session_id) as `after` for the next page."""
+        where, params = ["s.is_sidechain = 0",
+                         "COALESCE(custom_title, ai_title, summary, first_prompt) IS NOT NULL"], []
+        for clause, value in (("s.tag = ?", tag), ("s.cwd = ?", cwd), ("s.project = ?", project),
+                              ("s.updated_at >= ?", since_ms)):
+            if value is not None:
+                where.append(clause)
+                params.append(value)
+        if text:
+            where.append("COALESCE(custom_title, ai_title, summary, first_prompt) LIKE ?")
+            params.append(f"%{text}%")
+        if after:
+            where.append("(s.updated_at, s.session_id) < (?, ?)")
+            params.extend(after)
+        sql = (
+            "SELECT s.*, COALESCE(custom_title, ai_title, summary, first_prompt) AS title, "
+            "f.size AS file_size FROM sessions s JOIN files f ON f.path = s.path "
+            f"WHERE {' AND '.join(where)} ORDER BY s.updated_at DESC, s.session_id DESC LIMIT ?"
+        )
+        with self._lock:
+            rows = self._db.execute(sql, (*params, limit)).fetchall()
+        fields = SessionRow.__dataclass_fields__
+        return [SessionRow(**{k: r[k] for k in fields}) for r in rows]
+
+    def get(self, session_id: str) -> SessionRow | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT s.*, COALESCE(custom_title, ai_title, summary, first_prompt) AS title, "
+                "f.size AS file_size FROM sessions s JOIN files f ON f.path = s.path "
+                "WHERE s.session_id = ?", (session_id,)).fetchone()
+        return SessionRow(**{k: row[k] for k in SessionRow.__dataclass_fields__}) if row else None
+
+    async def watch(self, interval_s: float = 5.0) -> None:
+        """Keep the catalog in sync until cancelled."""
+        while True:
+            await asyncio.to_thread(self.sync)
+            await asyncio.sleep(interval_s)
+
+
+async def main():
+    catalog = SessionCatalog(_config_dir() / "session-catalog.db")
+    print(f"Sync: {await asyncio.to_thread(catalog.sync)}")
+
+    page = catalog.list(limit=10)
+    for row in page:
+        print(f"{row.session_id}  {row.user_turns:>3} turns  ${row.cost_usd:.2f}  "
+              f"[{row.tag or '-'}] {row.title[:60]}")
+    if len(page) == 10:
+        next_page = catalog.list(limit=10, after=(page[-1].updated_at, page[-1].session_id))
+        print(f"... next page starts with {next_page[0].session_id if next_page else 'nothing'}")
+
+    if page:
+        options = ClaudeAgentOptions(
+            resume=page[0].session_id,
+            max_turns=3,
+            permission_mode="bypassPermissions",
+        )
+        async for msg in query(prompt="Summarize where we left off", options=options):
+            if isinstance(msg, ResultMessage) and msg.subtype == "success":
+                print(f"Resumed: {msg.result[:200] if msg.result else ''}")
+
+    catalog.close()
+
+asyncio.run(main())
@@ -0,0 +1,239 @@
+"""Lazy, seekable reader for session transcripts (Python).
+
+get_session_messages() parses the whole JSONL transcript into a list before
+returning anything. SessionReader memory-maps the file and, on first use,
+builds a compact offset index (byte offset, length, uuid, parent uuid per
+entry). The conversation chain is then resolved the same way the SDK does
+(newest main-chain leaf, walked back via parentUuid), but only as a list of
+entry numbers — message bodies are parsed one at a time, on demand.
+
+That gives forward and reverse iteration, page reads, tail(n) and seeking by
+message UUID with memory proportional to the number of entries rather than
+the transcript size. When the transcript grows, refresh() indexes only the
+appended bytes.
+"""
+import asyncio
+import json
+import mmap
+import os
+from array import array
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+from claude_agent_sdk import (
+    query, ClaudeAgentOptions, ResultMessage, SessionMessage,
+    fork_session, list_sessions,
+)
+
+_TRANSCRIPT_TYPES = {"user", "assistant", "progress", "system", "attachment"}
+_F_MESSAGE, _F_HIDDEN = 1, 2  # user/assistant entry; meta/sidechain/team entry
+
+
+def find_session_file(session_id: str, projects_dir: Path | None = None) -> Path | None:
+    root = projects_dir or Path(os.environ.get("CLAUDE_CONFIG_DIR", Path.home() / ".claude")) / "projects"
+    for project in root.iterdir() if root.is_dir() else ():
+        candidate = project / f"{session_id}.jsonl"
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+class SessionReader:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._file = None
+        self._mm: mmap.mmap | None = None
+        self._reset_index()
+
+    def _reset_index(self) -> None:
+        self._indexed_to = 0
+        self._inode: int | None = None
+        # Per-entry index (entry number = position in these arrays)
+        self._offsets = array("Q")
+        self._lengths = array("I")
+        self._flags = bytearray()
+        self._uuids: list[str] = []
+        self._parents: list[str | None] = []
+        self._by_uuid: dict[str, int] = {}
+        # Visible conversation chain, as entry numbers in chronological order
+        self._chain = array("I")
+        self._chain_pos: dict[str, int] = {}
+
+    @classmethod
+    def for_session(cls, session_id: str, projects_dir: Path | None = None) -> "SessionReader":
+        path = find_session_file(session_id, projects_dir)
+        if path is None:
+            raise FileNotFoundError(f"No transcript for session {session_id}")
+        return cls(path)
+
+    def __enter__(self) -> "SessionReader":
+        self.refresh()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # -- indexing ----------------------------------------------------------
+
+    def refresh(self) -> None:
+        """Index bytes appended since the last call (or everything, first time)."""
+        st = self.path.stat()
+        if self._inode not in (None, st.st_ino) or st.st_size < self._indexed_to:
+            self._reset_index()  # file was replaced or truncated: start over
+        if st.st_size == self._indexed_to and self._mm is not None:
+            return
+        self.close()
+        self._file = open(self.path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if st.st_size else None
+        self._inode = st.st_ino
+        if self._mm is not None:
+            self._index_from(self._indexed_to)
+        self._build_chain()
+
+    def _index_from(self, pos: int) -> None:
+        mm = self._mm
+        size = len(mm)
+        while pos < size:
+            end = mm.find(b"\n", pos)
+            if end == -1:
+                break  # partial trailing line; picked up by the next refresh()
+            line = mm[pos:end]
+            start, pos = pos, end + 1
+            if b'"uuid"' not in line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(entry, dict) or entry.get("type") not in _TRANSCRIPT_TYPES:
+                continue
+            uuid = entry.get("uuid")
+            if not isinstance(uuid, str):
+                continue
+            flags = _F_MESSAGE if entry["type"] in ("user", "assistant") else 0
+            if entry.get("isMeta") or entry.get("isSidechain") or entry.get("teamName"):
+                flags |= _F_HIDDEN
+            self._by_uuid[uuid] = len(self._uuids)
+            self._offsets.append(start)
+            self._lengths.append(end - start)
+            self._flags.append(flags)
+            self._uuids.append(uuid)
+            self._parents.append(entry.get("parentUuid"))
+        self._indexed_to = pos
+
+    def _build_chain(self) -> None:
+        """Resolve the main conversation chain, mirroring get_session_messages()."""
+        has_child = set(filter(None, self._parents))
+        leaves = []
+        for i, uuid in enumerate(self._uuids):
+            if uuid in has_child:
+                continue
+            cur, seen = i, set()
+            while cur is not None and cur not in seen:
+                seen.add(cur)
+                if self._flags[cur] & _F_MESSAGE:
+                    leaves.append(cur)
+                    break
+                parent = self._parents[cur]
+                cur = self._by_uuid.get(parent) if parent else None
+        main = [i for i in leaves if not self._flags[i] & _F_HIDDEN]
+        chain: list[int] = []
+        if leaves:
+            cur, seen = max(main or leaves), set()
+            while cur is not None and cur not in seen:
+                seen.add(cur)
+                chain.append(cur)
+                parent = self._parents[cur]
+                cur = self._by_uuid.get(parent) if parent else None
+        chain.reverse()
+        visible = [i for i in chain if self._flags[i] & _F_MESSAGE and not self._flags[i] & _F_HIDDEN]
+        self._chain = array("I", visible)
+        self._chain_pos = {self._uuids[i]: pos for pos, i in enumerate(visible)}
+
+    # -- reading -----------------------------------------------------------
+
+    def _load(self, entry_num: int) -> SessionMessage:
+        start = self._offsets[entry_num]
+        raw: dict[str, Any] = json.loads(self._mm[start:start + self._lengths[entry_num]])
+        return SessionMessage(
+            type="user" if raw.get("type") == "user" else "assistant",
+            uuid=raw.get("uuid", ""),
+            session_id=raw.get("sessionId", ""),
+            message=raw.get("message"),
+            parent_tool_use_id=None,
+        )
+
+    def __len__(self) -> int:
+        return len(self._chain)
+
+    def __getitem__(self, pos: int) -> SessionMessage:
+        return self._load(self._chain[pos])
+
+    def __iter__(self) -> Iterator[SessionMessage]:
+        for entry_num in self._chain:
+            yield self._load(entry_num)
+
+    def __reversed__(self) -> Iterator[SessionMessage]:
+        for pos in range(len(self._chain) - 1, -1, -1):
+            yield self._load(self._chain[pos])
+
+    def page(self, start: int, limit: int) -> list[SessionMessage]:
+        return [self._load(i) for i in self._chain[start:start + limit]]
+
+    def tail(self, n: int) -> list[SessionMessage]:
+        return self.page(max(0, len(self._chain) - n), n)
+
+    def index_of(self, message_uuid: str) -> int:
+        """Position of a message in the conversation; raises KeyError if absent."""
+        return self._chain_pos[message_uuid]
+
+    def iter_from(self, message_uuid: str, reverse: bool = False) -> Iterator[SessionMessage]:
+        pos = self.index_of(message_uuid)
+        positions = range(pos, -1, -1) if reverse else range(pos, len(self._chain))
+        for p in positions:
+            yield self._load(self._chain[p])
+
+
+def _is_prompt(msg: SessionMessage) -> bool:
+    content = (msg.message or {}).get("content")
+    return msg.type == "user" and (
+        isinstance(content, str)
+        or any(b.get("type") == "text" for b in content or [] if isinstance(b, dict))
+    )
+
+
+async def main():
+    sessions = list_sessions(limit=1)
+    if not sessions:
+        print("No sessions found")
+        return
+
+    with SessionReader.for_session(sessions[0].session_id) as reader:
+        print(f"{len(reader)} messages in {reader.path.name}")
+        for msg in reader.tail(3):
+            print(f"  {msg.type}: {str((msg.message or {}).get('content'))[:80]}")
+
+        # Resume from the second-to-last user prompt without loading the transcript
+        prompts = (m for m in reversed(reader) if _is_prompt(m))
+        next(prompts, None)
+        branch_point = next(prompts, None)
+
+    if branch_point is None:
+        print("Not enough prompts to branch from")
+        return
+
+    fork = fork_session(sessions[0].session_id, up_to_message_id=branch_point.uuid)
+    options = ClaudeAgentOptions(resume=fork.session_id, max_turns=5, permission_mode="bypassPermissions")
+    async for msg in query(prompt="Let's take a different approach from here", options=options):
+        if isinstance(msg, ResultMessage) and msg.subtype == "success":
+            print(f"Fork result: {msg.result[:200] if msg.result else ''}")
+
+asyncio.run(main())
@@ -0,0 +1,201 @@
+"""Streaming renderer with time-to-first-token metrics (Python).
+
+With include_partial_messages=True the SDK yields StreamEvent messages that
+wrap raw Anthropic API stream events (message_start, content_block_delta,
+message_delta, ...). StreamRenderer prints text deltas as they arrive,
+reassembles tool_use input from input_json_delta fragments (an interrupted
+tool_use comes through as {"partial_json": <fragments>}), and records per
+turn: time to first token, output tokens per second and inter-token gaps.
+
+If no StreamEvents arrive (option off, or a CLI that does not emit them) it
+falls back to rendering each complete AssistantMessage; TTFT is then measured
+to the full message and the turn is marked streamed=False.
+"""
+import asyncio
+import json
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+from claude_agent_sdk import (
+    query, ClaudeAgentOptions,
+    AssistantMessage, ResultMessage, StreamEvent, TextBlock, UserMessage,
+)
+
+
+@dataclass
+class TurnMetrics:
+    turn: int
+    requested_at: float
+    streamed: bool = True
+    first_token_at: float | None = None
+    last_token_at: float | None = None
+    output_tokens: int = 0
+    gaps: list[float] = field(default_factory=list)
+
+    @property
+    def ttft_s(self) -> float | None:
+        return self.first_token_at - self.requested_at if self.first_token_at else None
+
+    @property
+    def tokens_per_s(self) -> float | None:
+        if not self.streamed or not self.first_token_at or not self.output_tokens:
+            return None
+        span = self.last_token_at - self.first_token_at
+        return self.output_tokens / span if span > 0 else None
+
+    @property
+    def max_gap_s(self) -> float:
+        return max(self.gaps, default=0.0)
+
+    def summary(self) -> str:
+        ttft = f"{self.ttft_s * 1000:.0f}ms" if self.ttft_s is not None else "n/a"
+        tps = f"{self.tokens_per_s:.1f} tok/s" if self.tokens_per_s else "n/a"
+        mode = "" if self.streamed else " (no partial events)"
+        return (f"turn {self.turn}: ttft {ttft}, {self.output_tokens} tokens, {tps}, "
+                f"max gap {self.max_gap_s * 1000:.0f}ms{mode}")
+
+
+class StreamRenderer:
+    def __init__(
+        self,
+        write: Callable[[str], Any] = sys.stdout.write,
+        on_tool_input: Callable[[str, str, dict[str, Any]], Any] | None = None,
+    ):
+        self.write = write
+        self.on_tool_input = on_tool_input
+        self.turns: list[TurnMetrics] = []
+        self._requested_at = time.monotonic()
+        self._blocks: dict[int, dict[str, Any]] = {}  # content block index -> state
+        self._streamed_ids: set[str] = set()
+        self._turn_open = False  # cleared when tool results hand control back
+
+    def begin(self) -> None:
+        """Mark when the prompt was sent; call right before query()."""
+        self._requested_at = time.monotonic()
+
+    @property
+    def current(self) -> TurnMetrics | None:
+        return self.turns[-1] if self.turns else None
+
+    def _new_turn(self, streamed: bool) -> TurnMetrics:
+        turn = TurnMetrics(len(self.turns) + 1, self._requested_at, streamed=streamed)
+        self.turns.append(turn)
+        return turn
+
+    def _token(self, turn: TurnMetrics) -> None:
+        now = time.monotonic()
+        if turn.first_token_at is None:
+            turn.first_token_at = now
+        elif turn.last_token_at is not None:
+            turn.gaps.append(now - turn.last_token_at)
+        turn.last_token_at = now
+
+    def handle(self, msg: Any) -> None:
+        if isinstance(msg, StreamEvent):
+            if msg.parent_tool_use_id is None:  # subagent streams are not rendered
+                self._on_event(msg.event)
+        elif isinstance(msg, AssistantMessage):
+            self._on_assistant(msg)
+        elif isinstance(msg, UserMessage):
+            # Tool results: the next model turn starts "now"
+            self._requested_at = time.monotonic()
+            self._turn_open = False
+
+    def _on_event(self, event: dict[str, Any]) -> None:
+        kind = event.get("type")
+        if kind == "message_start":
+            self._new_turn(streamed=True)
+            self._turn_open = True
+            self._blocks.clear()
+            if msg_id := event.get("message", {}).get("id"):
+                self._streamed_ids.add(msg_id)
+            return
+        turn = self.current
+        if turn is None:
+            return
+        if kind == "content_block_start":
+            block = event.get("content_block", {})
+            self._blocks[event.get("index", 0)] = {
+                "type": block.get("type"), "id": block.get("id"),
+                "name": block.get("name"), "json": [],
+            }
+        elif kind == "content_block_delta":
+            delta = event.get("delta", {})
+            state = self._blocks.get(event.get("index", 0), {})
+            if delta.get("type") == "text_delta":
+                self._token(turn)
+                self.write(delta.get("text", ""))
+            elif delta.get("type") == "thinking_delta":
+                self._token(turn)
+            elif delta.get("type") == "input_json_delta" and state:
+                self._token(turn)
+                state["json"].append(delta.get("partial_json", ""))
+        elif kind == "content_block_stop":
+            state = self._blocks.pop(event.get("index", 0), None)
+            if state and state["type"] == "tool_use":
+                raw = "".join(state["json"])
+                try:
+                    tool_input = json.loads(raw) if raw else {}
+                    partial = ""
+                except ValueError:  # interrupted or truncated tool_use: pass the fragments on as-is
+                    tool_input = {"partial_json": raw}
+                    partial = " (partial)"
+                if self.on_tool_input:
+                    self.on_tool_input(state["id"], state["name"], tool_input)
+                else:
+                    self.write(f"\n[tool] {state['name']}{partial} {json.dumps(tool_input)[:200]}\n")
+            elif state and state["type"] == "text":
+                self.write("\n")
+        elif kind == "message_delta":
+            usage = event.get("usage") or {}
+            turn.output_tokens = usage.get("output_tokens", turn.output_tokens)
+
+    def _on_assistant(self, msg: AssistantMessage) -> None:
+        if msg.parent_tool_use_id is not None:
+            return
+        turn = self.current
+        if msg.message_id in self._streamed_ids or (
+            msg.message_id is None and self._turn_open and turn and turn.streamed
+        ):
+            return  # already rendered from partial events
+        # Fallback: no partial events for this message
+        if not self._turn_open or turn is None or turn.streamed:
+            turn = self._new_turn(streamed=False)
+            self._turn_open = True
+        self._token(turn)
+        turn.output_tokens += (msg.usage or {}).get("output_tokens", 0)
+        for block in msg.content:
+            if isinstance(block, TextBlock):
+                self.write(block.text + "\n")
+
+    def report(self) -> str:
+        ttfts = [t.ttft_s for t in self.turns if t.ttft_s is not None]
+        lines = [t.summary() for t in self.turns]
+        if ttfts:
+            lines.append(f"first-turn ttft {ttfts[0] * 1000:.0f}ms, "
+                         f"mean ttft {sum(ttfts) / len(ttfts) * 1000:.0f}ms over {len(ttfts)} turns")
+        return "\n".join(lines)
+
+
+async def main():
+    options = ClaudeAgentOptions(
+        include_partial_messages=True,
+        allowed_tools=["Read", "Glob"],
+        permission_mode="bypassPermissions",
+        max_turns=5,
+    )
+
+    renderer = StreamRenderer()
+    renderer.begin()
+    async for msg in query(prompt="Explain what this project does in a few paragraphs", options=options):
+        renderer.handle(msg)
+        if isinstance(msg, ResultMessage):
+            if msg.subtype != "success":
+                print(f"\nError: {msg.subtype}")
+            print(f"\nCost: ${msg.total_cost_usd or 0:.4f}")
+
+    print(renderer.report())
+
+asyncio.run(main())
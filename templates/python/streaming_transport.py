@@ -0,0 +1,311 @@
+"""Bounded-memory incremental parsing of CLI stdout (Python).
+
+The default transport decodes stdout to text and appends each piece to a
+buffer. After every piece it retries json.loads() on the whole buffer and
+fails once the buffer passes max_buffer_size. A 40 MB file read in one tool
+result therefore costs quadratic parse time and a full in-memory copy. With
+a few sessions in parallel, memory spikes or the run fails.
+
+StreamingCLITransport keeps the real CLI subprocess but replaces the stdout
+reader with IncrementalDecoder, which scans raw bytes as they arrive:
+
+- JSON structure and short strings are buffered; each message is parsed
+  exactly once, when its closing newline arrives;
+- a string longer than max_string_bytes (a file body, a huge tool result) is
+  never held whole. Its first preview_bytes stay inline, followed by a
+  "[… N bytes spilled to <path>]" note, and the rest streams into a spill
+  file (spill_dir) or is dropped (spill_dir=None). read_spilled() loads it back;
+- parsing uses orjson when it is installed (pip install orjson), else json.
+
+DecoderStats counts bytes, messages, spills and parse time, and reports
+throughput. Only max_buffer_size bytes of structure are ever retained per
+message.
+
+scripts/bench_decoder.py benchmarks the decoder on raw stdout bytes.
+"""
+import asyncio
+import json
+import re
+import tempfile
+import time
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO
+import anyio
+from claude_agent_sdk import (
+    ClaudeSDKClient, ClaudeAgentOptions, ResultMessage,
+    CLIConnectionError, CLIJSONDecodeError, ProcessError,
+)
+from claude_agent_sdk._internal.transport.subprocess_cli import SubprocessCLITransport
+
+try:
+    import orjson
+    fast_loads: Callable[[bytes], Any] = orjson.loads
+except ImportError:  # optional; the stdlib parser is used instead
+    fast_loads = json.loads
+
+_OUTSIDE = re.compile(rb'["\n]')   # outside a string: next string or end of message
+_HIGH_SURROGATE = re.compile(rb"\\u[dD][89abAB][0-9a-fA-F]{2}$")
+
+
+@dataclass
+class DecoderStats:
+    bytes_in: int = 0
+    messages: int = 0
+    skipped_lines: int = 0        # non-JSON stdout lines, e.g. sandbox debug output
+    strings_spilled: int = 0
+    strings_truncated: int = 0    # oversized strings dropped without a spill_dir
+    spilled_bytes: int = 0
+    parse_s: float = 0.0          # inside loads()
+    feed_s: float = 0.0           # scanning, including parse_s
+    max_message_bytes: int = 0    # largest message as received
+    max_retained_bytes: int = 0   # largest message as buffered after spilling
+    started_at: float | None = None
+    spills: list[Path] = field(default_factory=list)
+
+    @property
+    def bytes_per_s(self) -> float:
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+        return self.bytes_in / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        return (f"{self.messages} messages, {self.bytes_in / 1e6:.1f} MB at {self.bytes_per_s / 1e6:.1f} MB/s, "
+                f"parse {self.parse_s * 1000:.0f}ms / scan {self.feed_s * 1000:.0f}ms, "
+                f"largest {self.max_message_bytes / 1e6:.1f} MB → {self.max_retained_bytes / 1e3:.0f} KB retained, "
+                f"{self.strings_spilled} spilled ({self.spilled_bytes / 1e6:.1f} MB), "
+                f"{self.strings_truncated} truncated, {self.skipped_lines} non-JSON lines")
+
+
+def _safe_prefix(raw: bytes) -> bytes:
+    """Cut raw JSON string content so it ends on a whole character: no partial escape,
+    no high surrogate missing its pair, no partial UTF-8 sequence."""
+    while (i := raw.rfind(b"\\", max(len(raw) - 6, 0))) != -1:
+        if (i - len(raw[:i].rstrip(b"\\"))) % 2:  # this backslash is itself escaped
+            break
+        if len(raw) - i >= (6 if raw[i + 1:i + 2] == b"u" else 2) and not _HIGH_SURROGATE.match(raw, i):
+            break
+        raw = raw[:i]  # dropping half a surrogate pair can expose the other half, hence the loop
+    return raw.decode("utf-8", "ignore").encode("utf-8")
+
+
+def read_spilled(path: str | Path) -> str:
+    """Decode a spill file (raw JSON string content) back into the original text."""
+    return json.loads(b'"' + Path(path).read_bytes() + b'"')
+
+
+class IncrementalDecoder:
+    """Sans-IO decoder for newline-delimited JSON: feed() bytes, get complete messages back."""
+
+    def __init__(
+        self,
+        max_string_bytes: int = 256 * 1024,
+        preview_bytes: int = 4096,
+        spill_dir: str | Path | None = None,
+        max_buffer_size: int = 1024 * 1024,
+        loads: Callable[[bytes], Any] = fast_loads,
+    ):
+        self.max_string_bytes = max_string_bytes
+        self.preview_bytes = min(preview_bytes, max_string_bytes)
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.max_buffer_size = max_buffer_size
+        self.loads = loads
+        self.stats = DecoderStats()
+        self._state = "start"  # start | skip | json
+        self._in_string = False
+        self._backslashes = 0     # trailing backslashes of the string content so far
+        self._out = bytearray()   # the message so far, oversized strings already replaced
+        self._str = bytearray()   # current string content while it is small
+        self._spill: BinaryIO | None = None
+        self._spill_path: Path | None = None
+        self._str_len = 0
+        self._overflow = False
+        self._received = 0        # bytes of the current message as received
+
+    def feed(self, chunk: bytes) -> list[dict[str, Any]]:
+        started = time.perf_counter()
+        if self.stats.started_at is None:
+            self.stats.started_at = started
+        self.stats.bytes_in += len(chunk)
+        messages: list[dict[str, Any]] = []
+        i, n = 0, len(chunk)
+        while i < n:
+            if self._state == "start":
+                stripped = chunk[i:].lstrip()
+                if not stripped:
+                    break
+                i = n - len(stripped)
+                if chunk[i] == ord("{"):
+                    self._state = "json"
+                    self._received = 0
+                else:
+                    self._state = "skip"
+                    self.stats.skipped_lines += 1
+            elif self._state == "skip":
+                j = chunk.find(b"\n", i)
+                if j == -1:
+                    break
+                self._state, i = "start", j + 1
+            elif self._in_string:
+                i = self._scan_string(chunk, i)
+            else:
+                m = _OUTSIDE.search(chunk, i)
+                j = m.start() if m else n
+                self._out += chunk[i:j]
+                self._received += j - i
+                if m is None:
+                    i = n
+                elif chunk[j] == ord('"'):
+                    self._out += b'"'
+                    self._received += 1
+                    self._in_string = True
+                    i = j + 1
+                else:
+                    messages.append(self._finish())
+                    i = j + 1
+                if len(self._out) > self.max_buffer_size:
+                    size = len(self._out)
+                    self._reset()
+                    raise CLIJSONDecodeError(
+                        f"<{size} bytes of JSON structure>",
+                        ValueError(f"Retained message exceeds max_buffer_size of {self.max_buffer_size} bytes"),
+                    )
+        self.stats.feed_s += time.perf_counter() - started
+        return messages
+
+    def _scan_string(self, chunk: bytes, i: int) -> int:
+        """Consume string content up to its closing quote, jumping from quote to quote."""
+        n, start = len(chunk), i
+        while (j := chunk.find(b'"', i)) != -1:
+            k = j
+            while k > start and chunk[k - 1] == 0x5C:  # backslashes right before the quote
+                k -= 1
+            run = j - k + (self._backslashes if k == start else 0)
+            if run % 2 == 0:  # not escaped: the string ends here
+                self._append(chunk[start:j])
+                self._backslashes = 0
+                self._close_string()
+                return j + 1
+            i = j + 1
+        self._append(chunk[start:])
+        k = n
+        while k > start and chunk[k - 1] == 0x5C:
+            k -= 1
+        # an escape may continue in the next chunk; carry the trailing backslash count over
+        self._backslashes = n - k + (self._backslashes if k == start else 0)
+        return n
+
+    def _append(self, data: bytes) -> None:
+        self._str_len += len(data)
+        self._received += len(data)
+        if self._spill is not None:
+            self._spill.write(data)
+        elif not self._overflow:
+            self._str += data
+            if len(self._str) > self.max_string_bytes:
+                self._overflow = True
+                if self.spill_dir is not None:
+                    self.spill_dir.mkdir(parents=True, exist_ok=True)
+                    fd, name = tempfile.mkstemp(suffix=".jsonstr", dir=self.spill_dir)
+                    self._spill_path = Path(name)
+                    self._spill = open(fd, "wb")
+                    self._spill.write(self._str)
+                preview = _safe_prefix(bytes(self._str[:self.preview_bytes]))
+                self._str = bytearray(preview)
+
+    def _close_string(self) -> None:
+        if self._overflow:
+            if self._spill is not None:
+                self._spill.close()
+                self._spill = None
+                self.stats.strings_spilled += 1
+                self.stats.spilled_bytes += self._str_len
+                self.stats.spills.append(self._spill_path)
+                note = f"\n[… {self._str_len:,} bytes spilled to {self._spill_path}]"
+            else:
+                self.stats.strings_truncated += 1
+                note = f"\n[… truncated, {self._str_len:,} bytes]"
+            self._str += json.dumps(note)[1:-1].encode()
+        self._out += self._str
+        self._out += b'"'
+        self._received += 1
+        self._str = bytearray()
+        self._str_len = 0
+        self._overflow = False
+        self._in_string = False
+
+    def _finish(self) -> dict[str, Any]:
+        data = bytes(self._out)
+        self.stats.max_message_bytes = max(self.stats.max_message_bytes, self._received)
+        self.stats.max_retained_bytes = max(self.stats.max_retained_bytes, len(data))
+        self._reset()
+        started = time.perf_counter()
+        try:
+            message = self.loads(data)
+        except ValueError as e:
+            raise CLIJSONDecodeError(data.decode("utf-8", "replace"), e) from e
+        finally:
+            self.stats.parse_s += time.perf_counter() - started
+        self.stats.messages += 1
+        return message
+
+    def _reset(self) -> None:
+        self._out = bytearray()
+        self._state = "start"
+        self._in_string = False
+
+
+class StreamingCLITransport(SubprocessCLITransport):
+    """The CLI subprocess transport with IncrementalDecoder on stdout."""
+
+    def __init__(self, *, prompt: Any, options: ClaudeAgentOptions, decoder: IncrementalDecoder | None = None):
+        super().__init__(prompt=prompt, options=options)
+        self.decoder = decoder or IncrementalDecoder(max_buffer_size=self._max_buffer_size)
+
+    async def _read_messages_impl(self) -> AsyncIterator[dict[str, Any]]:
+        if not self._process or not self._process.stdout:
+            raise CLIConnectionError("Not connected")
+        try:
+            # raw bytes, bypassing the TextReceiveStream the base class reads from
+            async for chunk in self._process.stdout:
+                for message in self.decoder.feed(chunk):
+                    yield message
+        except (anyio.ClosedResourceError, anyio.EndOfStream):
+            pass
+
+        try:
+            returncode = await self._process.wait()
+        except Exception:
+            returncode = -1
+        if returncode is not None and returncode != 0:
+            self._exit_error = ProcessError(
+                f"Command failed with exit code {returncode}",
+                exit_code=returncode,
+                stderr="Check stderr output for details",
+            )
+            raise self._exit_error
+
+
+async def main():
+    options = ClaudeAgentOptions(
+        allowed_tools=["Read", "Bash", "Glob"],
+        permission_mode="bypassPermissions",
+        max_turns=5,
+    )
+    decoder = IncrementalDecoder(max_string_bytes=128 * 1024, spill_dir=".claude-spill")
+    # the client hands a custom transport its options as-is: with can_use_tool, also set
+    # permission_prompt_tool_name="stdio" here, as ClaudeSDKClient does for its own transport
+    transport = StreamingCLITransport(prompt="", options=options, decoder=decoder)
+
+    async with ClaudeSDKClient(options=options, transport=transport) as client:
+        await client.query("Generate a 5 MB CSV with `seq`, read it back with cat, and report the last line")
+        async for msg in client.receive_response():
+            if isinstance(msg, ResultMessage):
+                print(msg.result if msg.subtype == "success" else f"Error: {msg.subtype}")
+
+    print(decoder.stats.summary())
+    for path in decoder.stats.spills[:3]:
+        print(f"  {path}: {len(read_spilled(path)):,} chars")
+
+if __name__ == "__main__":  # scripts/bench_decoder.py imports the decoder from here
+    asyncio.run(main())
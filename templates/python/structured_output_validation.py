@@ -0,0 +1,270 @@
+"""Incremental structured-output validation with cached validators (Python).
+
+structured_output.py rebuilds the JSON schema on every run and only validates
+the final ResultMessage, so a wrong shape surfaces as
+error_max_structured_output_retries after every retry has been paid for.
+
+With output_format set, the model answers by calling the StructuredOutput
+tool, and with include_partial_messages=True that tool input streams in as
+input_json_delta fragments. StructuredOutputGuard:
+
+- caches the JSON schema and per-field pydantic validators per model class;
+- feeds the streamed fragments to an incremental scanner that yields each
+  top-level field (and each element of top-level arrays) as soon as its JSON
+  value is complete, and validates it immediately;
+- on the first violation, interrupts the turn and steers the model with the
+  exact field error instead of letting it finish and retry blindly;
+- reports attempts, CLI-side retries, early aborts and cost per round.
+"""
+import asyncio
+import json
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+from typing import Annotated, Any, Generic, TypeVar, get_args, get_origin
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from claude_agent_sdk import (
+    ClaudeSDKClient, ClaudeAgentOptions,
+    ResultMessage, StreamEvent, ToolResultBlock, ToolUseBlock, AssistantMessage, UserMessage,
+)
+
+STRUCTURED_OUTPUT_TOOL = "StructuredOutput"
+M = TypeVar("M", bound=BaseModel)
+
+
+class Issue(BaseModel):
+    severity: str = Field(pattern="^(critical|warning|info)$")
+    file: str
+    line: int | None = None
+    description: str
+
+
+class CodeReview(BaseModel):
+    summary: str
+    issues: list[Issue]
+    score: int = Field(ge=0, le=100)
+    recommendation: str = Field(pattern="^(approve|request_changes|needs_discussion)$")
+
+
+@lru_cache(maxsize=None)
+def schema_for(model: type[BaseModel]) -> dict[str, Any]:
+    return model.model_json_schema()
+
+
+@lru_cache(maxsize=None)
+def field_validators(model: type[BaseModel]) -> dict[str, tuple[TypeAdapter, TypeAdapter | None]]:
+    """Per field: (validator for the whole value, validator for one list item or None)."""
+    validators = {}
+    for name, info in model.model_fields.items():
+        annotation = Annotated[(info.annotation, *info.metadata)] if info.metadata else info.annotation
+        item = None
+        if get_origin(info.annotation) is list and get_args(info.annotation):
+            item = TypeAdapter(get_args(info.annotation)[0])
+        validators[info.alias or name] = (TypeAdapter(annotation), item)
+    return validators
+
+
+class IncrementalObjectScanner:
+    """Yield (field, item_index, raw JSON) as values of a streamed JSON object complete.
+
+    item_index is None for a complete top-level field, or the position of a
+    complete element inside a top-level array (the array itself is yielded
+    too, once closed).
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._i = 0
+        self._stack: list[str] = []
+        self._in_str = self._esc = False
+        self._state = "key"
+        self._key: str | None = None
+        self._key_start = self._value_start = 0
+        self._item_start: int | None = None
+        self._item_index = 0
+
+    def feed(self, chunk: str) -> list[tuple[str, int | None, str]]:
+        out: list[tuple[str, int | None, str]] = []
+        self.text += chunk
+        text = self.text
+        while self._i < len(text):
+            i, c = self._i, text[self._i]
+            self._i += 1
+            depth = len(self._stack)
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif c == "\\":
+                    self._esc = True
+                elif c == '"':
+                    self._in_str = False
+                    if depth == 1 and self._state == "key":
+                        self._key = json.loads(text[self._key_start:i + 1])
+                        self._state = "colon"
+                continue
+            if depth == 0:
+                if c == "{":
+                    self._stack.append(c)
+                continue
+            if depth == 1:
+                if self._state == "key":
+                    if c == '"':
+                        self._in_str, self._key_start = True, i
+                    elif c == "}":
+                        self._stack.pop()
+                    continue
+                if self._state == "colon":
+                    if c == ":":
+                        self._state = "value"
+                    continue
+                if self._state == "value":
+                    if c.isspace():
+                        continue
+                    self._value_start, self._state = i, "in_value"
+                elif c in ",}":
+                    out.append((self._key, None, text[self._value_start:i]))
+                    self._state = "key"
+                    if c == "}":
+                        self._stack.pop()
+                    continue
+            if depth == 2 and self._stack[-1] == "[":
+                if c in ",]":
+                    if self._item_start is not None:
+                        out.append((self._key, self._item_index, text[self._item_start:i]))
+                        self._item_index += 1
+                        self._item_start = None
+                    if c == "]":
+                        self._stack.pop()
+                    continue
+                if self._item_start is None and not c.isspace():
+                    self._item_start = i
+            if c == '"':
+                self._in_str = True
+            elif c in "{[":
+                self._stack.append(c)
+                if c == "[" and len(self._stack) == 2:
+                    self._item_index, self._item_start = 0, None
+            elif c in "}]":
+                self._stack.pop()
+        return out
+
+
+@dataclass
+class GuardReport:
+    attempts: int = 0            # StructuredOutput tool calls seen
+    cli_retries: int = 0         # calls the CLI rejected against the schema
+    early_aborts: int = 0        # calls we interrupted mid-stream
+    violations: list[str] = field(default_factory=list)
+    round_costs: list[float] = field(default_factory=list)
+
+    @property
+    def cost_usd(self) -> float:
+        return sum(self.round_costs)
+
+
+class StructuredOutputGuard(Generic[M]):
+    def __init__(self, model: type[M], options: ClaudeAgentOptions, max_steers: int = 2):
+        self.model = model
+        self.max_steers = max_steers
+        self.validators = field_validators(model)
+        self.options = replace(
+            options,
+            output_format={"type": "json_schema", "schema": schema_for(model)},
+            include_partial_messages=True,
+        )
+        self.report = GuardReport()
+
+    def _check(self, name: str, index: int | None, raw: str) -> str | None:
+        whole, item = self.validators.get(name, (None, None))
+        adapter = item if index is not None else whole
+        if adapter is None:
+            return None
+        try:
+            # strict JSON mode, like the CLI's schema check: "3" is not an integer
+            adapter.validate_json(raw, strict=True)
+        except ValidationError as e:
+            where = f"{name}[{index}]" if index is not None else name
+            details = "; ".join(
+                f"{'.'.join(map(str, err['loc']))}: {err['msg']}" if err["loc"] else err["msg"]
+                for err in e.errors()
+            )
+            return f"{where}: {details}"
+        return None
+
+    async def _round(self, client: ClaudeSDKClient, prompt: str) -> tuple[ResultMessage | None, str | None]:
+        await client.query(prompt)
+        scanner: IncrementalObjectScanner | None = None
+        block_index: int | None = None
+        violation: str | None = None
+        tool_ids: set[str] = set()
+        result = None
+        async for msg in client.receive_response():
+            if isinstance(msg, StreamEvent) and msg.parent_tool_use_id is None and violation is None:
+                ev = msg.event
+                if ev.get("type") == "content_block_start":
+                    block = ev.get("content_block", {})
+                    if block.get("type") == "tool_use" and block.get("name") == STRUCTURED_OUTPUT_TOOL:
+                        scanner, block_index = IncrementalObjectScanner(), ev.get("index")
+                        self.report.attempts += 1
+                elif ev.get("type") == "content_block_delta" and scanner and ev.get("index") == block_index:
+                    for name, index, raw in scanner.feed(ev["delta"].get("partial_json", "")):
+                        if violation := self._check(name, index, raw):
+                            self.report.violations.append(violation)
+                            self.report.early_aborts += 1
+                            await client.interrupt()
+                            break
+            elif isinstance(msg, AssistantMessage):
+                tool_ids.update(b.id for b in msg.content
+                                if isinstance(b, ToolUseBlock) and b.name == STRUCTURED_OUTPUT_TOOL)
+            elif isinstance(msg, UserMessage) and isinstance(msg.content, list):
+                self.report.cli_retries += sum(
+                    1 for b in msg.content
+                    if isinstance(b, ToolResultBlock) and b.tool_use_id in tool_ids and b.is_error
+                )
+            elif isinstance(msg, ResultMessage):
+                result = msg
+        return result, violation
+
+    async def run(self, prompt: str) -> M | None:
+        async with ClaudeSDKClient(options=self.options) as client:
+            cumulative = 0.0
+            for steer in range(self.max_steers + 1):
+                result, violation = await self._round(client, prompt)
+                if result and result.total_cost_usd is not None:
+                    # total_cost_usd is cumulative for the client's session
+                    self.report.round_costs.append(result.total_cost_usd - cumulative)
+                    cumulative = result.total_cost_usd
+                if violation is None and result and result.structured_output:
+                    return self.model.model_validate(result.structured_output)
+                if violation is None:
+                    return None  # failed for another reason; see result.subtype
+                prompt = (
+                    f"Your structured output was rejected early: {violation}. "
+                    f"Produce the full structured output again, fixing that field."
+                )
+        return None
+
+
+async def main():
+    options = ClaudeAgentOptions(
+        allowed_tools=["Read", "Grep", "Glob"],
+        permission_mode="bypassPermissions",
+    )
+
+    guard = StructuredOutputGuard(CodeReview, options)
+    review = await guard.run("Review the codebase for security issues and code quality")
+
+    if review:
+        print(f"Score: {review.score}/100")
+        print(f"Recommendation: {review.recommendation}")
+        for issue in review.issues:
+            print(f"  [{issue.severity}] {issue.file}:{issue.line or '?'} — {issue.description}")
+    else:
+        print("No valid structured output")
+
+    r = guard.report
+    print(f"attempts={r.attempts} cli_retries={r.cli_retries} early_aborts={r.early_aborts} "
+          f"cost=${r.cost_usd:.4f} per round={[round(c, 4) for c in r.round_costs]}")
+    for v in r.violations:
+        print(f"  violation: {v}")
+
+asyncio.run(main())
@@ -1,6 +1,6 @@
 """Subagent orchestration with Claude Agent SDK."""
 import asyncio
-from claude_agent_sdk import query, ClaudeAgentOptions, AgentDefinition
+from claude_agent_sdk import query, ClaudeAgentOptions, AgentDefinition, ResultMessage
 
 async def main():
     options = ClaudeAgentOptions(
@@ -22,8 +22,6 @@ async def main():
         permission_mode="bypassPermissions",
     )
 
-    from claude_agent_sdk import ResultMessage
-
     async for msg in query(prompt="Use the reviewer to check main.py", options=options):
         if isinstance(msg, ResultMessage):
             print(msg.result if msg.result else f"Error: {msg.subtype}")
@@ -0,0 +1,263 @@
+"""Execution policies for SDK MCP tool handlers (Python).
+
+Handlers registered with create_sdk_mcp_server() run on the client's event
+loop. One CPU-heavy or blocking handler stalls message streaming, hooks and
+every other tool for the whole session. ToolExecutor gives each tool a
+policy:
+
+- "inline": an async handler on the loop, as before (for I/O-bound tools);
+- "thread": a plain function in a shared thread pool (blocking I/O, C code
+  that releases the GIL);
+- "process": a plain, module-level function in a process pool (pure-Python
+  CPU work such as parsing or indexing); args and results must pickle.
+
+Every policy has a per-tool concurrency limit and an optional timeout. A call
+that times out returns an is_error result so the model can react. When the
+CLI cancels a tool call (e.g. on interrupt) or cancel_all() is called, the
+queued work is dropped. A thread or process that is already running cannot
+be stopped, so its result is discarded and it counts as abandoned; it keeps
+its concurrency slot until it really finishes, so max_concurrency bounds
+actual pool usage.
+
+The process pool may re-import this script in each worker (spawn on macOS,
+forkserver on Linux from Python 3.14), hence the __main__ guard at the end.
+
+Per tool, metrics() reports calls, current and peak queue depth, queue wait,
+execution-time percentiles, timeouts, cancellations and errors.
+"""
+import asyncio
+import hashlib
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Literal
+from claude_agent_sdk import (
+    query, tool, create_sdk_mcp_server, ClaudeAgentOptions,
+    ResultMessage, SdkMcpTool,
+)
+
+Mode = Literal["inline", "thread", "process"]
+
+
+@dataclass(frozen=True)
+class ExecutionPolicy:
+    mode: Mode = "inline"
+    max_concurrency: int = 4
+    timeout_s: float | None = None
+
+
+@dataclass
+class ToolMetrics:
+    calls: int = 0
+    completed: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    cancelled: int = 0
+    abandoned: int = 0  # cancelled or timed out while already running off-loop
+    queued: int = 0     # waiting for a concurrency slot right now
+    running: int = 0
+    max_queued: int = 0
+    queue_wait_s: float = 0.0
+    exec_s: deque[float] = field(default_factory=lambda: deque(maxlen=1024))  # recent calls
+
+    def percentile(self, q: float) -> float | None:
+        ordered = sorted(self.exec_s)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)] if ordered else None
+
+
+def _error(text: str) -> dict[str, Any]:
+    return {"content": [{"type": "text", "text": text}], "is_error": True}
+
+
+class ToolExecutor:
+    def __init__(self, max_threads: int = 8, max_processes: int = 2):
+        self.max_threads = max_threads
+        self.max_processes = max_processes
+        self._threads: ThreadPoolExecutor | None = None
+        self._processes: ProcessPoolExecutor | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self.metrics: dict[str, ToolMetrics] = {}
+
+    def _pool(self, mode: Mode) -> Executor:
+        # created on first use, so inline-only servers never start workers
+        if mode == "thread":
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(self.max_threads, thread_name_prefix="mcp-tool")
+            return self._threads
+        if self._processes is None:
+            self._processes = ProcessPoolExecutor(self.max_processes)
+        return self._processes
+
+    def _run(self, name: str, policy: ExecutionPolicy, call: Callable[[dict[str, Any]], Any]):
+        m = self.metrics.setdefault(name, ToolMetrics())
+        slots = asyncio.Semaphore(policy.max_concurrency)
+
+        def release(_: Any = None) -> None:
+            m.running -= 1
+            slots.release()
+
+        async def handler(args: dict[str, Any]) -> dict[str, Any]:
+            task = asyncio.current_task()
+            self._tasks.add(task)
+            m.calls += 1
+            m.queued += 1
+            m.max_queued = max(m.max_queued, m.queued)
+            queued_at = time.perf_counter()
+            started = None
+            try:
+                await slots.acquire()
+                m.queued -= 1
+                started = time.perf_counter()
+                m.queue_wait_s += started - queued_at
+                m.running += 1
+                try:
+                    work = call(args)
+                except BaseException:
+                    release()
+                    raise
+                if isinstance(work, Future):
+                    # the slot is freed when the pool work ends, not when we stop waiting for it
+                    loop = asyncio.get_running_loop()
+                    work.add_done_callback(lambda _: loop.is_closed() or loop.call_soon_threadsafe(release))
+                    work = asyncio.wrap_future(work)
+                else:
+                    work = asyncio.ensure_future(work)
+                    work.add_done_callback(release)
+                result = await asyncio.wait_for(work, policy.timeout_s)
+            except asyncio.TimeoutError:
+                m.timeouts += 1
+                m.abandoned += policy.mode != "inline"
+                return _error(f"{name} timed out after {policy.timeout_s:g}s")
+            except asyncio.CancelledError:
+                m.cancelled += 1
+                if started is None:
+                    m.queued -= 1
+                else:
+                    m.abandoned += policy.mode != "inline"
+                raise
+            except Exception:
+                m.errors += 1
+                raise
+            finally:
+                self._tasks.discard(task)
+                if started is not None:
+                    m.exec_s.append(time.perf_counter() - started)
+            m.completed += 1
+            m.errors += bool(result.get("is_error"))
+            return result
+
+        return handler
+
+    def wrap(self, sdk_tool: SdkMcpTool[Any], policy: ExecutionPolicy = ExecutionPolicy()) -> SdkMcpTool[Any]:
+        """An async @tool with concurrency limit, timeout and metrics; it still runs inline."""
+        if policy.mode != "inline":
+            raise ValueError(f"{sdk_tool.name}: wrap() runs async handlers inline; use offload() for {policy.mode}")
+        return replace(sdk_tool, handler=self._run(sdk_tool.name, policy, sdk_tool.handler))
+
+    def offload(
+        self,
+        name: str,
+        description: str,
+        input_schema: type | dict[str, Any],
+        fn: Callable[[dict[str, Any]], dict[str, Any]],
+        policy: ExecutionPolicy,
+    ) -> SdkMcpTool[Any]:
+        """A tool whose synchronous fn(args) runs in the thread or process pool."""
+        if policy.mode == "inline":
+            raise ValueError(f"{name}: offload() needs a thread or process policy")
+
+        def call(args: dict[str, Any]) -> Future:
+            return self._pool(policy.mode).submit(fn, args)
+
+        return tool(name, description, input_schema)(self._run(name, policy, call))
+
+    def cancel_all(self) -> int:
+        """Cancel every queued or running tool call, e.g. alongside client.interrupt()."""
+        tasks = [t for t in self._tasks if not t.done()]
+        for t in tasks:
+            t.cancel()
+        return len(tasks)
+
+    def shutdown(self) -> None:
+        for pool in (self._threads, self._processes):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        self._threads = self._processes = None
+
+    def summary(self) -> str:
+        lines = []
+        for name, m in self.metrics.items():
+            p50, p95 = m.percentile(0.5), m.percentile(0.95)
+            timing = f"p50 {p50 * 1000:.1f}ms p95 {p95 * 1000:.1f}ms" if p50 is not None else "no runs"
+            lines.append(
+                f"{name}: {m.calls} calls, {timing}, queue now {m.queued} peak {m.max_queued} "
+                f"wait {m.queue_wait_s:.2f}s, timeouts={m.timeouts} cancelled={m.cancelled} "
+                f"abandoned={m.abandoned} errors={m.errors}"
+            )
+        return "\n".join(lines)
+
+
+@tool("search_docs", "Search documentation", {
+    "query": {"type": "string", "description": "Search query"},
+    "limit": {"type": "integer", "description": "Max results", "default": 5}
+})
+async def search_docs(args: dict[str, Any]) -> dict[str, Any]:
+    await asyncio.sleep(0.05)  # stand-in for an async search backend
+    q = args.get("query", "")
+    results = [f"Result {i}: {q} match" for i in range(1, min(args.get("limit", 5) + 1, 4))]
+    return {"content": [{"type": "text", "text": "\n".join(results)}]}
+
+
+def file_stats(args: dict[str, Any]) -> dict[str, Any]:
+    """Blocking filesystem walk: thread pool."""
+    root = Path(args.get("path", "."))
+    files = [p for p in root.rglob("*") if p.is_file()][:10_000]
+    size = sum(p.stat().st_size for p in files)
+    return {"content": [{"type": "text", "text": f"{len(files)} files, {size:,} bytes under {root}"}]}
+
+
+def checksum_tree(args: dict[str, Any]) -> dict[str, Any]:
+    """CPU-bound hashing of every file: process pool. Module-level so it pickles."""
+    h = hashlib.sha256()
+    for p in sorted(Path(args.get("path", ".")).rglob("*")):
+        if p.is_file():
+            h.update(p.read_bytes())
+    return {"content": [{"type": "text", "text": h.hexdigest()}]}
+
+
+async def main():
+    executor = ToolExecutor(max_threads=4, max_processes=2)
+    path_schema = {"path": {"type": "string", "description": "Directory"}}
+    server = create_sdk_mcp_server(
+        name="docs",
+        version="1.0.0",
+        tools=[
+            executor.wrap(search_docs, ExecutionPolicy("inline", max_concurrency=8, timeout_s=10)),
+            executor.offload("file_stats", "Count files and bytes under a directory", path_schema,
+                             file_stats, ExecutionPolicy("thread", max_concurrency=4, timeout_s=20)),
+            executor.offload("checksum_tree", "SHA-256 over every file under a directory", path_schema,
+                             checksum_tree, ExecutionPolicy("process", max_concurrency=2, timeout_s=60)),
+        ],
+    )
+
+    options = ClaudeAgentOptions(
+        mcp_servers={"docs": server},
+        system_prompt="You help users search documentation and inspect the repository.",
+        permission_mode="bypassPermissions",
+    )
+
+    try:
+        async for msg in query(prompt="Search the docs for authentication, then checksum the src tree",
+                               options=options):
+            if isinstance(msg, ResultMessage) and msg.subtype == "success":
+                print(msg.result)
+    finally:
+        executor.shutdown()
+
+    print(executor.summary())
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,255 @@
+"""End-to-end tool-call tracing and latency histograms from hooks (Python).
+
+hooks_example.py logs PreToolUse and PostToolUse separately, so nothing says
+how long a tool actually ran, or where a slow run spent its time. ToolTracer
+registers its own HookMatchers and pairs events into spans:
+
+- tool: PreToolUse → PostToolUse / PostToolUseFailure, paired by tool_use_id;
+- permission: time inside can_use_tool, when wrapped with wrap_can_use_tool();
+- model: from a lane going idle (prompt sent, last tool finished) to its next
+  tool call or Stop, i.e. time the model spent thinking and generating;
+- subagent: SubagentStart → SubagentStop, paired by agent_id;
+- task: TaskStartedMessage → TaskNotificationMessage, with TaskProgressMessage
+  token counts as counter events (pass every message to observe()).
+
+Each agent gets its own lane: the main thread, or the agent_id that tool hooks
+carry inside subagents. Per-tool latency histograms (log2 ms buckets) name the
+bottleneck, and write_chrome_trace() exports the run for chrome://tracing or
+https://ui.perfetto.dev.
+"""
+import asyncio
+import json
+import math
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+from claude_agent_sdk import (
+    ClaudeSDKClient, ClaudeAgentOptions, HookMatcher, HookContext, Message,
+    ResultMessage, TaskStartedMessage, TaskProgressMessage, TaskNotificationMessage,
+    CanUseTool, PermissionResultAllow, PermissionResultDeny, ToolPermissionContext,
+)
+
+MAIN = "main"
+
+
+@dataclass
+class Span:
+    kind: str  # tool | permission | model | subagent | task
+    name: str
+    lane: str
+    start_s: float
+    end_s: float | None = None
+    status: str = "ok"
+    args: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_s(self) -> float:
+        return (self.end_s if self.end_s is not None else self.start_s) - self.start_s
+
+
+class ToolTracer:
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.spans: list[Span] = []
+        self.counters: list[tuple[float, str, dict[str, int]]] = []  # (at, name, values)
+        self._open: dict[str, Span] = {}  # "tool:<id>" / "agent:<id>" / "task:<id>" -> span
+        self._idle_since: dict[str, float] = {}  # lane -> when it started waiting on the model
+        self._busy: dict[str, int] = {}  # lane -> tool calls in flight
+        self._permission_s: dict[str, float] = {}  # tool_use_id -> time in can_use_tool
+
+    def _now(self) -> float:
+        return time.perf_counter() - self.t0
+
+    def _begin(self, key: str, span: Span) -> None:
+        self._open[key] = span
+        self.spans.append(span)
+
+    def _end(self, key: str, status: str = "ok", **args: Any) -> Span | None:
+        span = self._open.pop(key, None)
+        if span is not None:
+            span.end_s = self._now()
+            span.status = status
+            span.args.update(args)
+        return span
+
+    def _model_done(self, lane: str) -> None:
+        started = self._idle_since.pop(lane, None)
+        if started is not None:
+            self.spans.append(Span("model", "model", lane, started, self._now()))
+
+    def mark_prompt(self, lane: str = MAIN) -> None:
+        """The model starts working on a prompt; call right after sending one."""
+        self._idle_since[lane] = self._now()
+
+    # -- hooks ---------------------------------------------------------------
+
+    async def _on_hook(
+        self, input_data: dict[str, Any], tool_use_id: str | None, context: HookContext
+    ) -> dict[str, Any]:
+        event = input_data["hook_event_name"]
+        lane = input_data.get("agent_id") or MAIN
+        tool_use_id = tool_use_id or input_data.get("tool_use_id")
+        if event == "PreToolUse":
+            self._model_done(lane)
+            self._busy[lane] = self._busy.get(lane, 0) + 1
+            self._begin(f"tool:{tool_use_id}", Span("tool", input_data.get("tool_name", "?"), lane, self._now(),
+                                                   args={"tool_use_id": tool_use_id}))
+        elif event in ("PostToolUse", "PostToolUseFailure"):
+            failed = event == "PostToolUseFailure"
+            if self._end(f"tool:{tool_use_id}", "error" if failed else "ok",
+                         **({"error": input_data.get("error")} if failed else {})):
+                self._busy[lane] -= 1
+                if not self._busy[lane]:
+                    self._idle_since[lane] = self._now()  # the model takes over again
+        elif event == "SubagentStart":
+            agent_id = input_data["agent_id"]
+            self._begin(f"agent:{agent_id}", Span("subagent", input_data.get("agent_type", "agent"), agent_id,
+                                                  self._now()))
+            self._idle_since[agent_id] = self._now()
+        elif event == "SubagentStop":
+            self._model_done(input_data["agent_id"])
+            self._end(f"agent:{input_data['agent_id']}")
+        elif event == "Stop":
+            self._model_done(MAIN)
+        return {}
+
+    def hooks(self) -> dict[str, list[HookMatcher]]:
+        """HookMatchers to merge into ClaudeAgentOptions.hooks."""
+        events = ["PreToolUse", "PostToolUse", "PostToolUseFailure", "SubagentStart", "SubagentStop", "Stop"]
+        return {event: [HookMatcher(hooks=[self._on_hook])] for event in events}
+
+    def wrap_can_use_tool(self, can_use_tool: CanUseTool) -> CanUseTool:
+        """Time a can_use_tool callback as permission spans inside the tool span."""
+        async def traced(tool_name: str, tool_input: dict[str, Any], context: ToolPermissionContext):
+            span = Span("permission", tool_name, context.agent_id or MAIN, self._now(),
+                        args={"tool_use_id": context.tool_use_id})
+            self.spans.append(span)
+            try:
+                result = await can_use_tool(tool_name, tool_input, context)
+                span.status = result.behavior
+                return result
+            finally:
+                span.end_s = self._now()
+                if context.tool_use_id:
+                    self._permission_s[context.tool_use_id] = \
+                        self._permission_s.get(context.tool_use_id, 0.0) + span.duration_s
+        return traced
+
+    # -- message stream ------------------------------------------------------
+
+    def observe(self, msg: Message) -> None:
+        if isinstance(msg, TaskStartedMessage):
+            self._begin(f"task:{msg.task_id}", Span("task", msg.description, f"task:{msg.task_id}", self._now(),
+                                                    args={"task_type": msg.task_type, "tool_use_id": msg.tool_use_id}))
+        elif isinstance(msg, TaskProgressMessage):
+            self.counters.append((self._now(), f"task {msg.task_id}",
+                                  {"tokens": msg.usage["total_tokens"], "tool_uses": msg.usage["tool_uses"]}))
+        elif isinstance(msg, TaskNotificationMessage):
+            self._end(f"task:{msg.task_id}", "ok" if msg.status == "completed" else msg.status)
+        elif isinstance(msg, ResultMessage):
+            self.finish()
+
+    def finish(self) -> None:
+        """Close whatever is still open, e.g. after an interrupt."""
+        for key in list(self._open):
+            self._end(key, "unfinished")
+        for lane in list(self._idle_since):
+            self._model_done(lane)
+        self._busy.clear()
+
+    # -- reports -------------------------------------------------------------
+
+    def tool_time_s(self, span: Span) -> float:
+        """Tool span minus the permission checks inside it: time actually executing."""
+        waited = self._permission_s.get(span.args.get("tool_use_id") or "", 0.0)
+        return max(span.duration_s - waited, 0.0)
+
+    def histograms(self) -> dict[str, dict[float, int]]:
+        """Per-tool execution time histograms: bucket upper bound (ms, powers of 2) -> count."""
+        out: dict[str, dict[float, int]] = {}
+        for span in self.spans:
+            if span.kind == "tool" and span.end_s is not None:
+                ms = self.tool_time_s(span) * 1000
+                bucket = 2.0 ** max(math.ceil(math.log2(ms)), 0) if ms > 0 else 1.0
+                hist = out.setdefault(span.name, {})
+                hist[bucket] = hist.get(bucket, 0) + 1
+        return {name: dict(sorted(h.items())) for name, h in out.items()}
+
+    def breakdown(self) -> dict[str, float]:
+        """Seconds per span kind on the main lane: where the run's wall time went."""
+        out: dict[str, float] = {}
+        for span in self.spans:
+            if span.lane == MAIN:
+                seconds = self.tool_time_s(span) if span.kind == "tool" else span.duration_s
+                out[span.kind] = out.get(span.kind, 0.0) + seconds
+        return out
+
+    def print_report(self) -> None:
+        by_tool: dict[str, list[float]] = {}
+        for span in self.spans:
+            if span.kind == "tool" and span.end_s is not None:
+                by_tool.setdefault(span.name, []).append(self.tool_time_s(span) * 1000)
+        print(f"{'tool':24} {'calls':>5} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'total ms':>10}")
+        for name, values in sorted(by_tool.items(), key=lambda kv: -sum(kv[1])):
+            values.sort()
+            p50, p95 = (values[min(int(q * len(values)), len(values) - 1)] for q in (0.5, 0.95))
+            print(f"{name:24} {len(values):5} {p50:9.1f} {p95:9.1f} {values[-1]:9.1f} {sum(values):10.1f}")
+        for name, hist in self.histograms().items():
+            print(f"  {name}: " + "  ".join(f"≤{b:g}ms:{n}" for b, n in hist.items()))
+        split = self.breakdown()
+        total = sum(split.values()) or 1.0
+        print("main lane: " + ", ".join(f"{k} {v:.2f}s ({v / total:.0%})" for k, v in sorted(split.items())))
+
+    def chrome_trace(self) -> dict[str, Any]:
+        """Trace Event Format: one thread per lane, complete events for spans."""
+        lanes = {MAIN: 0}
+        for span in self.spans:
+            lanes.setdefault(span.lane, len(lanes))
+        events: list[dict[str, Any]] = [
+            {"ph": "M", "name": "thread_name", "pid": 1, "tid": tid, "args": {"name": lane}}
+            for lane, tid in lanes.items()
+        ]
+        for span in self.spans:
+            events.append({
+                "ph": "X", "name": span.name, "cat": span.kind, "pid": 1, "tid": lanes[span.lane],
+                "ts": round(span.start_s * 1e6, 1), "dur": round(span.duration_s * 1e6, 1),
+                "args": {"status": span.status, **span.args},
+            })
+        for at, name, values in self.counters:
+            events.append({"ph": "C", "name": name, "pid": 1, "ts": round(at * 1e6, 1), "args": values})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: str | Path) -> Path:
+        path = Path(path)
+        path.write_text(json.dumps(self.chrome_trace()))
+        return path
+
+
+async def allow_outside_secrets(
+    tool_name: str, tool_input: dict[str, Any], context: ToolPermissionContext
+) -> PermissionResultAllow | PermissionResultDeny:
+    if ".env" in str(tool_input.get("file_path", "")):
+        return PermissionResultDeny(message="Secrets are off limits")
+    return PermissionResultAllow()
+
+
+async def main():
+    tracer = ToolTracer()
+    options = ClaudeAgentOptions(
+        hooks=tracer.hooks(),
+        can_use_tool=tracer.wrap_can_use_tool(allow_outside_secrets),
+    )
+
+    async with ClaudeSDKClient(options=options) as client:
+        await client.query("Find why the test suite is slow and fix the worst offender")
+        tracer.mark_prompt()
+        async for message in client.receive_response():
+            tracer.observe(message)
+            if isinstance(message, ResultMessage):
+                print(message.result if message.subtype == "success" else f"Error: {message.subtype}")
+
+    tracer.print_report()
+    print(f"Trace: {tracer.write_chrome_trace('tool-trace.json')}")
+
+asyncio.run(main())